@@ -0,0 +1,70 @@
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+_ROOT_PATH = Path(__file__).parent.parent
+
+# (label, script, arguments), every command runs in a fresh interpreter
+_COMMANDS = [
+    ("generate_html.py --help", "generate_html.py", ["--help"]),
+    ("generate_css.py --help", "generate_css.py", ["--help"]),
+    ("serve.py --help", "serve.py", ["--help"]),
+    ("python -c 'import python_lib.render'", None,
+        ["-c", "import python_lib.render"]),
+]
+
+
+## ========================================================================== ##
+##                                 BENCHMARK                                  ##
+## ========================================================================== ##
+def time_command(arguments:list, repeat:int) -> list:
+    """ Run `python <arguments>` `repeat` times, return wall times in ms.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + arguments,
+                       cwd=str(_ROOT_PATH),
+                       stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL,
+                       check=True)
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return timings
+
+
+## ========================================================================== ##
+##                                    main                                    ##
+## ========================================================================== ##
+def main():
+
+    parser = argparse.ArgumentParser(
+        description=\
+            f"Measure start-up time of the command line tools (each run is "\
+            f"a fresh interpreter, thus import costs are included). Use "\
+            f"'python -X importtime <script>' to see what is imported.")
+    parser.add_argument("-n", "--repeat",
+            type=int,
+            default=10,
+            help=f"Number of runs per command (default: 10)")
+    args = parser.parse_args()
+
+    # interpreter alone, subtracted from the rest
+    baseline = statistics.median(
+        time_command(arguments=["-c", "pass"], repeat=args.repeat))
+    print(f"{'interpreter (python -c pass)':<40} {baseline:8.1f} ms")
+    print(f"{'command':<40} {'median':>8}    {'min':>8}    {'+imports':>8}")
+    for label, script, arguments in _COMMANDS:
+        if script is not None:
+            arguments = [str(Path(_ROOT_PATH, script))] + arguments
+        timings = time_command(arguments=arguments, repeat=args.repeat)
+        median = statistics.median(timings)
+        print(f"{label:<40} {median:8.1f} ms {min(timings):8.1f} ms "\
+              f"{median - baseline:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
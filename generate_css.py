@@ -1,16 +1,15 @@
-from pygments.formatters import HtmlFormatter
-
 import argparse
-import sys
+import os
 from pathlib import Path
+import sys
 
-import os
-import yaml
 
-from types import SimpleNamespace
-import json
 from python_lib.log import print_headline, print_notice, print_report, \
-    log_reset_prepend, _NOTE, _CRITICAL
+    log_reset_prepend, _NOTE, _WARNING, _CRITICAL
+from python_lib.fingerprint import fingerprint_index_html
+from python_lib.utils import load_config_file, write_if_changed, \
+    get_files_of_type
+from python_lib.token_css import collect_token_classes, prune_css
 
 
 ## ========================================================================== ##
@@ -26,6 +25,7 @@ def get_pygments_css(style:str, default_style:str):
     :raises ValueError: _description_
     :return: _description_
     """
+    from pygments.formatters import HtmlFormatter
     try:
         formatter = HtmlFormatter(style=style)
     except:
@@ -65,39 +65,34 @@ def main():
             default=str(Path(__file__).parent.joinpath("config.yaml")),
             help=f"Path to config file "\
                 f"(default: config.yaml in script's directory)")
+    parser.add_argument("--prune", 
+            action="store_true",
+            help=f"If set, only rules of token classes emitted into "\
+                f"pages generated into `display.pathData` (and fragments) "\
+                f"are kept and rules with identical declarations are "\
+                f"merged, run it again after pages in new languages are "\
+                f"added (`generate_html.py`, `serve.py -r` and "\
+                f"`render_daemon.py` warn about unstyled classes)")
     args = parser.parse_args()
 
-    # get config
-    if os.path.isabs(args.config):
-        config = Path(args.config)
-    else:
-        config = Path(Path(__file__).parent.joinpath(args.config))
-        
     # process config argument
     if os.path.isabs(args.config):
         config_path = Path(args.config)
     else:
-        config_path = Path(Path(__file__).joinpath(args.config))
+        config_path = Path(Path(__file__).parent.joinpath(args.config))
     if not config_path.exists():
         print_report(
             importance=_CRITICAL, 
             message=f"The specified config file does not exist: "\
                     f"{config_path}")
         sys.exit(1)
-    else:
-        try:
-            def load_object(dct):
-                return SimpleNamespace(**dct)
-            with open(config_path, 'r') as file:
-                config_dict = yaml.safe_load(file)
-                config = json.loads(json.dumps(config_dict), 
-                                    object_hook=load_object)
-                config.dataStructure = config_dict['dataStructure']
-        except Exception as e:
-            print_report(
-                importance=_CRITICAL, 
-                message=f"The specified config file cannot be parsed: {e}")
-            sys.exit(1)
+    try:
+        config = load_config_file(config_path)
+    except RuntimeError as e:
+        print_report(
+            importance=_CRITICAL, 
+            message=f"The specified config file cannot be parsed: {e}")
+        sys.exit(1)
 
     # check directory
     directory = Path(args.directory)
@@ -122,19 +117,53 @@ def main():
             default_style=config.default.pygmentsStyle,
         )
     
+    # keep only token classes used by generated pages
+    classes = None
+    if args.prune:
+        root_path = Path(__file__).parent
+        from python_lib.fragments import list_fragments
+        file_paths = get_files_of_type(
+            folder_path=Path(root_path, config.display.pathData), 
+            file_extension=config.generate.targetFileExtension, 
+            recursive=True) 
+        file_paths += list_fragments(root_path=str(root_path))
+        if file_paths:
+            classes = collect_token_classes(file_paths=file_paths)
+            print_report(
+                importance=_NOTE, 
+                message=f"{len(classes)} token classes used by "\
+                        f"{len(file_paths)} generated files")
+        else:
+            print_report(
+                importance=_WARNING, 
+                message=f"no generated pages found, CSS is not pruned "\
+                        f"(run `generate_html.py` first)")
+
     # save files
-    full_css_path = Path(directory, 'pygments_style.css')
-    with open(full_css_path, "w") as file:
-        file.write(css)
-    print_report(
-        importance=_NOTE, 
-        message=f"generating '{str(full_css_path)}'")
-    full_css_path = Path(directory, 'pygments_style_default.css')
-    with open(full_css_path, "w") as file:
-        file.write(css_default)
-    print_report(
-        importance=_NOTE, 
-        message=f"generating '{str(full_css_path)}'")
+    for file_name, content, content_style in [
+            ('pygments_style.css', css, style), 
+            ('pygments_style_default.css', css_default, 
+             config.default.pygmentsStyle)]:
+        if classes is not None:
+            content, num_kept, num_rules = prune_css(css=content, 
+                                                     classes=classes,
+                                                     style=content_style)
+            print_report(
+                importance=_NOTE, 
+                message=f"'{file_name}' keeps {num_kept} of {num_rules} "\
+                        f"token rules")
+        full_css_path = Path(directory, file_name)
+        if write_if_changed(file_path=full_css_path, content=content):
+            message = f"generating '{str(full_css_path)}'"
+        else:
+            message = f"unchanged '{str(full_css_path)}'"
+        print_report(importance=_NOTE, message=message)
+    
+    # update asset hashes (only if CSS is placed where index.html expects it)
+    if fingerprint_index_html(root_path=str(Path(__file__).parent)):
+        print_report(
+            importance=_NOTE, 
+            message=f"updated asset hashes in 'index.html'")
     
     # print to console
     print_notice(notice="SUCCESS", fill='~')
@@ -1,11 +1,187 @@
+from functools import partial
 from pathlib import Path
 import os
+import sys
+import time
+from typing import Tuple
 
 from python_lib.log import print_report, log_set_prepend, log_reset_prepend, \
-    print_headline, print_notice, _NOTE, _ERROR, _CRITICAL
-from python_lib.check_structure import DataStructureChecker
-from python_lib.to_html import StructToHtml
-from python_lib.utils import get_files_of_type, load_yaml_file
+    print_headline, print_notice, print_text, log_set_min_importance, \
+    log_set_jsonl_sink, log_set_context, log_reset_context, log_flush, \
+    print_log, _NOTE, _WARNING, _ERROR, _CRITICAL
+from python_lib.utils import get_files_of_type, load_yaml_file, \
+    write_if_changed
+from python_lib.fingerprint import fingerprint_index_html, \
+    generate_page_manifest, write_page_manifest
+
+
+## ========================================================================== ##
+##                                FINGERPRINTS                                ##
+## ========================================================================== ##
+def update_fingerprints(cli) -> None:
+    """ Tag assets in `index.html` and write page manifest, both carry 
+    content hashes, thus the viewer can cache everything as immutable.
+    """
+    root_path = str(cli.directory)
+    if fingerprint_index_html(root_path=root_path):
+        print_report(
+            importance=_NOTE, 
+            message=f"updated asset hashes in 'index.html'")
+    manifest = generate_page_manifest(root_path=root_path, config=cli.config)
+    print_report(
+        importance=_NOTE, 
+        message=f"page manifest lists {len(manifest['pages'])} pages")
+
+
+## ========================================================================== ##
+##                                   SHARDS                                   ##
+## ========================================================================== ##
+def merge_shards(cli, min_importance:int) -> int:
+    """ Combine partial manifests of all shards into `manifest.json`, print
+    reports of every file (in file order) and record costs for balancing the
+    next split. Returns number of problems (missing/inconsistent shards).
+    """
+    from python_lib.shard import read_partial_manifests, save_costs, \
+        list_partial_manifests
+
+    root_path = str(cli.directory)
+    count = cli.merge_shards
+    merged, problems = read_partial_manifests(root_path=root_path, 
+                                              count=count)
+    for problem in problems:
+        print_report(importance=_CRITICAL, message=problem)
+
+    # reports in file order, as if generated by a single run
+    files = merged["files"]
+    max_len = len(str(len(files)))
+    num_invalid = 0
+    for file_idx, (file_path, record) in enumerate(sorted(files.items())):
+        if not record["valid"]:
+            num_invalid += 1
+        if not record["reports"] and record["valid"]:
+            continue
+        log_set_prepend(value=file_idx+1, max_len=max_len)
+        log_set_context(file=file_path)
+        print_report(
+            importance=_NOTE if record["valid"] else _ERROR, 
+            message=f"file: '{file_path}' ")
+        print_log(log=record["reports"], min_importance=min_importance)
+    log_reset_prepend()
+    log_reset_context()
+
+    if problems:
+        return len(problems)
+
+    # manifest lists pages of all shards
+    pages = {record["page"]: record["hash"] for record in files.values()
+             if record["page"] is not None}
+    num_pages = len(pages)
+    pages.update({record["preview"]: record["previewHash"] 
+                  for record in files.values()
+                  if record.get("preview", None) is not None})
+    if fingerprint_index_html(root_path=root_path):
+        print_report(
+            importance=_NOTE, 
+            message=f"updated asset hashes in 'index.html'")
+    write_page_manifest(root_path=root_path, pages=pages)
+    save_costs(root_path=root_path, merged=merged)
+    # stale partial manifests must not leak into the next merge
+    for shard_path in list_partial_manifests(root_path=root_path):
+        shard_path.unlink()
+    print_headline(
+            headline=f'Merged {count} shards: {num_pages} pages '\
+                     f'(skipped {num_invalid})',
+            fill='#', 
+            width=80,
+        )
+    return 0
+
+
+## ========================================================================== ##
+##                                    PAGES                                   ##
+## ========================================================================== ##
+def iterate_pages(cli, file_paths:list, bulk_paths:list):
+    """ Yield `(file_path, None)` of every .yaml file, then 
+    `(record.name, record)` of every record of bulk files (see 
+    `python_lib.bulk.iterate_bulk_file`). Bulk files are streamed, a record 
+    is parsed only when the previous page is written.
+    """
+    from python_lib.bulk import iterate_bulk_file
+    for file_path in file_paths:
+        yield file_path, None
+    for bulk_path in bulk_paths:
+        for record in iterate_bulk_file(
+                file_path=bulk_path,
+                data_path=Path(cli.directory, cli.config.display.pathData),
+                target_extension=cli.config.generate.targetFileExtension):
+            yield record.name, record
+
+
+## ========================================================================== ##
+##                                 CHECK ONLY                                 ##
+## ========================================================================== ##
+def check_files(cli, file_paths:list, bulk_paths:list, 
+                min_importance:int) -> Tuple[int, int]:
+    """ Validate files across a pool of worker processes, nothing is 
+    highlighted or written. Records of bulk files are streamed and checked
+    by this process. Returns number of checked pages and of pages with 
+    errors.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from itertools import chain
+    from python_lib.render import check_file, check_data
+    from python_lib.bulk import iterate_bulk_file
+
+    root_path = str(Path(__file__).parent)
+    worker = partial(check_file, config=cli.config, root_path=root_path,
+                     min_importance=min_importance)
+    if cli.jobs > 1 and len(file_paths) > 1:
+        executor = ProcessPoolExecutor(max_workers=cli.jobs)
+        chunksize = max(1, len(file_paths) // (cli.jobs * 4))
+        results = executor.map(worker, file_paths, chunksize=chunksize)
+    else:
+        executor = None
+        results = map(worker, file_paths)
+
+    def check_records():
+        root_path = str(Path(__file__).parent)
+        for bulk_path in bulk_paths:
+            for record in iterate_bulk_file(
+                    file_path=bulk_path,
+                    data_path=Path(cli.directory, 
+                                   cli.config.display.pathData),
+                    target_extension=cli.config.generate.targetFileExtension):
+                if record.error is not None:
+                    yield record.name, False, \
+                          [{"importance": _CRITICAL, "message": record.error}]
+                    continue
+                valid, log = check_data(data=record.data, config=cli.config,
+                                        root_path=root_path)
+                yield record.name, valid, log
+
+    num_checked = 0
+    num_invalid = 0
+    max_len = len(str(len(file_paths)))
+    try:
+        for file_idx, (file_path, valid, log) in enumerate(
+                chain(results, check_records())):
+            num_checked += 1
+            if not valid:
+                num_invalid += 1
+            if not log and valid:
+                continue
+            log_set_prepend(value=file_idx+1, max_len=max_len)
+            log_set_context(file=str(file_path))
+            print_report(
+                importance=_NOTE if valid else _ERROR, 
+                message=f"file: '{str(file_path)}' ")
+            print_log(log=log, min_importance=min_importance)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    log_reset_prepend()
+    log_reset_context()
+    return num_checked, num_invalid
 
 
 ## ========================================================================== ##
@@ -19,14 +195,27 @@ def main():
 
     # get command line arguments
     cli = CommandLineInterface(root_path=str(Path(__file__).parent))
-    print(f"working directory     : {cli.directory}")
-    print(f"force rewrite         : {cli.force}")
-    print(f"verbose report        : {cli.verbose}")
-    print(f"recursive processing  : {cli.recursive}")
-    print(f"purge generated files : {cli.purge}")
-    print(f"config-file path      : {cli.config_path}")
+    print_text(f"working directory     : {cli.directory}")
+    print_text(f"force rewrite         : {cli.force}")
+    print_text(f"verbose report        : {cli.verbose}")
+    print_text(f"recursive processing  : {cli.recursive}")
+    print_text(f"purge generated files : {cli.purge}")
+    print_text(f"check only            : {cli.check_only}")
+    print_text(f"worker processes      : {cli.jobs}")
+    if cli.shard is not None:
+        print_text(f"shard                 : {cli.shard[0]}/{cli.shard[1]}")
+    if cli.merge_shards is not None:
+        print_text(f"merge shards          : {cli.merge_shards}")
+    print_text(f"config-file path      : {cli.config_path}")
     if cli.verbose:
-        print(f"config-file content   : {cli.config}")
+        print_text(f"config-file content   : {cli.config}")
+    if cli.log_jsonl is not None:
+        print_text(f"JSON Lines log        : {cli.log_jsonl}")
+
+    # decide up front which reports are kept (skips formatting of the rest)
+    min_importance = _NOTE if cli.verbose else _ERROR
+    log_set_min_importance(min_importance=min_importance)
+    log_set_jsonl_sink(file_path=cli.log_jsonl)
 
     # purging files
     if cli.purge:
@@ -62,62 +251,245 @@ def main():
                 log_reset_prepend()
                 print_notice(notice="SKIP: HTML file not deleted", fill='!')
                 num_skipped += 1
+        # resized images are re-created by the next run
+        from python_lib.images import list_image_variants
+        for variant_path in list_image_variants(
+                root_path=str(Path(__file__).parent)):
+            variant_path.unlink()
+        from python_lib.fragments import list_fragments
+        for fragment_path in list_fragments(
+                root_path=str(Path(__file__).parent)):
+            fragment_path.unlink()
+        # pages rendered on demand (`serve.py -r`) are rendered again
+        from python_lib.render import list_render_cache
+        for cache_path in list_render_cache(
+                root_path=str(Path(__file__).parent)):
+            cache_path.unlink()
         print_headline(
                 headline=f'Deleted {num_deleted} files (skipped {num_skipped})',
                 fill='#', 
                 width=80,
             )
+        update_fingerprints(cli=cli)
         return
 
 
-    # locate all <file>.yaml 
-    file_paths = get_files_of_type(
-        folder_path=Path(cli.directory, cli.config.display.pathData), 
-        file_extension=cli.config.generate.sourceFileExtension, 
-        recursive=cli.recursive)
+    # merging shards
+    if cli.merge_shards is not None:
+        num_problems = merge_shards(cli=cli, min_importance=min_importance)
+        if num_problems > 0:
+            print_notice(notice="FAILED: incomplete shards", fill='!')
+        log_set_jsonl_sink(file_path=None)
+        log_flush()
+        sys.exit(1 if num_problems > 0 else 0)
+
+    # checker, generator and highlighter are needed from here on
+    from python_lib.render import render_page, get_html_path, \
+        get_preview_path, is_preview_path
+    from python_lib.source_files import SourceFileCache
+    from python_lib.images import ImageStore
+    from python_lib.budget import Budget, HeaviestTable
+
+    # locate all <file>.yaml and bulk files (many pages per file)
+    from python_lib.bulk import get_bulk_files, is_bulk_file
+    data_path = Path(cli.directory, cli.config.display.pathData)
+    file_paths = [file_path for file_path in get_files_of_type(
+                    folder_path=data_path, 
+                    file_extension=cli.config.generate.sourceFileExtension, 
+                    recursive=cli.recursive)
+                  if not is_bulk_file(file_path=file_path, config=cli.config)]
+    bulk_paths = get_bulk_files(folder_path=data_path, config=cli.config, 
+                                recursive=cli.recursive)
+    # `<page>.preview.html` is the preview of `<page>.html`
+    for file_path in [file_path for file_path in file_paths
+                      if is_preview_path(file_path=file_path)]:
+        print_report(
+            importance=_CRITICAL,
+            message=f"Skipping '{file_path}': names ending with "\
+                    f"'.preview' are reserved for previews of pages.")
+        file_paths.remove(file_path)
+    # pages of .yaml files (also of other shards) are never overwritten by
+    # records of bulk files
+    html_paths = {get_html_path(file_path=file_path, 
+                                config=cli.config).resolve()
+                  for file_path in file_paths}
+
+    # auto-link dictionary of all pages (also of other shards)
+    auto_linker = None
+    if getattr(cli.config.generate, 'autoLink', False) and not cli.check_only:
+        from python_lib.autolink import build_autolink_dictionary, \
+            get_cache_path, get_link_file
+        auto_linker, auto_link_log = build_autolink_dictionary(
+                file_paths=file_paths, 
+                bulk_paths=bulk_paths,
+                target_extension=cli.config.generate.targetFileExtension,
+                data_path=data_path,
+                cache_path=get_cache_path(root_path=str(cli.directory)),
+            )
+        print_log(log=auto_link_log, min_importance=min_importance)
+
+    # keep only files of this shard (same split on every machine)
+    if cli.shard is not None:
+        from python_lib.shard import split_files, load_costs, get_files_key, \
+            write_partial_manifest
+        shard_index, shard_count = cli.shard
+        files_key = get_files_key(file_paths=file_paths + bulk_paths, 
+                                  root_path=str(cli.directory))
+        num_files = len(file_paths) + len(bulk_paths)
+        # a bulk file is processed by one shard as a whole
+        shard_paths = set(split_files(
+                file_paths=file_paths + bulk_paths, 
+                root_path=str(cli.directory),
+                count=shard_count,
+                costs=load_costs(root_path=str(cli.directory)),
+            )[shard_index - 1])
+        file_paths = [path for path in file_paths if path in shard_paths]
+        bulk_paths = [path for path in bulk_paths if path in shard_paths]
+        print_text(f"files of shard        : {len(shard_paths)} of {num_files}")
     
-    # loop through files
-    num_generated = 0
+    # validate only
+    if cli.check_only:
+        num_checked, num_invalid = check_files(cli=cli, 
+                                               file_paths=file_paths, 
+                                               bulk_paths=bulk_paths,
+                                               min_importance=min_importance)
+        print_headline(
+                headline=f'Checked {num_checked} pages '\
+                         f'({num_invalid} with errors)',
+                fill='#', 
+                width=80,
+            )
+        log_set_jsonl_sink(file_path=None)
+        log_flush()
+        sys.exit(1 if num_invalid > 0 else 0)
+
+    # mapped `content.sourceFile` files are shared by all pages
+    source_file_cache = SourceFileCache()
+    # images are resized in background while pages are generated
+    image_store = ImageStore(
+            root_path=str(Path(__file__).parent),
+            widths=getattr(cli.config.generate, 'imageWidths', None),
+            inline_bytes=getattr(cli.config.generate, 'imageInlineBytes', 0),
+            max_workers=cli.jobs,
+        )
+    if image_store.widths and image_store.pillow is None:
+        print_report(
+            importance=_NOTE, 
+            message=f"Pillow is not installed, images are not resized "\
+                    f"(`pip install pillow`)")
+
+    # identical section content is rendered once and stored once
+    fragment_store = None
+    fragment_min_bytes = getattr(cli.config.generate, 'fragmentMinBytes', 0)
+    if isinstance(fragment_min_bytes, int) and fragment_min_bytes > 0:
+        from python_lib.fragments import FragmentStore
+        fragment_store = FragmentStore(
+                root_path=str(Path(__file__).parent),
+                min_bytes=fragment_min_bytes,
+            )
+
+    # token classes of new pages may be missing from pruned stylesheets
+    from python_lib.token_css import PrunedStylesheets, find_token_classes
+    pruned_stylesheets = PrunedStylesheets(
+            root_path=str(Path(__file__).parent))
+    token_classes = set() if pruned_stylesheets.is_pruned() else None
+
+    # large sections of a page are rendered by worker processes
+    section_pool = None
+    section_min_chars = getattr(cli.config.generate, 'parallelSectionChars', 0)
+    if cli.jobs > 1 and isinstance(section_min_chars, int) \
+       and section_min_chars > 0:
+        from python_lib.section_pool import SectionPool
+        section_pool = SectionPool(
+                config=cli.config,
+                root_path=str(Path(__file__).parent),
+                max_workers=cli.jobs,
+                min_cost=section_min_chars,
+                auto_linker=auto_linker,
+            )
+
+    # limits of generated pages and the heaviest pages/sections
+    budget = Budget.from_config(cli.config)
+    heaviest_table = HeaviestTable(count=budget.heaviest_count)
+
+    # loop through files, then through records of bulk files
+    num_rewritten = 0
+    num_unchanged = 0
     num_skipped = 0
-    for file_idx, file_path in enumerate(file_paths):
+    num_over_budget = 0
+    shard_results = []
+    for file_idx, (file_path, record) in enumerate(iterate_pages(
+            cli=cli, file_paths=file_paths, bulk_paths=bulk_paths)):
         log_set_prepend(value=file_idx+1, max_len=len(str(len(file_paths))))
+        start_time = time.perf_counter()
         
         # show progress
         print_headline(
             headline=\
-                f"{file_idx+1}) Processing file '.../{Path(file_path).name}'", 
+                f"{file_idx+1}) Processing "\
+                f"{'file' if record is None else 'record'} "\
+                f"'.../{Path(file_path).name}'", 
             fill="=")
+        log_set_context(file=str(file_path))
         print_report(
             importance=_NOTE, 
             message=f"full path: '{str(file_path)}' ")
 
-        # load data
-        data = load_yaml_file(file_path)
+        # load data (records of bulk files are already parsed)
+        if record is None:
+            data = load_yaml_file(file_path)
+            html_path = get_html_path(file_path=file_path, config=cli.config)
+            page_file = get_link_file(file_path=file_path, 
+                                      data_path=data_path) \
+                        if auto_linker is not None else None
+        else:
+            data = record.data
+            html_path = record.html_path
+            page_file = record.link_file
+            if record.error is None and html_path in html_paths:
+                record.error = f"{record.position}: `outputPath` names "\
+                               f"page '{html_path}' generated by another "\
+                               f"file or record"
+            if record.error is not None:
+                print_report(importance=_CRITICAL, message=record.error)
+                log_reset_prepend()
+                print_notice(notice="SKIP: invalid record", fill='!')
+                num_skipped += 1
+                if cli.shard is not None:
+                    # no page written
+                    shard_results.append((
+                        file_path, None, None, False,
+                        time.perf_counter() - start_time,
+                        [{"importance": _CRITICAL, "message": record.error}]))
+                log_reset_context()
+                continue
+            html_paths.add(html_path)
         
-        # detect deviations of the data structure from reference structure
-        file_checker = DataStructureChecker(
-                data=data, 
-                reference=cli.config.dataStructure, 
-            )
-        file_checker.print_log(min_importance=_NOTE if cli.verbose else _ERROR)
-
-        # get struct_to_html generator
-        struct_to_html = StructToHtml(
+        # check data structure and generate HTML
+        file_checker, struct_to_html = render_page(
                 data=data, 
                 config=cli.config, 
                 root_path=str(Path(__file__).parent),
-                suffix=cli.config.generate.targetFileExtension,
+                source_file_cache=source_file_cache,
+                auto_linker=auto_linker,
+                page_file=page_file,
+                image_store=image_store,
+                fragment_store=fragment_store,
+                section_pool=section_pool,
             )
-        struct_to_html.generate_html_page()
-        struct_to_html.print_log(
-            min_importance=_NOTE if cli.verbose else _ERROR)
+        file_checker.print_log(min_importance=min_importance)
+        struct_to_html.print_log(min_importance=min_importance)
+        budget_log = []
+        if struct_to_html.valid:
+            budget_log = budget.check(stats=struct_to_html.stats)
+            print_log(log=budget_log, min_importance=min_importance)
+            num_over_budget += 1 if budget_log else 0
+            heaviest_table.add(
+                file_path=os.path.relpath(file_path, cli.directory), 
+                stats=struct_to_html.stats)
 
         # save html file
-        html_path = \
-            Path(file_path)\
-                .with_suffix('')\
-                .with_suffix(cli.config.generate.targetFileExtension)
-                
+        written_paths = (None, None)
         if not struct_to_html.valid:
             log_reset_prepend()
             print_notice(notice="SKIP: cannot generate HTML", fill='!')
@@ -132,23 +504,109 @@ def main():
             print_notice(notice="SKIP: HTML already exists", fill='!')
             num_skipped += 1
         else:
-            with open(html_path, "w") as file:
-                file.write(struct_to_html.html_page)
+            # `outputPath` of a record may name a new folder
+            html_path.parent.mkdir(parents=True, exist_ok=True)
+            # identical output is left untouched (keeps mtime)
+            if write_if_changed(file_path=html_path, 
+                                content=struct_to_html.html_page):
+                num_rewritten += 1
+                notice = "SUCCESS"
+            else:
+                num_unchanged += 1
+                notice = "SUCCESS: HTML unchanged"
+            written_paths = (html_path, None)
+            # hover loads the preview, the page is loaded on click
+            if struct_to_html.html_preview is not None:
+                write_if_changed(file_path=get_preview_path(html_path), 
+                                 content=struct_to_html.html_preview)
+                written_paths = (html_path, get_preview_path(html_path))
+            if token_classes is not None:
+                token_classes.update(find_token_classes(
+                    content=struct_to_html.html_page.encode('utf-8')))
             log_reset_prepend()
-            print_notice(notice="SUCCESS", fill='~')
-            num_generated += 1
+            print_notice(notice=notice, fill='~')
+
+        # record outcome for the partial manifest
+        if cli.shard is not None:
+            shard_results.append((file_path, *written_paths, 
+                                  struct_to_html.valid,
+                                  time.perf_counter() - start_time,
+                                  file_checker.log + struct_to_html.log \
+                                  + budget_log))
 
         # delete objects
         del file_checker
         del struct_to_html
+        del data
+        log_reset_context()
     
-    # summarize script
+    # resized images (the last pages may still wait for them)
     log_reset_prepend()
+    if section_pool is not None:
+        section_pool.close()
+        if section_pool.num_submitted > 0:
+            print_report(
+                importance=_NOTE, 
+                message=f"rendered {section_pool.num_submitted} large "\
+                        f"sections by worker processes")
+    for error in image_store.wait():
+        print_report(importance=_ERROR, message=error)
+    image_store.close()
+    if image_store.num_written > 0:
+        print_report(
+            importance=_NOTE, 
+            message=f"wrote {image_store.num_written} resized images")
+    if fragment_store is not None:
+        # fragments of all pages are known only after a complete run
+        num_deleted = 0
+        if cli.recursive and cli.shard is None and num_skipped == 0:
+            num_deleted = fragment_store.prune()
+        print_report(
+            importance=_NOTE, 
+            message=f"fragments: reused {fragment_store.num_reused} "\
+                    f"sections, wrote {fragment_store.num_written}, "\
+                    f"deleted {num_deleted} unused")
+    if token_classes is not None:
+        if fragment_store is not None:
+            from python_lib.fragments import list_fragments
+            from python_lib.token_css import collect_token_classes
+            token_classes.update(collect_token_classes(file_paths=\
+                list_fragments(root_path=str(Path(__file__).parent))))
+        message = pruned_stylesheets.get_report(classes=token_classes)
+        if message is not None:
+            print_report(importance=_WARNING, message=message)
+
+    # summarize script
     print_headline(
-            headline=f'Generated {num_generated} files (skipped {num_skipped})',
+            headline=f'Generated {num_rewritten + num_unchanged} files '\
+                     f'(rewritten {num_rewritten}, unchanged {num_unchanged}, '\
+                     f'skipped {num_skipped})',
             fill='#', 
             width=80,
         )
+    if num_over_budget > 0:
+        print_report(
+            importance=_ERROR, 
+            message=f"{num_over_budget} pages exceed limits of `budget` "\
+                    f"in '{cli.config_path}'")
+    heaviest_table.print_table()
+    if cli.shard is None:
+        update_fingerprints(cli=cli)
+    else:
+        # index.html and manifest.json are written by --merge-shards
+        shard_path = write_partial_manifest(
+                root_path=str(cli.directory),
+                index=shard_index,
+                count=shard_count,
+                files_key=files_key,
+                config_path=str(cli.config_path),
+                results=shard_results,
+            )
+        print_report(
+            importance=_NOTE, 
+            message=f"partial manifest written to '{shard_path}'")
+    log_set_jsonl_sink(file_path=None)
+    log_flush()
     
     
 if __name__ == "__main__":
@@ -5,6 +5,15 @@ let config;
 let currentFile;
 let debouncedHandleHover;
 let breadcrumbs = [];
+let manifest = { pages: {} };
+const breadcrumbsStorageKey = 'code-navigator-breadcrumbs';
+let perfStats;
+let perfSpanCounter = 0;
+let perfOverlayScheduled = false;
+const perfMaxSamples = 1000;
+// fetched section fragments (see `generate.fragmentMinBytes`), {url: html}
+const fragmentCache = new Map();
+const fragmentCacheMaxEntries = 500;
 
 
 // function escapeHtml(unsafe) {
@@ -34,8 +43,13 @@ function displayContentFromHtml(filePath, panelId) {
     // Show loading indicator
     panel.innerHTML = '<div class="loading">Loading...</div>';
 
+    // opening a page (left panel) or its preview (right panel)
+    const navigationSpan = perfStart(panelId === 'navigator-panel-left' ? 'open' : 'preview', filePath);
+    const fetchSpan = perfStart('fetch', filePath);
+    const pageUrl = resolvePageUrl(filePath);
+
     // Return a promise that resolves with the parsed JSON
-    return fetch(filePath)
+    return fetch(pageUrl)
         .then(response => {
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
@@ -43,17 +57,41 @@ function displayContentFromHtml(filePath, panelId) {
             return response.text();
         })
         .then(html => {
+            perfEnd(fetchSpan);
+            perfRecordCacheStatus(pageUrl);
+
             // Set the panel's content to the loaded HTML
-            panel.innerHTML = html;
+            const injectSpan = perfStart('inject', filePath);
+            if (panelId === 'navigator-panel-right') {
+                panel.replaceChildren(createPreviewFragment(html));
+            } else {
+                panel.innerHTML = html;
+            }
+            perfEnd(injectSpan);
 
+            // sections shared by more pages are fetched once
+            const fragmentsSpan = perfStart('fragments', filePath);
+            return resolveFragments(panel).then(() => perfEnd(fragmentsSpan));
+        })
+        .then(() => {
+            // legacy line numbers of the injected content (see `alignLineNumbers`)
+            alignLineNumbers(panel);
+        })
+        .then(() => {
             // Parse the page data
+            const parseSpan = perfStart('parse', filePath);
             const pageDataScript = panel.querySelector('script[type="application/json"]#page-data');
+            let pageData = null;
             if (pageDataScript) {
-                return JSON.parse(pageDataScript.textContent);
+                pageData = JSON.parse(pageDataScript.textContent);
             } else {
                 console.warn('No page data found in the loaded content');
-                return null;
             }
+            perfEnd(parseSpan);
+
+            // navigation ends once the injected page is painted
+            requestAnimationFrame(() => perfEnd(navigationSpan));
+            return pageData;
         })
         .catch(error => {
             console.error('Error loading content:', error);
@@ -73,12 +111,91 @@ function displayContentFromHtml(filePath, panelId) {
 }
 
 
+function fetchFragment(url) {
+    // fragments are named by their content hash, thus never change
+    let html = fragmentCache.get(url);
+    if (html === undefined) {
+        html = fetch(url).then(response => {
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            return response.text();
+        });
+        html.catch(() => fragmentCache.delete(url));
+        if (fragmentCache.size >= fragmentCacheMaxEntries) {
+            // oldest entry first (insertion order)
+            fragmentCache.delete(fragmentCache.keys().next().value);
+        }
+        fragmentCache.set(url, html);
+    }
+    return html;
+}
+
+
+function resolveFragments(panel) {
+    // replace `data-fragment` placeholders by the fetched section content
+    const placeholders = panel.querySelectorAll('[data-fragment]');
+    return Promise.all(Array.from(placeholders, placeholder =>
+        fetchFragment(placeholder.dataset.fragment).then(html => {
+            const template = document.createElement('template');
+            template.innerHTML = html;
+            placeholder.replaceWith(template.content);
+        })));
+}
+
+
+function createPreviewFragment(html) {
+    // the page is parsed into an inert template (nothing is fetched yet), 
+    // images are switched to their thumbnails (`data-thumbnail`) before 
+    // the preview is inserted, thus the originals are never downloaded
+    const template = document.createElement('template');
+    template.innerHTML = html;
+    for (const img of template.content.querySelectorAll('img[data-thumbnail]')) {
+        // smallest candidate of srcset is the thumbnail
+        const match = /\s(\d+)w\b/.exec(img.getAttribute('srcset') || '');
+        const width = parseInt(img.getAttribute('width'), 10);
+        const height = parseInt(img.getAttribute('height'), 10);
+        if (match && width > 0 && height > 0) {
+            const thumbnailWidth = parseInt(match[1], 10);
+            img.setAttribute('width', thumbnailWidth);
+            img.setAttribute('height', Math.round(height * thumbnailWidth / width));
+        }
+        img.removeAttribute('srcset');
+        img.removeAttribute('sizes');
+        img.setAttribute('src', img.dataset.thumbnail);
+    }
+    return template.content;
+}
+
+
 // ========================================================================== //
 //                           Intialization functions                          //
 // ========================================================================== //
+function initializeManifest() {
+    console.log(`INFO : initializeManifest()`);
+    // the manifest is the only file that always needs to be revalidated
+    return fetch('manifest.json', { cache: 'no-cache' })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(parsedManifest => {
+            manifest = parsedManifest;
+            manifest.pages = manifest.pages || {};
+            console.log(`      pages in manifest = %d`, Object.keys(manifest.pages).length);
+        })
+        .catch(error => {
+            // without manifest, pages are fetched by their plain names
+            console.warn('Manifest not available, using plain URLs:', error);
+        });
+}
+
+
 function initializeConfig() {
     console.log(`INFO : initializeConfig()`);
-    return parseYamlFile('config.yaml')
+    return parseYamlFile(manifest.config || 'config.yaml')
         .then(parsedConfig => {
             config = parsedConfig;
             currentFile = config.display.pathData + config.display.initFile;
@@ -97,10 +214,81 @@ function initializeConfig() {
 }
 
 
+function isServiceWorkerEnabled() {
+    return Boolean(config.performance && config.performance.serviceWorker);
+}
+
+
+function initializeServiceWorker() {
+    console.log(`INFO : initializeServiceWorker()`);
+    if (!('serviceWorker' in navigator)) {
+        console.log('      service worker not supported (or not served over http(s)/localhost)');
+        return;
+    }
+    if (!isServiceWorkerEnabled()) {
+        // switched off in config, stop serving pages from previous cache
+        navigator.serviceWorker.getRegistrations()
+            .then(registrations => registrations.forEach(registration => registration.unregister()));
+        return;
+    }
+    navigator.serviceWorker.register('sw.js')
+        .then(registration => {
+            console.log(`      service worker scope = '%s'`, registration.scope);
+            // precache pages of the (possibly new) manifest in background
+            if (navigator.serviceWorker.controller) {
+                navigator.serviceWorker.controller.postMessage({ type: 'precache' });
+            }
+        })
+        .catch(error => {
+            console.warn('Service worker registration failed:', error);
+        });
+}
+
+
+function restoreBreadcrumbs(fullFilePath) {
+    // breadcrumbs of this browser tab survive reloads (see `saveBreadcrumbs()`)
+    if (!isServiceWorkerEnabled()) {
+        return false;
+    }
+    try {
+        const stored = JSON.parse(sessionStorage.getItem(breadcrumbsStorageKey));
+        if (!Array.isArray(stored) || stored.length === 0 || stored[0].filePath !== fullFilePath) {
+            return false;
+        }
+        breadcrumbs = stored;
+    } catch (error) {
+        return false;
+    }
+    currentFile = breadcrumbs[breadcrumbs.length - 1].filePath;
+    console.log(`      restored %d breadcrumbs, currentFile = '%s'`, breadcrumbs.length, currentFile);
+    displayBreadcrumbs();
+    displayContentFromHtml(currentFile, 'navigator-panel-left')
+        .catch(error => {
+            console.error('Error:', error);
+        });
+    return true;
+}
+
+
+function saveBreadcrumbs() {
+    if (!isServiceWorkerEnabled()) {
+        return;
+    }
+    try {
+        sessionStorage.setItem(breadcrumbsStorageKey, JSON.stringify(breadcrumbs));
+    } catch (error) {
+        console.warn('Breadcrumbs cannot be stored:', error);
+    }
+}
+
+
 function initializeBreadcrumbs() {
     console.log(`INFO : initializeBreadcrumbs()`);
     let fullFilePath = config.display.pathData + config.display.initFile
     fullFilePath = changeFileExtension(fullFilePath, config.generate.targetFileExtension)
+    if (restoreBreadcrumbs(fullFilePath)) {
+        return;
+    }
     displayContentFromHtml(fullFilePath, 'navigator-panel-left')
         .then(pageData => {
             if (pageData) {
@@ -127,46 +315,276 @@ function initializeBreadcrumbs() {
 // ========================================================================== //
 //                                Intialization                               //
 // ========================================================================== //
-initializeConfig()
+initializeManifest()
+  .then(() => initializeConfig())
   .then(() => {
+    initializeServiceWorker();
     initializeBreadcrumbs();
-    scheduleHeapLogging();
+    initializePerformance();
   })
   .catch(error => {
     console.error('Initialization failed:', error);
   });
 
 // ========================================================================== //
-//                                DEBUG                               //
+//                          Performance instrumentation                       //
 // ========================================================================== //
+// Every step of opening a page is wrapped in `performance.mark`/`measure`
+// (visible in browser dev-tools as 'code-navigator:<step>') and recorded:
+//   fetch ....... fetching the page (see `perfRecordCacheStatus` for source)
+//   inject ...... `innerHTML` injection of the page
+//   fragments ... fetching and injecting section fragments
+//   parse ....... parsing `page-data`
+//   align ....... `flushLineNumberAlignment()` (legacy pages only)
+//   open ........ click until the page is painted (left panel)
+//   preview ..... hover until the page is painted (right panel)
+// The overlay (config `performance.overlay` or Alt+Shift+P) shows
+// percentiles, cache hit rate and the slowest pages, 'Export JSON' saves
+// everything for later analysis.
+function initializePerformance() {
+    console.log(`INFO : initializePerformance()`);
+    perfReset();
+    if (window.performance && performance.setResourceTimingBufferSize) {
+        performance.setResourceTimingBufferSize(2000);
+    }
+    document.addEventListener('keydown', event => {
+        if (event.altKey && event.shiftKey && event.code === 'KeyP') {
+            togglePerfOverlay();
+        }
+    });
+    if (config.performance && config.performance.overlay) {
+        togglePerfOverlay(true);
+    }
+    schedulePerfLogging();
+}
 
-function logHeapUsage() {
-    if (window.performance) {
-        if (window.performance.memory) {
-            // Chrome, Edge
-            const memory = window.performance.memory;
-            console.log(`Total JS heap size: ${memory.totalJSHeapSize / 1048576} MB`);
-            console.log(`Used JS heap size: ${memory.usedJSHeapSize / 1048576} MB`);
-        } else if (window.performance.getEntriesByType) {
-            // Firefox and other browsers
-            const memory = window.performance.getEntriesByType('memory');
-            if (memory.length > 0) {
-                console.log(`JS heap size: ${memory[0].jsHeapSizeLimit / 1048576} MB`);
-                console.log(`Used JS heap size: ${memory[0].usedJSHeapSize / 1048576} MB`);
-            } else {
-                console.log('Memory information not available');
-            }
+
+function perfReset() {
+    perfStats = {
+        startedAt: new Date().toISOString(),
+        samples: {},                // {step: [ms, ...]}
+        pages: {},                  // {filePath: {step: [ms, ...]}}
+        cache: { cache: 0, revalidated: 0, network: 0, unknown: 0 },
+    };
+    perfScheduleOverlayUpdate();
+}
+
+
+function perfStart(name, filePath) {
+    perfSpanCounter += 1;
+    const span = { name: name, filePath: filePath, mark: `code-navigator:${name}:${perfSpanCounter}`, start: performance.now() };
+    if (performance.mark) {
+        performance.mark(span.mark);
+    }
+    return span;
+}
+
+
+function perfEnd(span) {
+    const duration = performance.now() - span.start;
+    if (performance.measure) {
+        try {
+            performance.measure(`code-navigator:${span.name}`, { start: span.mark, detail: { filePath: span.filePath } });
+        } catch (error) {
+            performance.measure(`code-navigator:${span.name}`, span.mark);
+        }
+        // keep the performance timeline bounded
+        performance.clearMarks(span.mark);
+        performance.clearMeasures(`code-navigator:${span.name}`);
+    }
+    perfRecordSample(span.name, duration, span.filePath);
+    return duration;
+}
+
+
+function perfPushSample(samples, duration) {
+    samples.push(duration);
+    if (samples.length > perfMaxSamples) {
+        samples.shift();
+    }
+}
+
+
+function perfRecordSample(name, duration, filePath) {
+    if (!perfStats) {
+        return;
+    }
+    perfPushSample(perfStats.samples[name] = perfStats.samples[name] || [], duration);
+    if (filePath) {
+        const page = perfStats.pages[filePath] = perfStats.pages[filePath] || {};
+        perfPushSample(page[name] = page[name] || [], duration);
+    }
+    perfScheduleOverlayUpdate();
+}
+
+
+function perfRecordCacheStatus(pageUrl) {
+    // source of the response according to Resource Timing:
+    //   cache ......... browser cache or service worker, no bytes transferred
+    //   revalidated ... 304 Not Modified (only headers transferred)
+    //   network ....... body transferred
+    if (!perfStats) {
+        return;
+    }
+    const entries = performance.getEntriesByName ? performance.getEntriesByName(new URL(pageUrl, location.href).href) : [];
+    const entry = entries[entries.length - 1];
+    let status = 'unknown';
+    if (entry && entry.decodedBodySize > 0) {
+        if (entry.transferSize === 0) {
+            status = 'cache';
+        } else if (entry.transferSize < entry.encodedBodySize) {
+            status = 'revalidated';
         } else {
-            console.log('Memory performance API not supported in this browser');
+            status = 'network';
         }
-    } else {
-        console.log('Performance API not supported in this browser');
     }
+    perfStats.cache[status] += 1;
+}
+
+
+function perfPercentile(values, percentile) {
+    if (!values || values.length === 0) {
+        return null;
+    }
+    const sorted = [...values].sort((a, b) => a - b);
+    const rank = Math.ceil(percentile / 100 * sorted.length) - 1;
+    return sorted[Math.min(Math.max(rank, 0), sorted.length - 1)];
+}
+
+
+function perfSummary(values) {
+    return {
+        count: values ? values.length : 0,
+        p50: perfPercentile(values, 50),
+        p90: perfPercentile(values, 90),
+        p99: perfPercentile(values, 99),
+        max: values && values.length ? Math.max(...values) : null,
+    };
+}
+
+
+function perfSnapshot() {
+    const cache = perfStats.cache;
+    const known = cache.cache + cache.revalidated + cache.network;
+    const steps = {};
+    for (const [name, values] of Object.entries(perfStats.samples)) {
+        steps[name] = perfSummary(values);
+    }
+    const pages = {};
+    for (const [filePath, page] of Object.entries(perfStats.pages)) {
+        pages[filePath] = {};
+        for (const [name, values] of Object.entries(page)) {
+            pages[filePath][name] = perfSummary(values);
+        }
+    }
+    const snapshot = {
+        startedAt: perfStats.startedAt,
+        exportedAt: new Date().toISOString(),
+        userAgent: navigator.userAgent,
+        serviceWorker: Boolean(navigator.serviceWorker && navigator.serviceWorker.controller),
+        cache: Object.assign({ hitRate: known ? cache.cache / known : null }, cache),
+        steps: steps,
+        pages: pages,
+        samples: perfStats.samples,
+    };
+    if (performance.memory) {
+        // Chrome, Edge
+        snapshot.memory = {
+            totalJSHeapSize: performance.memory.totalJSHeapSize,
+            usedJSHeapSize: performance.memory.usedJSHeapSize,
+        };
+    }
+    return snapshot;
+}
+
+
+function perfSlowestPages(snapshot, count) {
+    return Object.entries(snapshot.pages)
+        .filter(([filePath, page]) => page.open)
+        .sort((a, b) => b[1].open.p90 - a[1].open.p90)
+        .slice(0, count);
 }
 
-function scheduleHeapLogging() {
-    logHeapUsage();
-    setTimeout(scheduleHeapLogging, config.performance.loggingTime);
+
+function exportPerfJson() {
+    const blob = new Blob([JSON.stringify(perfSnapshot(), null, 1)], { type: 'application/json' });
+    const link = document.createElement('a');
+    link.href = URL.createObjectURL(blob);
+    link.download = `code-navigator-perf-${Date.now()}.json`;
+    document.body.appendChild(link);
+    link.click();
+    link.remove();
+    URL.revokeObjectURL(link.href);
+}
+
+
+function togglePerfOverlay(visible) {
+    let overlay = document.getElementById('navigator-perf-overlay');
+    if (!overlay) {
+        overlay = document.createElement('div');
+        overlay.id = 'navigator-perf-overlay';
+        overlay.hidden = true;
+        overlay.addEventListener('click', event => {
+            const action = event.target.dataset.perfAction;
+            if (action === 'export') {
+                exportPerfJson();
+            } else if (action === 'reset') {
+                perfReset();
+            } else if (action === 'close') {
+                togglePerfOverlay(false);
+            }
+        });
+        document.body.appendChild(overlay);
+    }
+    overlay.hidden = visible === undefined ? !overlay.hidden : !visible;
+    perfScheduleOverlayUpdate();
+}
+
+
+function perfScheduleOverlayUpdate() {
+    // at most one overlay update per frame
+    const overlay = document.getElementById('navigator-perf-overlay');
+    if (!overlay || overlay.hidden || perfOverlayScheduled) {
+        return;
+    }
+    perfOverlayScheduled = true;
+    requestAnimationFrame(() => {
+        perfOverlayScheduled = false;
+        updatePerfOverlay(overlay);
+    });
+}
+
+
+function updatePerfOverlay(overlay) {
+    const snapshot = perfSnapshot();
+    const ms = value => value === null ? '-' : value.toFixed(1);
+    const rows = Object.entries(snapshot.steps).map(([name, summary]) =>
+        `<tr><td>${name}</td><td>${summary.count}</td><td>${ms(summary.p50)}</td>` +
+        `<td>${ms(summary.p90)}</td><td>${ms(summary.p99)}</td><td>${ms(summary.max)}</td></tr>`).join('');
+    const pages = perfSlowestPages(snapshot, 5).map(([filePath, page]) =>
+        `<tr><td colspan="3">${filePath}</td><td>${ms(page.open.p90)}</td><td colspan="2">${page.open.count}x</td></tr>`).join('');
+    const cache = snapshot.cache;
+    overlay.innerHTML =
+        `<table>` +
+        `<tr><th>step [ms]</th><th>n</th><th>p50</th><th>p90</th><th>p99</th><th>max</th></tr>${rows}` +
+        `<tr><th colspan="6">slowest pages (open p90 [ms])</th></tr>${pages}` +
+        `</table>` +
+        `<div>cache hit rate: ${cache.hitRate === null ? '-' : (100 * cache.hitRate).toFixed(0) + '%'} ` +
+        `(cache ${cache.cache}, 304 ${cache.revalidated}, network ${cache.network})</div>` +
+        `<div><button data-perf-action="export">Export JSON</button>` +
+        `<button data-perf-action="reset">Reset</button>` +
+        `<button data-perf-action="close">Close</button></div>`;
+}
+
+
+function schedulePerfLogging() {
+    // periodic summary in web-browser console
+    setTimeout(() => {
+        const snapshot = perfSnapshot();
+        console.log('INFO : performance (ms)');
+        console.table(snapshot.steps);
+        schedulePerfLogging();
+    }, config.performance.loggingTime);
 }
 
 // ========================================================================== //
@@ -187,6 +605,25 @@ function parseYamlFile(filePath) {
 // ========================================================================== //
 //                              Utility functions                             //
 // ========================================================================== //
+function resolvePageUrl(filePath) {
+    // content-hashed URL of the page (see manifest.json), can be cached forever
+    const key = filePath.replace(/^(\.\/|\/)+/, '');
+    const hash = manifest.pages[key];
+    return hash ? `${filePath}?v=${hash}` : filePath;
+}
+
+
+function resolvePreviewPath(filePath) {
+    // `<page>.preview.html` (see `generate.previewLines`), null if disabled
+    const generate = config.generate || {};
+    const extension = generate.targetFileExtension || '.html';
+    if (!(generate.previewLines > 0) || !filePath.endsWith(extension)) {
+        return null;
+    }
+    return filePath.slice(0, -extension.length) + '.preview' + extension;
+}
+
+
 function resolvePath(...parts) {
     let base = new URL('http://example.com/');
 
@@ -250,7 +687,22 @@ function handleHover(event, filePath) {
     if (isLeftPanel) {
         console.log(`INFO : handleHover(filePath='%s/%s')`, config.display.pathData, filePath);
         let fullFilePath = config.display.pathData + filePath
-        displayContentFromHtml(fullFilePath, 'navigator-panel-right');
+        // preview is small, the full page is loaded only on click
+        const link = event.target.closest('a');
+        const sectionTag = link ? link.getAttribute('section-tag') : null;
+        const previewPath = resolvePreviewPath(fullFilePath);
+        const loaded = previewPath
+            ? displayContentFromHtml(previewPath, 'navigator-panel-right')
+                .catch(() => displayContentFromHtml(fullFilePath, 'navigator-panel-right'))
+            : displayContentFromHtml(fullFilePath, 'navigator-panel-right');
+        loaded
+            .then(() => {
+                // the preview omits sections past its lines, show the page
+                if (previewPath && !scrollPreviewToSection(sectionTag)) {
+                    return displayContentFromHtml(fullFilePath, 'navigator-panel-right');
+                }
+            })
+            .catch(() => undefined);
     } else {
         // If it's not the left panel, we do nothing
         console.log(`INFO : Ignoring non-interactive trigger from handleHover(filePath='%s/%s')`, config.display.pathData, filePath);
@@ -258,6 +710,26 @@ function handleHover(event, filePath) {
 }
 
 
+function scrollPreviewToSection(sectionTag) {
+    // previews mark sections with `data-section-tag`, false if the target
+    // section has no content in the preview (`data-preview-omitted`)
+    if (!sectionTag) {
+        return true;
+    }
+    const panel = document.getElementById('navigator-panel-right');
+    const section = Array.from(panel.querySelectorAll('[data-section-tag]'))
+        .find(element => element.dataset.sectionTag === sectionTag);
+    if (!section) {
+        return true;
+    }
+    if (section.hasAttribute('data-preview-omitted')) {
+        return false;
+    }
+    panel.scrollTop += section.getBoundingClientRect().top - panel.getBoundingClientRect().top;
+    return true;
+}
+
+
 function clearRightPanel() {
     console.log(`INFO : clearRightPanel()`);
     document.getElementById('navigator-panel-right').innerHTML = '';
@@ -301,6 +773,7 @@ function displayBreadcrumbs() {
         }
         return `<a href="#" onclick="handleBreadcrumbClick('${item.filePath}', ${index})">${item.title}</a><span>  &#8594;  </span>`;
     }).join('');
+    saveBreadcrumbs();
 }
 
 
@@ -315,23 +788,101 @@ function handleBreadcrumbClick(filePath, index) {
 // ========================================================================== //
 //                        Code & number line alignment                        //
 // ========================================================================== //
-function alignLineNumbers() {
-    const codeLines = document.querySelectorAll('.code pre > span');
-    const lineNumbers = document.querySelectorAll('.linenodiv pre > span');
-
-    if (codeLines.length !== lineNumbers.length) {
-        console.error('Mismatch between code lines and line numbers');
+// Line numbers of `display-line` rows share the row with their text (CSS
+// flex), thus they stay aligned without any JS. Only legacy pages (Pygments
+// table with `linenodiv`) need heights of code lines copied to the numbers:
+// blocks are aligned when they become visible and when their width changes,
+// all heights of a frame are read first and written afterwards (one layout).
+const lineNumberBlocks = new Map(); // code <pre> -> {numbers, width}
+const pendingLineNumberBlocks = new Set();
+let lineNumberFrame = 0;
+let lineNumberResizeObserver = null;
+let lineNumberVisibilityObserver = null;
+
+function alignLineNumbers(root) {
+    // forget blocks of replaced panel content
+    for (const code of lineNumberBlocks.keys()) {
+        if (!code.isConnected) {
+            lineNumberBlocks.delete(code);
+            lineNumberVisibilityObserver.unobserve(code);
+            lineNumberResizeObserver.unobserve(code);
+        }
+    }
+    const tables = new Set(Array.from(root.querySelectorAll('.linenodiv'),
+        div => div.closest('table')));
+    tables.delete(null);
+    if (tables.size === 0) {
         return;
     }
+    if (!lineNumberResizeObserver) {
+        lineNumberResizeObserver = new ResizeObserver(entries => {
+            for (const entry of entries) {
+                // line heights depend on the width only
+                const block = lineNumberBlocks.get(entry.target);
+                if (block && block.width !== entry.contentRect.width) {
+                    block.width = entry.contentRect.width;
+                    pendingLineNumberBlocks.add(entry.target);
+                }
+            }
+            scheduleLineNumberAlignment();
+        });
+        // only visible blocks are kept aligned
+        lineNumberVisibilityObserver = new IntersectionObserver(entries => {
+            for (const entry of entries) {
+                if (entry.isIntersecting) {
+                    lineNumberResizeObserver.observe(entry.target);
+                } else {
+                    lineNumberResizeObserver.unobserve(entry.target);
+                }
+            }
+        });
+    }
+    for (const table of tables) {
+        const code = table.querySelector('.code pre');
+        const numbers = table.querySelector('.linenodiv pre');
+        if (code && numbers && !lineNumberBlocks.has(code)) {
+            lineNumberBlocks.set(code, { numbers: numbers, width: -1 });
+            lineNumberVisibilityObserver.observe(code);
+        }
+    }
+}
 
-    for (let i = 0; i < codeLines.length; i++) {
-        const codeLineHeight = codeLines[i].offsetHeight;
-        lineNumbers[i].style.height = `${codeLineHeight}px`;
-        lineNumbers[i].style.display = 'block';
+
+function scheduleLineNumberAlignment() {
+    if (pendingLineNumberBlocks.size > 0 && !lineNumberFrame) {
+        lineNumberFrame = requestAnimationFrame(flushLineNumberAlignment);
     }
 }
 
-// Call the function when the page loads
-window.addEventListener('load', alignLineNumbers);
-// Optionally, call it again if the window is resized
-window.addEventListener('resize', alignLineNumbers);
\ No newline at end of file
+
+function flushLineNumberAlignment() {
+    lineNumberFrame = 0;
+    const alignSpan = perfStart('align', currentFile);
+    const codes = Array.from(pendingLineNumberBlocks);
+    pendingLineNumberBlocks.clear();
+
+    // read (a single layout for all blocks)
+    const updates = [];
+    for (const code of codes) {
+        if (!lineNumberBlocks.has(code) || !code.isConnected) {
+            continue;
+        }
+        const codeLines = code.querySelectorAll(':scope > span');
+        const lineNumbers = lineNumberBlocks.get(code).numbers
+            .querySelectorAll(':scope > span');
+        if (codeLines.length !== lineNumbers.length) {
+            console.error('Mismatch between code lines and line numbers');
+            continue;
+        }
+        updates.push([lineNumbers, Array.from(codeLines, line => line.offsetHeight)]);
+    }
+
+    // write
+    for (const [lineNumbers, heights] of updates) {
+        for (let i = 0; i < lineNumbers.length; i++) {
+            lineNumbers[i].style.height = `${heights[i]}px`;
+            lineNumbers[i].style.display = 'block';
+        }
+    }
+    perfEnd(alignSpan);
+}
@@ -0,0 +1,281 @@
+from collections import deque
+import hashlib
+import json
+import os
+from pathlib import Path
+import re
+from typing import Dict, List, Tuple
+
+
+from python_lib.log import log_report, _NOTE, _WARNING
+from python_lib.utils import load_yaml_file
+
+
+## ========================================================================== ##
+##                                   CONSTS                                   ##
+## ========================================================================== ##
+_AUTOLINK_CACHE_FILE = ".cache/autolink.json"
+# text is split into words (same word characters as `create_whole_word_regex`),
+# whitespace runs and single other characters, terms match whole tokens
+_TOKEN_REGEX = re.compile(r'[a-zA-Z0-9_]+|\s+|[^a-zA-Z0-9_\s]')
+_WORD_CHARS = frozenset(
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_")
+# terms are written into `onclick="handleClick('<term>', ...)"`
+_UNSAFE_TERM_REGEX = re.compile(r'[\'"\\<>&\n\r]')
+
+
+## ========================================================================== ##
+##                                 AutoLinker                                 ##
+## ========================================================================== ##
+class AutoLinker():
+    """ Aho-Corasick automaton of all terms of the auto-link dictionary
+    (`{term: link_file}`), built once per run and shared (read-only) by all
+    pages. The automaton runs over tokens of the text (see `_TOKEN_REGEX`),
+    thus one pass finds every term, regardless of the number of terms.
+    """
+    __slots__ = ("terms", "link_files", "digest", "_goto", "_fail",
+                 "_output")
+
+    def __init__(self, dictionary:Dict[str, str]):
+        """
+        :param dictionary: Linked terms, `{term: link_file}` (`link_file`
+            relative to `config.display.pathData`).
+        """
+        self.terms = sorted(dictionary)
+        self.link_files = [dictionary[term] for term in self.terms]
+        # identifies the dictionary (pages depend on all terms)
+        self.digest = hashlib.sha256(json.dumps(
+            list(zip(self.terms, self.link_files))).encode()).hexdigest()[0:16]
+
+        # trie of tokens, `_output[node]` lists `(term_id, num_tokens)`
+        self._goto = [{}]
+        self._output = [[]]
+        for term_id, term in enumerate(self.terms):
+            tokens = _TOKEN_REGEX.findall(term)
+            node = 0
+            for token in tokens:
+                next_node = self._goto[node].get(token, None)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][token] = next_node
+                    self._goto.append({})
+                    self._output.append([])
+                node = next_node
+            self._output[node].append((term_id, len(tokens)))
+
+        # failure links (breadth-first), outputs of suffixes are merged
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, next_node in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(token, 0)
+                self._fail[next_node] = fail if fail != next_node else 0
+                self._output[next_node] = self._output[next_node] \
+                                          + self._output[self._fail[next_node]]
+                queue.append(next_node)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def find(self,
+             text:str,
+             exclude_terms:frozenset=frozenset(),
+             exclude_link_file:str=None,
+            ) -> List[Tuple[int, int, int]]:
+        """ Return whole-word occurrences of terms within `text` as sorted
+        `(start, end, term_id)`, overlapping occurrences are resolved by the
+        leftmost-longest rule.
+
+        :param text: Searched text.
+        :param exclude_terms: Terms not linked (e.g. with explicit `links`),
+            defaults to frozenset()
+        :param exclude_link_file: Terms linking to this file are not linked
+            (self-links), defaults to None
+        :return: List of `(start, end, term_id)`, `term_id` indexes `terms`
+            and `link_files`.
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        tokens = _TOKEN_REGEX.findall(text)
+        offsets = [0]
+        matches = []
+        node = 0
+        for token_idx, token in enumerate(tokens):
+            offsets.append(offsets[-1] + len(token))
+            while node and token not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(token, 0)
+            for term_id, num_tokens in output[node]:
+                matches.append((token_idx + 1 - num_tokens, token_idx + 1,
+                                term_id))
+        if not matches:
+            return []
+
+        found = []
+        last_end = 0
+        for start_idx, end_idx, term_id in sorted(
+                matches, key=lambda match: (match[0], -match[1])):
+            start, end = offsets[start_idx], offsets[end_idx]
+            if start < last_end:
+                continue
+            # whole word, also for terms starting/ending with other characters
+            if (start > 0 and text[start-1] in _WORD_CHARS) or \
+               (end < len(text) and text[end] in _WORD_CHARS):
+                continue
+            if self.terms[term_id] in exclude_terms or \
+               self.link_files[term_id] == exclude_link_file:
+                continue
+            found.append((start, end, term_id))
+            last_end = end
+        return found
+
+
+## ========================================================================== ##
+##                                 DICTIONARY                                 ##
+## ========================================================================== ##
+
+## ============================== get_link_file ============================= ##
+def get_link_file(file_path:str, data_path:str) -> str:
+    """ Return `file_path` as `linkFile` (posix path relative to 
+    `config.display.pathData`).
+    """
+    return Path(file_path).resolve()\
+        .relative_to(Path(data_path).resolve()).as_posix()
+
+
+## ============================= get_cache_path ============================= ##
+def get_cache_path(root_path:str) -> Path:
+    """ Return path of the file caching terms of every page.
+    """
+    return Path(root_path, _AUTOLINK_CACHE_FILE)
+
+
+## ============================ _get_page_terms ============================= ##
+def _get_page_terms(data) -> List[str]:
+    # `header.title` and `header.symbols` of a loaded .yaml file
+    header = data.get('header', None) if isinstance(data, dict) else None
+    if not isinstance(header, dict):
+        return []
+    terms = [header.get('title', None)]
+    symbols = header.get('symbols', None)
+    if isinstance(symbols, list):
+        terms.extend(symbols)
+    return [term.strip() for term in terms
+            if isinstance(term, str) and term.strip()]
+
+
+## ======================== build_autolink_dictionary ======================= ##
+def build_autolink_dictionary(file_paths:list,
+                              data_path:str,
+                              cache_path:str=None,
+                              bulk_paths:list=None,
+                              target_extension:str=None,
+                            ) -> Tuple[AutoLinker, list]:
+    """ Build auto-link dictionary from `header.title` and `header.symbols`
+    of all pages. A term declared by more pages is ambiguous and not linked.
+    Terms of unchanged files are taken from `cache_path` (the .yaml files are
+    not parsed again).
+
+    :param file_paths: All .yaml files of the run.
+    :param data_path: `config.display.pathData` (resolved), link files are
+        relative to it.
+    :param cache_path: File caching terms of every file, defaults to None
+        (no cache)
+    :param bulk_paths: Bulk files (see `python_lib.bulk`), terms of their 
+        records link the generated pages, defaults to None
+    :param target_extension: `config.generate.targetFileExtension`, required
+        with `bulk_paths`, defaults to None
+    :return: Tuple of `AutoLinker` and list of reports.
+    """
+    log = []
+    cache = {}
+    if cache_path is not None:
+        try:
+            with open(cache_path, 'r') as file:
+                cache = json.load(file)
+        except (OSError, ValueError):
+            cache = {}
+
+    new_cache = {}
+    term_link_files = {}
+    for file_path in sorted(file_paths, key=str):
+        link_file = get_link_file(file_path=file_path, data_path=data_path)
+        stat = os.stat(file_path)
+        key = [stat.st_mtime_ns, stat.st_size]
+        record = cache.get(link_file, None)
+        if isinstance(record, dict) and record.get('key', None) == key:
+            terms = record['terms']
+        else:
+            try:
+                terms = _get_page_terms(load_yaml_file(file_path,
+                                                       report=False))
+            except RuntimeError:
+                # reported when the page itself is generated
+                terms = []
+        new_cache[link_file] = {'key': key, 'terms': terms}
+        for term in terms:
+            term_link_files.setdefault(term, set()).add(link_file)
+    num_pages = len(new_cache)
+
+    # records of bulk files are cached per bulk file, records naming a page
+    # of a .yaml file are rejected (see `generate_html.py`)
+    yaml_pages = {Path(link_file).with_suffix(target_extension).as_posix()
+                  for link_file in new_cache} if bulk_paths else set()
+    for bulk_path in sorted(bulk_paths or [], key=str):
+        bulk_file = get_link_file(file_path=bulk_path, data_path=data_path)
+        stat = os.stat(bulk_path)
+        key = [stat.st_mtime_ns, stat.st_size]
+        record = cache.get(bulk_file, None)
+        if isinstance(record, dict) and record.get('key', None) == key:
+            pages = record['pages']
+        else:
+            from python_lib.bulk import iterate_bulk_file
+            pages = [[bulk_record.link_file, 
+                      _get_page_terms(bulk_record.data)]
+                     for bulk_record in iterate_bulk_file(
+                        file_path=bulk_path, 
+                        data_path=data_path,
+                        target_extension=target_extension)
+                     if bulk_record.error is None]
+        new_cache[bulk_file] = {'key': key, 'pages': pages}
+        num_pages += len(pages)
+        for link_file, terms in pages:
+            if link_file in yaml_pages:
+                continue
+            for term in terms:
+                term_link_files.setdefault(term, set()).add(link_file)
+
+    dictionary = {}
+    for term, link_files in sorted(term_link_files.items()):
+        if _UNSAFE_TERM_REGEX.search(term):
+            log = log_report(log=log, importance=_WARNING,
+                message="Auto-link term '{}' contains quotes, backslash or "\
+                        "HTML characters, it is not linked.",
+                message_args=(term,))
+        elif len(link_files) > 1:
+            log = log_report(log=log, importance=_WARNING,
+                message="Auto-link term '{}' is declared by {} pages ({}), "\
+                        "it is not linked.",
+                message_args=(term, len(link_files),
+                              ", ".join(sorted(link_files))))
+        else:
+            dictionary[term] = next(iter(link_files))
+    log = log_report(log=log, importance=_NOTE,
+        message="Auto-link dictionary has {} terms from {} pages.",
+        message_args=(len(dictionary), num_pages))
+
+    if cache_path is not None and new_cache != cache:
+        try:
+            Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+            temp_path = Path(cache_path).with_suffix(f".{os.getpid()}")
+            with open(temp_path, 'w') as file:
+                file.write(json.dumps(new_cache, sort_keys=True))
+            os.replace(temp_path, cache_path)
+        except OSError:
+            pass # cache is optional
+    return AutoLinker(dictionary=dictionary), log
+
+
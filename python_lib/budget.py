@@ -0,0 +1,173 @@
+import heapq
+from typing import List, Tuple
+
+
+from python_lib.log import log_report, print_headline, print_text, _ERROR
+
+
+## ========================================================================== ##
+##                                   CONSTS                                   ##
+## ========================================================================== ##
+_BUDGET_IMPORTANCE = _ERROR
+
+
+## ========================================================================== ##
+##                                   STATS                                    ##
+## ========================================================================== ##
+class SectionStats():
+    """ Size of a generated section, `link_matches` lists
+    `(link_index, match_string, num_linked)` of every valid link (explicit
+    `links`).
+    """
+    __slots__ = ("section_index", "section_tag", "num_lines", "num_links",
+                 "num_bytes", "link_matches")
+
+    def __init__(self, section_index:int, section_tag, num_lines:int=0,
+                 num_links:int=0, num_bytes:int=0, link_matches:list=None):
+        self.section_index = section_index
+        self.section_tag = section_tag
+        self.num_lines = num_lines
+        self.num_links = num_links
+        self.num_bytes = num_bytes
+        self.link_matches = link_matches if link_matches is not None else []
+
+
+class PageStats():
+    """ Size of a generated page and its sections.
+    """
+    __slots__ = ("num_bytes", "sections")
+
+    def __init__(self, num_bytes:int=0, sections:List[SectionStats]=None):
+        self.num_bytes = num_bytes
+        self.sections = sections if sections is not None else []
+
+
+## ========================================================================== ##
+##                                   Budget                                   ##
+## ========================================================================== ##
+class Budget():
+    """ Limits of generated pages (`config.budget`), a limit of 0 (or
+    missing) is not checked.
+    """
+    __slots__ = ("max_page_bytes", "max_section_lines", "max_section_links",
+                 "max_matches_per_link", "heaviest_count")
+
+    def __init__(self, max_page_bytes:int=0, max_section_lines:int=0,
+                 max_section_links:int=0, max_matches_per_link:int=0,
+                 heaviest_count:int=0):
+        self.max_page_bytes = max_page_bytes
+        self.max_section_lines = max_section_lines
+        self.max_section_links = max_section_links
+        self.max_matches_per_link = max_matches_per_link
+        self.heaviest_count = heaviest_count
+
+    @classmethod
+    def from_config(cls, config) -> 'Budget':
+        budget = getattr(config, 'budget', None)
+        def get_limit(name:str) -> int:
+            value = getattr(budget, name, 0)
+            return value if isinstance(value, int) and value > 0 else 0
+        return cls(
+            max_page_bytes=get_limit('maxPageBytes'),
+            max_section_lines=get_limit('maxSectionLines'),
+            max_section_links=get_limit('maxSectionLinks'),
+            max_matches_per_link=get_limit('maxMatchesPerLink'),
+            heaviest_count=get_limit('heaviestCount'),
+        )
+
+    ## ============================== check ============================== ##
+    def check(self, stats:PageStats) -> list:
+        """ Return reports of limits exceeded by the page.
+
+        :param stats: Stats of generated page (`StructToHtml.stats`).
+        :return: List of reports (see `log_report`).
+        """
+        log = []
+        if self.max_page_bytes and stats.num_bytes > self.max_page_bytes:
+            log = log_report(log=log, importance=_BUDGET_IMPORTANCE,
+                message="Page has {} bytes, over budget "\
+                        "`budget.maxPageBytes = {}`.",
+                message_args=(stats.num_bytes, self.max_page_bytes))
+        for section in stats.sections:
+            if self.max_section_lines and \
+               section.num_lines > self.max_section_lines:
+                log = log_report(log=log, importance=_BUDGET_IMPORTANCE,
+                    message="`data.sections[{}]` has {} lines, over budget "\
+                            "`budget.maxSectionLines = {}`.",
+                    message_args=(section.section_index, section.num_lines,
+                                  self.max_section_lines))
+            if self.max_section_links and \
+               section.num_links > self.max_section_links:
+                log = log_report(log=log, importance=_BUDGET_IMPORTANCE,
+                    message="`data.sections[{}]` has {} links, over budget "\
+                            "`budget.maxSectionLinks = {}`.",
+                    message_args=(section.section_index, section.num_links,
+                                  self.max_section_links))
+            if self.max_matches_per_link:
+                for link_index, match_string, num_linked in \
+                    section.link_matches:
+                    if num_linked > self.max_matches_per_link:
+                        log = log_report(log=log,
+                            importance=_BUDGET_IMPORTANCE,
+                            message="'{}' from `data.sections[{}].links[{}]` "\
+                                "is linked {} times, over budget "\
+                                "`budget.maxMatchesPerLink = {}` (narrow "\
+                                "`matchIndex`).",
+                            message_args=(match_string,
+                                          section.section_index, link_index,
+                                          num_linked,
+                                          self.max_matches_per_link))
+        return log
+
+
+## ========================================================================== ##
+##                               HeaviestTable                                ##
+## ========================================================================== ##
+class HeaviestTable():
+    """ Keeps the `count` heaviest pages and sections of a run (by bytes)
+    for the summary table.
+    """
+
+    def __init__(self, count:int):
+        self.count = count
+        self._pages = []
+        self._sections = []
+        self._order = 0
+
+    def add(self, file_path:str, stats:PageStats) -> None:
+        if self.count <= 0:
+            return
+        # insertion order breaks ties (entries are never compared further)
+        self._push(self._pages, (stats.num_bytes, -self._order, str(file_path),
+                                 stats))
+        for section in stats.sections:
+            self._push(self._sections, (section.num_bytes, -self._order,
+                                        str(file_path), section))
+            self._order += 1
+        self._order += 1
+
+    def _push(self, heap:list, item:Tuple) -> None:
+        if len(heap) < self.count:
+            heapq.heappush(heap, item)
+        elif item[0:2] > heap[0][0:2]:
+            heapq.heapreplace(heap, item)
+
+    def print_table(self) -> None:
+        """ Print the heaviest pages and sections, heaviest first.
+        """
+        if self.count <= 0 or not self._pages:
+            return
+        print_headline(headline='HEAVIEST PAGES', fill='-')
+        print_text(f"{'bytes':>10}  {'sections':>8}  page")
+        for num_bytes, _, file_path, stats in \
+            sorted(self._pages, key=lambda item: item[0:2], reverse=True):
+            print_text(f"{num_bytes:>10}  {len(stats.sections):>8}  "\
+                       f"{file_path}")
+        print_headline(headline='HEAVIEST SECTIONS', fill='-')
+        print_text(f"{'bytes':>10}  {'lines':>7}  {'links':>7}  "\
+                   f"page [section]")
+        for num_bytes, _, file_path, section in \
+            sorted(self._sections, key=lambda item: item[0:2], reverse=True):
+            print_text(f"{num_bytes:>10}  {section.num_lines:>7}  "\
+                       f"{section.num_links:>7}  {file_path} "\
+                       f"[{section.section_index}: {section.section_tag}]")
@@ -0,0 +1,200 @@
+import json
+from pathlib import Path
+from typing import Generator, List
+
+
+from python_lib.utils import get_files_of_type
+
+
+## ========================================================================== ##
+##                                   CONSTS                                   ##
+## ========================================================================== ##
+# member of a record naming its page (relative to `config.display.pathData`)
+_OUTPUT_PATH_KEY = "outputPath"
+# bulk files with these extensions are JSON Lines, others multi-document YAML
+_JSONL_EXTENSIONS = (".jsonl", ".ndjson")
+
+
+## ========================================================================== ##
+##                                 BulkRecord                                 ##
+## ========================================================================== ##
+class BulkRecord():
+    """ One page of a bulk file, `data` is `None` if the record cannot be
+    used (see `error`).
+    """
+    __slots__ = ("name", "position", "data", "html_path", "link_file", 
+                 "error")
+
+    def __init__(self, name:str, position:str=None, data:dict=None, 
+                 html_path:Path=None, link_file:str=None, error:str=None):
+        """
+        :param name: `<bulk file>#<record number>` (1-based), names the
+            record in reports.
+        :param position: Position within the bulk file (e.g. `line 3`, 
+            `document 2`), prefixes reports of the record, defaults to None
+        :param data: Page data (same structure as a .yaml page), defaults
+            to None
+        :param html_path: Path to the generated page, defaults to None
+        :param link_file: Page as `linkFile`, defaults to None
+        :param error: Reason the record is skipped, defaults to None
+        """
+        self.name = name
+        self.position = position
+        self.data = data
+        self.html_path = html_path
+        self.link_file = link_file
+        self.error = error
+
+
+## ========================================================================== ##
+##                                 BULK FILES                                 ##
+## ========================================================================== ##
+
+## ============================ get_bulk_extensions ========================== ##
+def get_bulk_extensions(config) -> List[str]:
+    """ Return extensions of bulk files (`generate.bulkFileExtension`).
+    """
+    extensions = getattr(config.generate, 'bulkFileExtension', [])
+    if isinstance(extensions, str):
+        extensions = [extensions]
+    if not isinstance(extensions, list):
+        return []
+    return [extension for extension in extensions
+            if isinstance(extension, str) and extension]
+
+
+## ============================== is_bulk_file ============================== ##
+def is_bulk_file(file_path:str, config) -> bool:
+    """ Return True if `file_path` is a bulk file (also if its extension is
+    among `generate.sourceFileExtension`, e.g. `.pages.yaml`).
+    """
+    name = Path(file_path).name
+    return any(name.endswith(extension)
+               for extension in get_bulk_extensions(config))
+
+
+## ============================= get_bulk_files ============================= ##
+def get_bulk_files(folder_path:str, config, recursive:bool) -> List[Path]:
+    """ Return bulk files within `folder_path`, sorted.
+    """
+    file_paths = set()
+    for extension in get_bulk_extensions(config):
+        file_paths.update(get_files_of_type(
+            folder_path=folder_path,
+            file_extension=extension,
+            recursive=recursive))
+    return sorted(file_paths, key=str)
+
+
+## ============================= get_output_path ============================ ##
+def get_output_path(output_path, data_path:Path,
+                    target_extension:str) -> Path:
+    """ Return path to the page named by `outputPath` of a record, its
+    extension is replaced by `target_extension`.
+
+    :raises ValueError: If `outputPath` is not a relative path within
+        `data_path`.
+    """
+    if not isinstance(output_path, str) or not output_path.strip():
+        raise ValueError(f"missing `{_OUTPUT_PATH_KEY}` (path of the page "\
+                         f"relative to `config.display.pathData`)")
+    if Path(output_path).is_absolute():
+        raise ValueError(f"`{_OUTPUT_PATH_KEY} = '{output_path}'` must be "\
+                         f"relative to `config.display.pathData`")
+    data_path = Path(data_path).resolve()
+    html_path = Path(data_path, output_path).resolve()
+    if data_path not in html_path.parents:
+        raise ValueError(f"`{_OUTPUT_PATH_KEY} = '{output_path}'` is "\
+                         f"outside of `config.display.pathData`")
+    from python_lib.render import is_preview_path
+    if is_preview_path(file_path=html_path):
+        raise ValueError(f"`{_OUTPUT_PATH_KEY} = '{output_path}'` is "\
+                         f"reserved for previews (`<page>.preview.*`)")
+    return html_path.with_suffix(target_extension)
+
+
+## ============================ iterate_bulk_file =========================== ##
+def iterate_bulk_file(file_path:str,
+                      data_path:str,
+                      target_extension:str,
+                    ) -> Generator[BulkRecord, None, None]:
+    """ Stream pages of a bulk file, one record at a time (the file is
+    opened once and never loaded whole). JSON Lines hold one page per line,
+    other bulk files are multi-document YAML (documents separated by
+    `---`). Every record has the structure of a .yaml page plus
+    `outputPath` (page path relative to `config.display.pathData`, e.g.
+    `api/foo.html`).
+
+    A malformed JSON line is reported and skipped, a YAML error ends the
+    file (the stream cannot be resumed).
+
+    :param file_path: Path to the bulk file.
+    :param data_path: `config.display.pathData` (project root joined).
+    :param target_extension: `config.generate.targetFileExtension`
+    :yield: Records in file order.
+    """
+    file_path = Path(file_path)
+    data_path = Path(data_path)
+    if file_path.name.endswith(_JSONL_EXTENSIONS):
+        documents = _iterate_jsonl(file_path=file_path)
+    else:
+        documents = _iterate_yaml_documents(file_path=file_path)
+
+    for record_idx, (position, data, error) in enumerate(documents):
+        name = f"{file_path}#{record_idx+1}"
+        if error is None and not isinstance(data, dict):
+            error = "record is not an object"
+        if error is None:
+            try:
+                html_path = get_output_path(
+                    output_path=data.pop(_OUTPUT_PATH_KEY, None),
+                    data_path=data_path,
+                    target_extension=target_extension)
+            except ValueError as e:
+                error = str(e)
+        if error is not None:
+            yield BulkRecord(name=name, position=position, 
+                             error=f"{position}: {error}")
+            continue
+        yield BulkRecord(
+            name=name,
+            position=position,
+            data=data,
+            html_path=html_path,
+            link_file=html_path.relative_to(data_path.resolve()).as_posix(),
+        )
+
+
+def _iterate_jsonl(file_path:Path):
+    # `(position, data, error)` of every non-empty line
+    with open(file_path, 'r', encoding='utf-8') as file:
+        for line_idx, line in enumerate(file):
+            if not line.strip():
+                continue
+            try:
+                yield f"line {line_idx+1}", json.loads(line), None
+            except ValueError as e:
+                yield f"line {line_idx+1}", None, f"invalid JSON: {e}"
+
+
+def _iterate_yaml_documents(file_path:Path):
+    # `(position, data, error)` of every document, libyaml if available
+    import yaml
+    loader_class = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    with open(file_path, 'r', encoding='utf-8') as file:
+        loader = loader_class(file)
+        document_idx = 0
+        try:
+            while True:
+                try:
+                    if not loader.check_data():
+                        break
+                    data = loader.get_data()
+                except yaml.YAMLError as e:
+                    yield f"document {document_idx+1}", None, \
+                          f"invalid YAML, rest of the file is skipped: {e}"
+                    break
+                yield f"document {document_idx+1}", data, None
+                document_idx += 1
+        finally:
+            loader.dispose()
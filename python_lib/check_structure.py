@@ -49,15 +49,19 @@ class DataStructureChecker:
 
     # wrapper functions for logging
     def log_branch_report(self, importance:int, branch:list, message:str, 
+            message_args:tuple=None,
         ) -> None:
         self.log = log_branch_report(log=self.log, importance=importance, 
             branch=branch, message=message, message_limit=240,
+            message_args=message_args,
             )
 
 
-    def log_report(self, importance:int, message:str) -> None:
+    def log_report(self, importance:int, message:str, 
+            message_args:tuple=None,
+        ) -> None:
         self.log = log_report(log=self.log, importance=importance, 
-                message=message, message_limit=240,
+                message=message, message_limit=240, message_args=message_args,
             )
 
 
@@ -1,13 +1,12 @@
 import argparse
-import json
 import os
 from pathlib import Path
 import sys
-from types import SimpleNamespace
-import yaml
 
 
 from python_lib.log import print_report, _CRITICAL
+from python_lib.shard import parse_shard
+from python_lib.utils import load_config_file
 
 
 ## ========================================================================== ##
@@ -43,6 +42,21 @@ class CommandLineInterface():
     @property
     def purge(self):
         return self._purge
+    @property
+    def log_jsonl(self):
+        return self._log_jsonl
+    @property
+    def check_only(self):
+        return self._check_only
+    @property
+    def jobs(self):
+        return self._jobs
+    @property
+    def shard(self):
+        return self._shard
+    @property
+    def merge_shards(self):
+        return self._merge_shards
 
 
     def _register_parser(self, root_path:str):
@@ -72,7 +86,39 @@ class CommandLineInterface():
         parser.add_argument("-p", "--purge", 
                     action="store_true",
                     help=f"If set, the script purges/deletes "\
-                    f"all generated <file>.html files.")
+                    f"all generated <file>.html files (also resized "\
+                    f"images, fragments and pages cached by `serve.py -r`).")
+        parser.add_argument("--check-only", 
+                    action="store_true",
+                    help=f"If set, the files are only validated (structure, "\
+                    f"links, images), no HTML is generated, exits with "\
+                    f"non-zero status if any error is found.")
+        parser.add_argument("-j", "--jobs", 
+                    type=int,
+                    default=os.cpu_count() or 1,
+                    help=f"Number of worker processes of --check-only and "\
+                    f"of large sections (`generate.parallelSectionChars`), "\
+                    f"and threads resizing images (default: number of CPUs)")
+        parser.add_argument("--shard", 
+                    default=None,
+                    metavar="INDEX/COUNT",
+                    help=f"Process only the INDEX-th (1-based) of COUNT "\
+                    f"shards of the files (split deterministically, balanced "\
+                    f"by historical cost or file size) and write a partial "\
+                    f"manifest into <directory>/.shards/ instead of "\
+                    f"manifest.json, see --merge-shards.")
+        parser.add_argument("--merge-shards", 
+                    type=int,
+                    default=None,
+                    metavar="COUNT",
+                    help=f"Combine partial manifests of all COUNT shards into "\
+                    f"manifest.json, print their reports and record costs "\
+                    f"for balancing the next split, exits with non-zero "\
+                    f"status if any shard is missing.")
+        parser.add_argument("--log-jsonl", 
+                    default=None,
+                    help=f"Path to a file where reports are written "\
+                    f"in machine-readable JSON Lines format.")
         
         return parser
 
@@ -92,14 +138,8 @@ class CommandLineInterface():
             sys.exit(1)
         else:
             try:
-                def load_object(dct):
-                    return SimpleNamespace(**dct)
-                with open(config_path, 'r') as file:
-                    config_dict = yaml.safe_load(file)
-                    config = json.loads(json.dumps(config_dict), 
-                                        object_hook=load_object)
-                    config.dataStructure = config_dict['dataStructure']
-            except Exception as e:
+                config = load_config_file(config_path)
+            except RuntimeError as e:
                 print_report(
                     importance=_CRITICAL, 
                     message=f"The specified config file cannot be parsed: {e}")
@@ -132,4 +172,32 @@ class CommandLineInterface():
         self._directory = directory
         self._config = config
         self._config_path = config_path
-        self._purge = args.purge
\ No newline at end of file
+        self._purge = args.purge
+        self._log_jsonl = args.log_jsonl
+        self._check_only = args.check_only
+        self._jobs = max(args.jobs, 1)
+
+        # Process shard arguments
+        self._shard = None
+        if args.shard is not None:
+            try:
+                self._shard = parse_shard(args.shard)
+            except ValueError as e:
+                print_report(
+                    importance=_CRITICAL, 
+                    message=f"Invalid --shard: {e}")
+                sys.exit(1)
+        self._merge_shards = args.merge_shards
+        if self._merge_shards is not None and self._merge_shards < 1:
+            print_report(
+                importance=_CRITICAL, 
+                message=f"Invalid --merge-shards: COUNT must be positive, "\
+                        f"got {self._merge_shards}")
+            sys.exit(1)
+        if sum([args.purge, self._shard is not None, 
+                self._merge_shards is not None]) > 1:
+            print_report(
+                importance=_CRITICAL, 
+                message=f"Options --purge, --shard and --merge-shards "\
+                        f"cannot be combined")
+            sys.exit(1)
\ No newline at end of file
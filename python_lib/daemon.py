@@ -0,0 +1,196 @@
+import json
+import os
+from pathlib import Path
+import socket
+import socketserver
+import threading
+from typing import Union
+
+
+from python_lib.log import format_report_record
+
+
+## ========================================================================== ##
+##                                   CONSTS                                   ##
+## ========================================================================== ##
+_DAEMON_SOCKET = ".cache/render.sock"
+_DAEMON_OPS = ("render", "ping", "stop")
+# YAML rendered at start-up, imports and lexers are loaded before the first
+# request
+_WARM_UP_TEXT = """\
+header:
+  title: warm-up
+sections:
+  - sectionTag: code
+    content:
+      text: "int main() { return 0; }"
+      syntaxHighlight: cpp
+  - sectionTag: text
+    content:
+      text: "*warm-up*"
+      syntaxHighlight: markdown
+"""
+
+
+## ============================ get_socket_path ============================= ##
+def get_socket_path(root_path:str) -> Path:
+    """ Return default path of the daemon socket.
+    """
+    return Path(root_path, _DAEMON_SOCKET)
+
+
+## ========================================================================== ##
+##                                   CLIENT                                   ##
+## ========================================================================== ##
+def send_request(socket_path:str, request:dict, timeout:float=None) -> dict:
+    """ Send one request to the daemon and return its response. Requests
+    and responses are JSON objects, one per line:
+
+        {"op": "render", "path": "<file.yaml>", "text": "<yaml>",
+         "preview": false}
+        -> {"ok": true, "html": "...", "log": [{"importance": "error",
+            "level": 2, "message": "..."}], "timings": {"parse": 0.4,
+            "check": 0.1, "render": 3.2, "total": 3.8}}
+
+    `text` or `path` is required by "render" (`path` alone is read by the
+    daemon), "ping" and "stop" take no arguments.
+
+    :param socket_path: Path to the daemon socket.
+    :param request: Request object.
+    :param timeout: Timeout [s], defaults to None (blocking)
+    :raises OSError: If the daemon is not running.
+    :return: Response object.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(str(socket_path))
+        client.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        with client.makefile('rb') as reader:
+            line = reader.readline()
+    if not line:
+        raise ConnectionError("daemon closed the connection")
+    return json.loads(line)
+
+
+def is_daemon_running(socket_path:str) -> Union[int, None]:
+    """ Return process id of the daemon listening on `socket_path`, `None`
+    if there is none.
+    """
+    try:
+        return send_request(socket_path=socket_path, request={"op": "ping"},
+                            timeout=1.0).get("pid", None)
+    except (OSError, ValueError):
+        return None
+
+
+## ========================================================================== ##
+##                                   DAEMON                                   ##
+## ========================================================================== ##
+class RenderRequestHandler(socketserver.StreamRequestHandler):
+    """ Handles requests of one connection (one JSON object per line), the
+    connection may send any number of requests.
+    """
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            request = None
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request is not a JSON object")
+                response = self.server.handle_request_object(request)
+            except ValueError as e:
+                response = {"ok": False, "error": f"invalid request: {e}"}
+            except Exception as e:
+                response = {"ok": False, "error": f"render failed: {e}"}
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+            if isinstance(request, dict) and request.get("op", None) == "stop":
+                threading.Thread(target=self.server.shutdown).start()
+                return
+
+
+class RenderDaemon(socketserver.ThreadingMixIn,
+                   socketserver.UnixStreamServer):
+    """ Long-lived renderer listening on a Unix socket. Config, imports,
+    lexers and the auto-link dictionary stay loaded between requests (see
+    `OnDemandRenderer`), thus a request costs only the rendering itself.
+    """
+    daemon_threads = True
+
+    def __init__(self, socket_path:str, renderer, quiet:bool=False,
+                 report=None):
+        """
+        :param socket_path: Path to the socket (stale one is replaced).
+        :param renderer: `python_lib.render.OnDemandRenderer`
+        :param quiet: If True, requests are not reported, defaults to False
+        :param report: Called with a line reporting each request, defaults
+            to None
+        """
+        self.socket_path = Path(socket_path)
+        self.renderer = renderer
+        self.quiet = quiet
+        self.report = report
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.exists():
+            # socket left by a daemon that did not stop cleanly
+            try:
+                send_request(socket_path=self.socket_path,
+                             request={"op": "ping"}, timeout=1.0)
+            except OSError:
+                self.socket_path.unlink()
+            else:
+                raise OSError(f"daemon is already running on "\
+                              f"'{self.socket_path}'")
+        super().__init__(str(self.socket_path), RenderRequestHandler)
+        # other users cannot connect
+        os.chmod(self.socket_path, 0o600)
+
+    def warm_up(self) -> dict:
+        """ Render a small page (loads imports, lexers and the auto-link
+        dictionary), returns its timings.
+        """
+        _, _, timings = self.renderer.render_source(text=_WARM_UP_TEXT)
+        return timings
+
+    def handle_request_object(self, request:dict) -> dict:
+        op = request.get("op", "render")
+        if op not in _DAEMON_OPS:
+            raise ValueError(f"unknown op '{op}' (one of {_DAEMON_OPS})")
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid()}
+        if op == "stop":
+            return {"ok": True}
+
+        path = request.get("path", None)
+        text = request.get("text", None)
+        if not isinstance(path, (str, type(None))) or \
+           not isinstance(text, (str, type(None))) or \
+           (path is None and text is None):
+            raise ValueError("render requires `text` or `path` (strings)")
+        if path is not None and not Path(path).is_absolute():
+            path = str(Path(self.renderer.root_path, path))
+        html, log, timings = self.renderer.render_source(
+                source_path=path,
+                text=text,
+                preview=bool(request.get("preview", False)),
+            )
+        if not self.quiet and self.report is not None:
+            self.report(f"render {path or '<text>'} : "\
+                        f"{'ok' if html is not None else 'invalid'}, "\
+                        f"{timings['total']:.1f} ms")
+        return {"ok": html is not None,
+                "html": html,
+                "log": [format_report_record(report) for report in log],
+                "timings": {name: round(value, 3)
+                            for name, value in timings.items()}}
+
+    def server_close(self):
+        super().server_close()
+        try:
+            self.socket_path.unlink()
+        except OSError:
+            pass
+
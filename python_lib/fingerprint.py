@@ -0,0 +1,144 @@
+import hashlib
+import json
+from pathlib import Path
+import re
+
+
+from python_lib.utils import get_files_of_type, write_if_changed
+
+
+## ========================================================================== ##
+##                                   CONSTS                                   ##
+## ========================================================================== ##
+_MANIFEST_FILE = "manifest.json"
+_INDEX_FILE = "index.html"
+# tracked source of `index.html` (generated, not tracked, assets tagged)
+_INDEX_TEMPLATE_FILE = "index.template.html"
+_CONFIG_FILE = "config.yaml" # fetched by the viewer from project root
+_HASH_LENGTH = 16
+_HASH_QUERY = "v"
+
+# local assets referenced by `href="..."` or `src="..."` within index.html
+# (a tag already present is replaced)
+_ASSET_REFERENCE_REGEX = re.compile(
+    r'(?P<attr>href|src)="(?P<path>(?:css|js|assets)/[^"?#]+)'\
+    r'(?:\?[^"#]*)?"')
+
+
+## ========================================================================== ##
+##                                FINGERPRINT                                 ##
+## ========================================================================== ##
+
+## ============================ get_content_hash ============================ ##
+def get_content_hash(file_path:str, length:int=_HASH_LENGTH) -> str:
+    """ Return hex digest of file content (streamed in chunks).
+
+    :param file_path: Path to the file.
+    :param length: Number of hex characters kept, defaults to 16
+    :return: Truncated SHA-256 hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024*1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[0:length]
+
+
+## ========================== fingerprint_index_html ======================== ##
+def fingerprint_index_html(root_path:str, 
+                           index_file:str=_INDEX_FILE,
+                           template_file:str=_INDEX_TEMPLATE_FILE,
+                        ) -> bool:
+    """ Write `index.html` from `index.template.html`, local assets are 
+    tagged with the hash of their content (`css/styles.css` -> 
+    `css/styles.css?v=<hash>`), so the browser can cache them as immutable 
+    and still picks up every change. `index.html` is a build output (not 
+    tracked), thus builds leave the checkout clean.
+
+    :param root_path: Project root (where `index.html` is found).
+    :param index_file: Name of the written HTML file, defaults to 
+        'index.html'
+    :param template_file: Name of the tracked source, defaults to 
+        'index.template.html'
+    :return: True if `index.html` was (re)written, False if unchanged or 
+        there is no template.
+    """
+    template_path = Path(root_path, template_file)
+    if not template_path.exists():
+        return False
+    with open(template_path, 'r') as file:
+        html = file.read()
+
+    def tag_asset(match):
+        asset_path = Path(root_path, match.group('path'))
+        if not asset_path.exists():
+            return match.group(0)
+        return f'{match.group("attr")}="{match.group("path")}'\
+               f'?{_HASH_QUERY}={get_content_hash(asset_path)}"'
+
+    tagged_html = _ASSET_REFERENCE_REGEX.sub(tag_asset, html)
+    return write_if_changed(file_path=Path(root_path, index_file), 
+                            content=tagged_html)
+
+
+## ========================= generate_page_manifest ========================= ##
+def generate_page_manifest(root_path:str,
+                           config,
+                           manifest_file:str=_MANIFEST_FILE,
+                        ) -> dict:
+    """ Write `manifest.json` mapping every generated page (path relative to
+    `root_path`, as requested by the viewer) to the hash of its content.
+    The viewer fetches `<page>?v=<hash>`, thus pages can be cached as
+    immutable. The manifest itself needs to be revalidated on every load.
+
+    *Example*
+        {
+            "config": "config.yaml?v=0123456789abcdef",
+            "pages": {"data_to_explore/_init.html": "0123456789abcdef"}
+        }
+
+    :param root_path: Project root (where `index.html` is found).
+    :param config: Parsed config (see `CommandLineInterface.config`).
+    :param manifest_file: Name of the manifest, defaults to 'manifest.json'
+    :return: Manifest content.
+    """
+    root_path = Path(root_path).resolve()
+    file_paths = get_files_of_type(
+        folder_path=Path(root_path, config.display.pathData),
+        file_extension=config.generate.targetFileExtension,
+        recursive=True)
+
+    pages = {}
+    for file_path in file_paths:
+        page_url = Path(file_path).resolve().relative_to(root_path).as_posix()
+        pages[page_url] = get_content_hash(file_path)
+
+    return write_page_manifest(root_path=root_path, pages=pages,
+                               manifest_file=manifest_file)
+
+
+## ========================== write_page_manifest =========================== ##
+def write_page_manifest(root_path:str,
+                        pages:dict,
+                        manifest_file:str=_MANIFEST_FILE,
+                    ) -> dict:
+    """ Write `manifest.json` listing given `pages` (`{page_url: hash}`), 
+    see `generate_page_manifest`. The file is rewritten only if its content
+    changes.
+
+    :param root_path: Project root (where `index.html` is found).
+    :param pages: Mapping of page paths (relative to `root_path`) to hashes.
+    :param manifest_file: Name of the manifest, defaults to 'manifest.json'
+    :return: Manifest content.
+    """
+    manifest = {"pages": dict(pages)}
+    config_path = Path(root_path, _CONFIG_FILE)
+    if config_path.exists():
+        manifest["config"] = \
+            f"{_CONFIG_FILE}?{_HASH_QUERY}={get_content_hash(config_path)}"
+
+    manifest_str = json.dumps(manifest, indent=1, sort_keys=True) + "\n"
+
+    write_if_changed(file_path=Path(root_path, manifest_file), 
+                     content=manifest_str)
+    return manifest
@@ -0,0 +1,181 @@
+from collections import OrderedDict
+import hashlib
+import os
+from pathlib import Path
+import re
+import threading
+from typing import List, Union
+
+
+from python_lib.utils import write_if_changed
+
+
+## ========================================================================== ##
+##                                   CONSTS                                   ##
+## ========================================================================== ##
+_FRAGMENT_DIR = "fragments"
+_FRAGMENT_REGEX = re.compile(r'^[0-9a-f]{16}\.html$')
+_HTML_SECTION_FRAGMENT = "section-fragment"
+# [B] - content kept within pages is remembered up to this size (LRU)
+_DEFAULT_MEMORY_BYTES = 32 * 1024 * 1024
+
+
+## ========================================================================== ##
+##                               FragmentRecord                               ##
+## ========================================================================== ##
+class FragmentRecord():
+    """ Rendered section content, `html` is either the content itself
+    (small) or a placeholder referencing the fragment file `path` (`key` is
+    its `(st_mtime_ns, st_size)`). `match_counts` and `num_auto_links` are
+    kept for the reports of pages reusing it, `num_bytes` is the size of 
+    the content (also of the one in the fragment file).
+    """
+    __slots__ = ("html", "match_counts", "num_auto_links", "path", "key",
+                 "num_bytes")
+
+    def __init__(self, html:str, match_counts:List[int], num_auto_links:int,
+                 path:str=None, key:tuple=None, num_bytes:int=0):
+        self.html = html
+        self.match_counts = match_counts
+        self.num_auto_links = num_auto_links
+        self.path = path
+        self.key = key
+        self.num_bytes = num_bytes
+
+
+## ========================================================================== ##
+##                               FragmentStore                                ##
+## ========================================================================== ##
+class FragmentStore():
+    """ Section content rendered once per run (keyed by everything the
+    rendering depends on) and shared by all pages. Content of `min_bytes` or
+    more is written once into `fragments/<hash>.html` (hash of the content),
+    pages only reference it and the viewer fetches (and caches) it once.
+
+    Records of fragment files hold only the placeholder, content kept within
+    pages is remembered in a bounded least-recently-used cache, thus memory
+    does not grow with the size of the corpus.
+    """
+
+    def __init__(self, root_path:str, min_bytes:int,
+                 memory_bytes:int=_DEFAULT_MEMORY_BYTES):
+        """
+        :param root_path: Project root (where `index.html` is), fragments
+            are written into `<root>/fragments/`.
+        :param min_bytes: Smaller content stays within the page.
+        :param memory_bytes: Size of remembered content kept within pages, 
+            defaults to 32MB
+        """
+        self.root_path = Path(root_path)
+        self.min_bytes = min_bytes
+        self.memory_bytes = memory_bytes
+        self.num_reused = 0
+        self.num_written = 0
+        self._records = {}
+        self._small_records = OrderedDict()
+        self._small_bytes = 0
+        self._used = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(*inputs) -> str:
+        """ Return key of section content from its rendering inputs.
+        """
+        return hashlib.sha256(repr(inputs).encode()).hexdigest()
+
+    def has(self, key:str) -> bool:
+        """ Return True if content of the same inputs was rendered.
+        """
+        with self._lock:
+            return key in self._records or key in self._small_records
+
+    def get(self, key:str) -> Union[FragmentRecord, None]:
+        """ Return content rendered for the same inputs, `None` if new (or
+        its fragment file was deleted meanwhile, e.g. by `--purge`).
+        """
+        with self._lock:
+            record = self._records.get(key, None)
+            if record is not None and not os.path.exists(record.path):
+                self._used.discard(Path(record.path).name)
+                del self._records[key]
+                record = None
+            if record is None:
+                record = self._small_records.get(key, None)
+                if record is not None:
+                    self._small_records.move_to_end(key)
+            if record is not None:
+                self.num_reused += 1
+            return record
+
+    def put(self, key:str, html:str, match_counts:List[int],
+            num_auto_links:int) -> FragmentRecord:
+        """ Store rendered content, large content is written into a fragment
+        file (unless identical one exists) and replaced by a placeholder.
+
+        :param key: Key of rendering inputs (see `get_key`).
+        :param html: Rendered section content.
+        :param match_counts: Number of matches of every link.
+        :param num_auto_links: Number of inserted auto-links.
+        :return: Record with the HTML to put into the page.
+        """
+        fragment_path = None
+        fragment_key = None
+        content = html.encode('utf-8') if html else b''
+        num_bytes = len(content)
+        if html and len(html) >= self.min_bytes:
+            name = f"{hashlib.sha256(content).hexdigest()[0:16]}.html"
+            fragment = f"{_FRAGMENT_DIR}/{name}"
+            fragment_path = Path(self.root_path, _FRAGMENT_DIR, name)
+            # first use in this run writes the file (kept if identical)
+            with self._lock:
+                if name not in self._used:
+                    fragment_path.parent.mkdir(parents=True, exist_ok=True)
+                    if write_if_changed(file_path=fragment_path, 
+                                        content=content):
+                        self.num_written += 1
+                    self._used.add(name)
+                stat = os.stat(fragment_path)
+            fragment_key = (stat.st_mtime_ns, stat.st_size)
+            html = f'<div class="{_HTML_SECTION_FRAGMENT}" '\
+                   f'data-fragment="{fragment}"></div>\n'
+        record = FragmentRecord(html=html, match_counts=match_counts,
+                                num_auto_links=num_auto_links,
+                                path=str(fragment_path) \
+                                    if fragment_path is not None else None,
+                                key=fragment_key,
+                                num_bytes=num_bytes)
+        with self._lock:
+            if record.path is not None:
+                self._records[key] = record
+            elif num_bytes <= self.memory_bytes:
+                previous = self._small_records.pop(key, None)
+                if previous is not None:
+                    self._small_bytes -= previous.num_bytes
+                self._small_records[key] = record
+                self._small_bytes += num_bytes
+                while self._small_bytes > self.memory_bytes:
+                    _, evicted = self._small_records.popitem(last=False)
+                    self._small_bytes -= evicted.num_bytes
+        return record
+
+    def prune(self) -> int:
+        """ Delete fragment files not referenced by pages of this run (call
+        only after all pages were generated). Returns number of deleted.
+        """
+        num_deleted = 0
+        for fragment_path in list_fragments(root_path=self.root_path):
+            if fragment_path.name not in self._used:
+                fragment_path.unlink()
+                num_deleted += 1
+        return num_deleted
+
+
+## ============================= list_fragments ============================= ##
+def list_fragments(root_path:str) -> List[Path]:
+    """ Return paths of all fragment files within `<root>/fragments/`.
+    """
+    fragment_dir = Path(root_path, _FRAGMENT_DIR)
+    if not fragment_dir.exists():
+        return []
+    return sorted(path for path in fragment_dir.iterdir()
+                  if _FRAGMENT_REGEX.match(path.name))
@@ -0,0 +1,254 @@
+from contextlib import contextmanager
+import re
+import signal
+import threading
+import time
+from typing import Callable, Generator, List, Tuple, Union
+
+from pygments.formatters import HtmlFormatter
+from pygments.formatters.html import escape_html
+
+
+## ========================================================================== ##
+##                                   CONSTS                                   ##
+## ========================================================================== ##
+# tokens formatted between two checks of the deadline
+_DEADLINE_CHECK_TOKENS = 256
+
+
+## ========================================================================== ##
+##                              HighlightTimeout                              ##
+## ========================================================================== ##
+class HighlightTimeout(Exception):
+    """ Highlighting exceeded its time limit (see `highlight_time_limit`).
+    """
+
+
+## ========================== highlight_time_limit ========================== ##
+@contextmanager
+def highlight_time_limit(
+        seconds:float,
+    ) -> Generator[Union[float, None], None, None]:
+    """ Limit time spent highlighting within the block, `HighlightTimeout` is
+    raised once `seconds` elapse. Yields deadline (`time.monotonic()`, `None`
+    if unlimited), `DisplayLineFormatter` checks it between tokens.
+
+    In the main thread (also of worker processes) `SIGALRM` interrupts even 
+    a lexer stuck in one regex match (backtracking), other threads (e.g. 
+    `serve.py`) rely on the deadline checked between tokens, their lexers 
+    run in killable worker processes (see `python_lib.lexer_pool`).
+
+    :param seconds: Time limit [s], 0 (or less) disables the limit.
+    """
+    if not seconds or seconds <= 0:
+        yield None
+        return
+    deadline = time.monotonic() + seconds
+    if not hasattr(signal, 'setitimer') or \
+       threading.current_thread() is not threading.main_thread():
+        yield deadline
+        return
+
+    def on_alarm(signum, frame):
+        raise HighlightTimeout(f"exceeded {seconds} s")
+    previous_handler = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield deadline
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
+## ========================================================================== ##
+##                                LinkTarget                                  ##
+## ========================================================================== ##
+class LinkTarget():
+    """ Link inserted by `DisplayLineFormatter`, `match_count` counts all
+    whole-word occurrences of `match_string` (linked or not).
+    """
+    __slots__ = ("match_string", "pattern", "open_tag", "is_selected",
+                 "match_count")
+
+    def __init__(self, match_string:str, pattern:str, open_tag:str,
+                 is_selected:Callable[[int], bool]):
+        """
+        :param match_string: Linked text.
+        :param pattern: Regex matching whole-word `match_string` (group 1).
+        :param open_tag: Opening `<a ...>` tag of the link.
+        :param is_selected: Returns True if n-th occurrence is linked
+            (see `StructToHtml.check_index_within_match_index`).
+        """
+        self.match_string = match_string
+        self.pattern = re.compile(pattern)
+        self.open_tag = open_tag
+        self.is_selected = is_selected
+        self.match_count = 0
+
+
+## ========================================================================== ##
+##                           DisplayLineFormatter                             ##
+## ========================================================================== ##
+class DisplayLineFormatter(HtmlFormatter):
+    """ HtmlFormatter writing each line of highlighted code as numbered
+    `display-line` row (or a plain line) with links inserted, in one pass
+    over the token stream. Spans are the same as `HtmlFormatter(nowrap=True)`
+    produces (consecutive tokens of the same class share one span).
+
+    Links are matched on the text of each line (before escaping), thus they
+    never land inside markup. A link within one span is nested in the span,
+    a link crossing spans wraps them.
+    """
+
+    def __init__(self,
+                 line_numbers:bool=True,
+                 line_number_start:int=1,
+                 links:List[LinkTarget]=None,
+                 auto_link:Callable[[str], List[Tuple[int, int, str]]]=None,
+                 deadline:float=None,
+                 **options):
+        """
+        :param line_numbers: If True, lines are wrapped into numbered
+            `display-line` rows, defaults to True
+        :param line_number_start: Number of the first line, defaults to 1
+        :param links: Links to insert, defaults to None
+        :param auto_link: Returns `(start, end, open_tag)` of auto-links
+            within line text, `links` win overlaps, defaults to None
+        :param deadline: `time.monotonic()` after which `HighlightTimeout`
+            is raised (see `highlight_time_limit`), defaults to None
+        """
+        super().__init__(nowrap=True, **options)
+        self.line_numbers = line_numbers
+        self.line_number = line_number_start
+        self.links = links if links is not None else []
+        self.auto_link = auto_link
+        self.deadline = deadline
+        self._span_openers = {}
+
+    def _get_span_opener(self, ttype) -> str:
+        span_opener = self._span_openers.get(ttype, None)
+        if span_opener is None:
+            css_class = self._get_css_classes(ttype)
+            span_opener = f'<span class="{css_class}">' if css_class else ''
+            self._span_openers[ttype] = span_opener
+        return span_opener
+
+    def format_unencoded(self, tokensource, outfile) -> None:
+        runs = [] # [span opener, text] of the current line
+        deadline = self.deadline
+        for token_idx, (ttype, value) in enumerate(tokensource):
+            if deadline is not None and \
+               token_idx % _DEADLINE_CHECK_TOKENS == 0 and \
+               time.monotonic() > deadline:
+                raise HighlightTimeout("deadline exceeded")
+            span_opener = self._get_span_opener(ttype)
+            parts = value.split('\n')
+            for part in parts[:-1]:
+                if part:
+                    self._append_run(runs, span_opener, part)
+                self._write_line(outfile, runs)
+                runs = []
+            if parts[-1]:
+                self._append_run(runs, span_opener, parts[-1])
+        if runs:
+            self._write_line(outfile, runs)
+
+    @staticmethod
+    def _append_run(runs:list, span_opener:str, text:str) -> None:
+        if runs and runs[-1][0] == span_opener:
+            runs[-1][1] += text
+        else:
+            runs.append([span_opener, text])
+
+    def _find_links(self, text:str) -> List[Tuple[int, int, str]]:
+        """ Return sorted `(start, end, open_tag)` of links within line
+        `text`, earlier links win overlaps.
+        """
+        found = []
+        for link in self.links:
+            if link.match_string not in text:
+                continue
+            for match in link.pattern.finditer(text):
+                match_index = link.match_count
+                link.match_count += 1
+                if not link.is_selected(match_index):
+                    continue
+                start, end = match.span(1)
+                if any(start < f_end and f_start < end
+                       for f_start, f_end, _ in found):
+                    continue
+                found.append((start, end, link.open_tag))
+        if self.auto_link is not None:
+            explicit = found[:]
+            found.extend(item for item in self.auto_link(text)
+                         if not any(item[0] < f_end and f_start < item[1]
+                                    for f_start, f_end, _ in explicit))
+        found.sort()
+        return found
+
+    def _format_runs(self, runs:list) -> str:
+        """ Return HTML of a line, runs of text with links inserted.
+        """
+        found = self._find_links(''.join(text for _, text in runs)) \
+                    if self.links or self.auto_link is not None else []
+        html = []
+        run_start = 0
+        for span_opener, text in runs:
+            run_end = run_start + len(text)
+            span_closer = '</span>' if span_opener else ''
+            if not any(start < run_end and run_start < end
+                       for start, end, _ in found):
+                html.append(f'{span_opener}{escape_html(text)}{span_closer}')
+                run_start = run_end
+                continue
+
+            # cut the run at link boundaries
+            cuts = {run_start, run_end}
+            for start, end, _ in found:
+                cuts.update(cut for cut in (start, end)
+                            if run_start < cut < run_end)
+            cuts = sorted(cuts)
+            span_open = False
+            for piece_start, piece_end in zip(cuts[:-1], cuts[1:]):
+                piece = escape_html(text[piece_start - run_start:
+                                         piece_end - run_start])
+                link = next((item for item in found
+                             if item[0] <= piece_start and piece_end <= item[1]),
+                            None)
+                nested = link is not None and link[0] >= run_start \
+                            and link[1] <= run_end
+                if link is None or nested:
+                    # text of the span (link nested in the span)
+                    if not span_open:
+                        html.append(span_opener)
+                        span_open = True
+                    if nested and piece_start == link[0]:
+                        html.append(link[2])
+                    html.append(piece)
+                    if nested and piece_end == link[1]:
+                        html.append('</a>')
+                else:
+                    # link crossing spans wraps them
+                    if span_open:
+                        html.append(span_closer)
+                        span_open = False
+                    if piece_start == link[0]:
+                        html.append(link[2])
+                    html.append(f'{span_opener}{piece}{span_closer}')
+                    if piece_end == link[1]:
+                        html.append('</a>')
+            if span_open:
+                html.append(span_closer)
+            run_start = run_end
+        return ''.join(html)
+
+    def _write_line(self, outfile, runs:list) -> None:
+        line = self._format_runs(runs)
+        if self.line_numbers:
+            outfile.write(
+                f'<div class="display-line"><div class="display-line-num">'\
+                f'{self.line_number}</div><div class="display-line-text">'\
+                f'{line.rstrip()}</div></div>\n')
+            self.line_number += 1
+        else:
+            outfile.write(f'{line}\n')
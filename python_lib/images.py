@@ -0,0 +1,283 @@
+import base64
+from concurrent.futures import ThreadPoolExecutor, Future
+import hashlib
+import os
+from pathlib import Path
+import re
+import struct
+import threading
+from typing import List, Tuple, Union
+
+
+## ========================================================================== ##
+##                                   CONSTS                                   ##
+## ========================================================================== ##
+_IMAGE_VARIANT_DIR = "image_variants"
+_IMAGE_VARIANT_REGEX = re.compile(r'^[0-9a-f]{16}-\d+\.\w+$')
+_IMAGE_MIME_TYPES = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+    '.svg': 'image/svg+xml',
+}
+# formats resized by Pillow (GIF may be animated, SVG is not raster)
+_IMAGE_RESIZED_FORMATS = {
+    '.png': ('PNG', {'optimize': True}),
+    '.jpg': ('JPEG', {'quality': 85, 'optimize': True}),
+    '.jpeg': ('JPEG', {'quality': 85, 'optimize': True}),
+    '.webp': ('WEBP', {'quality': 80}),
+}
+
+
+def _get_pillow():
+    # Pillow is optional, without it images are not resized
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return None
+    return Image, ImageOps
+
+
+## ========================================================================== ##
+##                                 IMAGE SIZE                                 ##
+## ========================================================================== ##
+
+## ============================= read_image_size ============================ ##
+def read_image_size(file_path:str) -> Union[Tuple[int, int], None]:
+    """ Return `(width, height)` of PNG, GIF, JPEG or WebP image read from
+    its header (without Pillow), `None` if the format is not recognized.
+    """
+    try:
+        with open(file_path, 'rb') as file:
+            head = file.read(32)
+            if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+                return struct.unpack('>II', head[16:24])
+            if head[0:6] in (b'GIF87a', b'GIF89a'):
+                return struct.unpack('<HH', head[6:10])
+            if head[0:4] == b'RIFF' and head[8:12] == b'WEBP':
+                chunk = head[12:16]
+                if chunk == b'VP8X':
+                    return (int.from_bytes(head[24:27], 'little') + 1,
+                            int.from_bytes(head[27:30], 'little') + 1)
+                if chunk == b'VP8 ':
+                    width, height = struct.unpack('<HH', head[26:30])
+                    return width & 0x3fff, height & 0x3fff
+                if chunk == b'VP8L':
+                    bits = int.from_bytes(head[21:25], 'little')
+                    return (bits & 0x3fff) + 1, ((bits >> 14) & 0x3fff) + 1
+                return None
+            if head[0:2] == b'\xff\xd8':
+                # walk JPEG segments until start of frame (SOFn)
+                file.seek(2)
+                while True:
+                    marker = file.read(2)
+                    if len(marker) < 2 or marker[0] != 0xff:
+                        return None
+                    if marker[1] in (0xd8, 0x01) or 0xd0 <= marker[1] <= 0xd7:
+                        continue
+                    length = struct.unpack('>H', file.read(2))[0]
+                    if 0xc0 <= marker[1] <= 0xcf and \
+                       marker[1] not in (0xc4, 0xc8, 0xcc):
+                        height, width = struct.unpack('>xHH', file.read(5))
+                        return width, height
+                    file.seek(length - 2, os.SEEK_CUR)
+    except (OSError, struct.error):
+        return None
+    return None
+
+
+## ========================================================================== ##
+##                                 ImageInfo                                  ##
+## ========================================================================== ##
+class ImageInfo():
+    """ Processed image of a section, `srcset` lists `(url, width)` of
+    resized variants and the original, `jobs` are pending resizes.
+    """
+    __slots__ = ("src", "width", "height", "srcset", "thumbnail", "key",
+                 "jobs")
+
+    def __init__(self, src:str, width:int=None, height:int=None,
+                 srcset:list=None, thumbnail:str=None, key:tuple=None,
+                 jobs:List[Future]=None):
+        self.src = src
+        self.width = width
+        self.height = height
+        self.srcset = srcset if srcset is not None else []
+        self.thumbnail = thumbnail
+        self.key = key
+        self.jobs = jobs if jobs is not None else []
+
+
+## ========================================================================== ##
+##                                 ImageStore                                 ##
+## ========================================================================== ##
+class ImageStore():
+    """ Resized variants of section images, shared by all pages of a run.
+    Variants are named by the content hash of the original
+    (`image_variants/<hash>-<width>.<ext>`), thus an image used by more
+    pages is processed once and variants of unchanged images are reused by
+    later runs. Resizing runs in a thread pool while pages are generated,
+    `wait()` collects the results.
+    """
+
+    def __init__(self, root_path:str, widths:list=None, inline_bytes:int=0,
+                 max_workers:int=None):
+        """
+        :param root_path: Project root (where `index.html` is), variants are
+            written into `<root>/image_variants/`.
+        :param widths: Widths [px] of resized variants, defaults to None
+            (no variants)
+        :param inline_bytes: Images up to this size are inlined as data URI,
+            defaults to 0 (disabled)
+        :param max_workers: Resizing threads, defaults to None (see
+            `ThreadPoolExecutor`)
+        """
+        self.root_path = Path(root_path)
+        self.widths = sorted(set(int(width) for width in (widths or [])
+                                 if isinstance(width, int) and width > 0))
+        self.inline_bytes = inline_bytes if isinstance(inline_bytes, int) \
+                                else 0
+        self.pillow = _get_pillow()
+        self.max_workers = max_workers
+        self.num_written = 0
+        self._executor = None
+        self._images = {}
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def get(self, file_path:str, url:str) -> Union[ImageInfo, None]:
+        """ Return processed image (resizes are scheduled, not awaited),
+        `None` if the file cannot be read.
+
+        :param file_path: Path to the original image.
+        :param url: URL of the original image (relative to `index.html`).
+        :return: ImageInfo
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            image = self._images.get(str(file_path), None)
+            if image is None or image.key != key:
+                try:
+                    image = self._process(file_path=file_path, url=url,
+                                          key=key)
+                except OSError:
+                    return None
+                self._images[str(file_path)] = image
+        return image
+
+    def _process(self, file_path:str, url:str, key:tuple) -> ImageInfo:
+        extension = Path(file_path).suffix.lower()
+        with open(file_path, 'rb') as file:
+            content = file.read()
+
+        # small image is part of the page
+        if 0 < key[1] <= self.inline_bytes and extension in _IMAGE_MIME_TYPES:
+            size = read_image_size(file_path) or (None, None)
+            data_uri = f"data:{_IMAGE_MIME_TYPES[extension]};base64,"\
+                       f"{base64.b64encode(content).decode('ascii')}"
+            return ImageInfo(src=data_uri, width=size[0], height=size[1],
+                             key=key)
+
+        size = None
+        if self.pillow is not None and extension in _IMAGE_RESIZED_FORMATS:
+            Image, ImageOps = self.pillow
+            try:
+                with Image.open(file_path) as image:
+                    # size as displayed (EXIF orientation applied)
+                    size = image.size
+                    if image.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+                        size = (size[1], size[0])
+            except Exception:
+                size = None
+        if size is None:
+            size = read_image_size(file_path)
+        if size is None:
+            return ImageInfo(src=url, key=key)
+        width, height = size
+
+        image = ImageInfo(src=url, width=width, height=height, key=key)
+        if self.pillow is None or extension not in _IMAGE_RESIZED_FORMATS:
+            return image
+        content_hash = hashlib.sha256(content).hexdigest()[0:16]
+        for variant_width in self.widths:
+            if variant_width >= width:
+                break
+            name = f"{content_hash}-{variant_width}{extension}"
+            image.srcset.append((f"{_IMAGE_VARIANT_DIR}/{name}",
+                                 variant_width))
+            variant_path = Path(self.root_path, _IMAGE_VARIANT_DIR, name)
+            job = self._jobs.get(name, None)
+            if job is None and not variant_path.exists():
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers)
+                job = self._executor.submit(self._resize,
+                    file_path=file_path, variant_path=variant_path,
+                    width=variant_width, extension=extension)
+                self._jobs[name] = job
+            if job is not None:
+                image.jobs.append(job)
+        if image.srcset:
+            image.thumbnail = image.srcset[0][0]
+            image.srcset.append((url, width))
+        return image
+
+    def _resize(self, file_path:str, variant_path:Path, width:int,
+                extension:str) -> Path:
+        Image, ImageOps = self.pillow
+        image_format, options = _IMAGE_RESIZED_FORMATS[extension]
+        with Image.open(file_path) as image:
+            image = ImageOps.exif_transpose(image)
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+            if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            variant_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = variant_path.with_suffix(
+                f".{threading.get_ident()}{extension}")
+            image.save(temp_path, format=image_format, **options)
+        os.replace(temp_path, variant_path)
+        with self._lock:
+            self.num_written += 1
+        return variant_path
+
+    def wait(self, images:List[ImageInfo]=None) -> List[str]:
+        """ Wait for resizes of `images` (all if None).
+
+        :param images: Images to wait for, defaults to None (all)
+        :return: List of error messages of failed resizes.
+        """
+        with self._lock:
+            if images is None:
+                jobs = list(self._jobs.values())
+            else:
+                jobs = [job for image in images for job in image.jobs]
+        errors = []
+        for job in jobs:
+            try:
+                job.result()
+            except Exception as e:
+                errors.append(f"cannot resize image: {e}")
+        return errors
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+## ======================== list_image_variants ============================= ##
+def list_image_variants(root_path:str) -> List[Path]:
+    """ Return paths of all resized variants within `<root>/image_variants/`.
+    """
+    variant_dir = Path(root_path, _IMAGE_VARIANT_DIR)
+    if not variant_dir.exists():
+        return []
+    return sorted(path for path in variant_dir.iterdir()
+                  if _IMAGE_VARIANT_REGEX.match(path.name))
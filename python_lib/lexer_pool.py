@@ -0,0 +1,152 @@
+import multiprocessing
+import threading
+import time
+from typing import List, Tuple, Union
+
+
+## ========================================================================== ##
+##                                   CONSTS                                   ##
+## ========================================================================== ##
+# [s] - an idle worker is given this long to exit before it is killed
+_STOP_TIMEOUT = 1.0
+
+
+## ========================================================================== ##
+##                                   WORKER                                   ##
+## ========================================================================== ##
+def _serve_lexer(connection) -> None:
+    # tokenize `(syntax_highlight, text)` requests until `None`, token types
+    # are sent as tuples of names (`_TokenType` singletons do not survive
+    # pickling)
+    from python_lib.utils import get_lexer
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            break # the server exited
+        if request is None:
+            break
+        syntax_highlight, text = request
+        try:
+            tokens = [(tuple(token_type), value) for token_type, value
+                      in get_lexer(syntax_highlight).get_tokens(text)]
+        except Exception:
+            tokens = None # the caller tokenizes (and reports) itself
+        connection.send(tokens)
+    connection.close()
+
+
+class _LexerWorker():
+    __slots__ = ("process", "connection")
+
+    def __init__(self, process, connection):
+        self.process = process
+        self.connection = connection
+
+
+## ========================================================================== ##
+##                                 LexerPool                                  ##
+## ========================================================================== ##
+class LexerPool():
+    """ Worker processes tokenizing section text for threads that cannot
+    interrupt a lexer (`SIGALRM` is delivered to the main thread only), e.g.
+    pages rendered by `serve.py -r` or `render_daemon.py`. A worker
+    exceeding the time limit is killed, thus even a lexer stuck in one regex
+    match (backtracking) does not hold the thread, a new worker is started
+    when needed.
+    """
+
+    def __init__(self, max_workers:int):
+        """
+        :param max_workers: Number of worker processes (concurrent lexers).
+        """
+        self.max_workers = max_workers
+        self.num_killed = 0
+        # threads of the server must not be forked
+        self._context = multiprocessing.get_context('spawn')
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._token_types = {}
+
+    def get_tokens(self, syntax_highlight:str, text:str, timeout:float,
+                ) -> Union[List[Tuple[object, str]], None]:
+        """ Return tokens of `text` (as `lexer.get_tokens`), `None` if the
+        worker failed (the caller tokenizes `text` itself).
+
+        :param syntax_highlight: Syntax highlight alias (e.g. cpp)
+        :param text: Text to tokenize.
+        :param timeout: Time limit [s], starting of a worker is not counted.
+        :raises HighlightTimeout: If `timeout` elapses (also waiting for a
+            free worker).
+        """
+        from python_lib.highlight import HighlightTimeout
+        start_time = time.monotonic()
+        if not self._slots.acquire(timeout=max(timeout, 0)):
+            raise HighlightTimeout(f"no free lexer worker within {timeout} s")
+        try:
+            remaining = timeout - (time.monotonic() - start_time)
+            worker = self._get_worker()
+            try:
+                worker.connection.send((syntax_highlight, text))
+                if not worker.connection.poll(max(remaining, 0)):
+                    raise HighlightTimeout(f"exceeded {timeout} s")
+                tokens = worker.connection.recv()
+            except (OSError, EOFError):
+                self._kill(worker=worker)
+                return None
+            except BaseException:
+                # the worker is still lexing (or its answer is pending)
+                self._kill(worker=worker)
+                raise
+            with self._lock:
+                self._idle.append(worker)
+        finally:
+            self._slots.release()
+        if tokens is None:
+            return None
+        return [(self._get_token_type(names), value)
+                for names, value in tokens]
+
+    def _get_worker(self) -> _LexerWorker:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        connection, worker_connection = self._context.Pipe()
+        process = self._context.Process(target=_serve_lexer,
+                                        args=(worker_connection,),
+                                        daemon=True)
+        process.start()
+        worker_connection.close()
+        return _LexerWorker(process=process, connection=connection)
+
+    def _kill(self, worker:_LexerWorker) -> None:
+        worker.process.kill()
+        worker.process.join()
+        worker.connection.close()
+        with self._lock:
+            self.num_killed += 1
+
+    def _get_token_type(self, names:tuple):
+        token_type = self._token_types.get(names, None)
+        if token_type is None:
+            from pygments.token import Token
+            token_type = Token
+            for name in names:
+                token_type = getattr(token_type, name)
+            self._token_types[names] = token_type
+        return token_type
+
+    def close(self) -> None:
+        with self._lock:
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            try:
+                worker.connection.send(None)
+            except OSError:
+                pass
+            worker.process.join(_STOP_TIMEOUT)
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join()
+            worker.connection.close()
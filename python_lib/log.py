@@ -1,3 +1,8 @@
+import atexit
+import json
+import sys
+
+
 # global variable
 _PREPEND_TO_REPORT = ""
 
@@ -6,27 +11,125 @@ _WARNING = 1  # something is not as expected, but generated HTML will work
 _ERROR = 2    # cannot be skipped, will eventually fail during runtime
 _CRITICAL = 3 # cannot be skipped, always fail to generate HTML
 
+_IMPORTANCE_LABELS = {
+    _NOTE: "message  ",
+    _WARNING: "warning  ",
+    _ERROR: "ERROR    ",
+    _CRITICAL: "CRITICAL ",
+}
+_IMPORTANCE_NAMES = {
+    _NOTE: "note",
+    _WARNING: "warning",
+    _ERROR: "error",
+    _CRITICAL: "critical",
+}
+
+# reports below this importance are dropped before they are formatted
+_MIN_IMPORTANCE = _NOTE
+# context (e.g. current file) attached to every JSON Lines record
+_LOG_CONTEXT = {}
+# optional machine-readable sink (file object), one JSON object per line
+_JSONL_SINK = None
+# console output is buffered and written in large chunks
+_CONSOLE_BUFFER = []
+_CONSOLE_BUFFER_SIZE = 0
+_CONSOLE_BUFFER_LIMIT = 64 * 1024
+
 
+## ========================================================================== ##
+##                                   SETUP                                    ##
+## ========================================================================== ##
 def log_set_prepend(value, max_len:int=None):
     global _PREPEND_TO_REPORT
     if max_len is None:
         max_len = 0
     _PREPEND_TO_REPORT = f"{str(value).ljust(max_len)} "
 
-    
-    
+
+
 def log_reset_prepend():
     global _PREPEND_TO_REPORT
     _PREPEND_TO_REPORT = ""
 
 
-def log_branch_report(log:list, 
-                      importance:int, 
-                      branch:list, 
-                      message:str, 
-                      message_limit:int=240,
-                    ):
+def log_set_min_importance(min_importance:int):
+    """ Decide up front which reports are kept, reports with lower importance
+    are neither formatted nor stored.
+
+    :param min_importance: Minimum importance of kept reports.
+    """
+    global _MIN_IMPORTANCE
+    _MIN_IMPORTANCE = min_importance
+
+
+def log_get_min_importance() -> int:
+    return _MIN_IMPORTANCE
+
+
+def log_enabled(importance:int) -> bool:
+    """ Return True if a report of `importance` would be kept. Use it to skip
+    building expensive messages altogether.
+    """
+    return importance >= _MIN_IMPORTANCE
+
+
+def log_set_context(**context):
+    """ Set context (e.g. `file='<path>'`) attached to JSON Lines records.
+    """
+    global _LOG_CONTEXT
+    _LOG_CONTEXT = dict(context)
+
+
+def log_reset_context():
+    global _LOG_CONTEXT
+    _LOG_CONTEXT = {}
+
+
+def log_set_jsonl_sink(file_path:str):
+    """ Write every printed report also as a JSON object into `file_path`
+    (JSON Lines format), the file is overwritten.
+
+    :param file_path: Path to JSON Lines file, `None` closes the sink.
+    """
+    global _JSONL_SINK
+    if _JSONL_SINK is not None:
+        _JSONL_SINK.close()
+        _JSONL_SINK = None
+    if file_path is not None:
+        _JSONL_SINK = open(file_path, 'w', buffering=1024*1024)
+
+
+## ========================================================================== ##
+##                                   OUTPUT                                   ##
+## ========================================================================== ##
+def _console_write(text:str, flush:bool=False):
+    global _CONSOLE_BUFFER_SIZE
+    _CONSOLE_BUFFER.append(text)
+    _CONSOLE_BUFFER_SIZE += len(text)
+    if flush or _CONSOLE_BUFFER_SIZE > _CONSOLE_BUFFER_LIMIT:
+        log_flush()
+
+
+def log_flush():
+    """ Write buffered console output (and the JSON Lines sink) out.
+    """
+    global _CONSOLE_BUFFER_SIZE
+    if _CONSOLE_BUFFER:
+        sys.stdout.write(''.join(_CONSOLE_BUFFER))
+        _CONSOLE_BUFFER.clear()
+        _CONSOLE_BUFFER_SIZE = 0
+    sys.stdout.flush()
+    if _JSONL_SINK is not None:
+        _JSONL_SINK.flush()
+
 
+atexit.register(log_flush)
+
+
+## ========================================================================== ##
+##                                  REPORTS                                   ##
+## ========================================================================== ##
+def _branch_to_str(branch:list) -> str:
     # get branch in dot-format with list indexing
     branch_str = ""
     for insternode in branch:
@@ -37,59 +140,116 @@ def log_branch_report(log:list,
                 branch_str = branch_str + f"{insternode}"
             else:
                 branch_str = branch_str + f".{insternode}"
+    return branch_str
 
-    _message = branch_str + f" : {message}"
-    if len(_message) > message_limit and message_limit > 5:
-        _message = _message[0:(message_limit-4)] + ' ...'
-    log.append({"importance":importance, "message":_message})
-
-    return log
 
+def format_report_message(report:dict) -> str:
+    """ Return the final (formatted and shortened) message of a report.
+    Formatting is deferred until the report is printed.
 
-def log_report(log:list, importance:int, message:str, message_limit:int=240):
-    
+    :param report: Report created by `log_report` or `log_branch_report`.
+    :return: Message intended for the user to see.
+    """
+    message = report['message']
+    if report.get('args'):
+        message = message.format(*report['args'])
+    if report.get('branch') is not None:
+        message = _branch_to_str(report['branch']) + f" : {message}"
+    message_limit = report.get('message_limit', 240)
     if len(message) > message_limit and message_limit > 5:
         message = message[0:(message_limit-4)] + ' ...'
-    log.append({"importance":importance, "message":message})
-    
+    return message
+
+
+def log_branch_report(log:list,
+                      importance:int,
+                      branch:list,
+                      message:str,
+                      message_limit:int=240,
+                      message_args:tuple=None,
+                    ):
+    """ Append report related to `branch` of data structure, reports below
+    the minimum importance (see `log_set_min_importance`) are dropped.
+
+    :param message: Message, if `message_args` are given, the message is
+        a `str.format` template filled in only when the report is printed.
+    """
+    if importance < _MIN_IMPORTANCE:
+        return log
+    log.append({"importance":importance, "message":message,
+                "args":message_args, "branch":list(branch),
+                "message_limit":message_limit})
+
+    return log
+
+
+def log_report(log:list,
+               importance:int,
+               message:str,
+               message_limit:int=240,
+               message_args:tuple=None,
+            ):
+    """ Append report, reports below the minimum importance
+    (see `log_set_min_importance`) are dropped.
+
+    :param message: Message, if `message_args` are given, the message is
+        a `str.format` template filled in only when the report is printed.
+    """
+    if importance < _MIN_IMPORTANCE:
+        return log
+    log.append({"importance":importance, "message":message,
+                "args":message_args, "message_limit":message_limit})
+
     return log
 
 
+def format_report_record(report:dict) -> dict:
+    """ Return report as JSON-serializable record (`importance` name, 
+    numeric `level` and formatted `message`).
+    """
+    importance = report['importance']
+    return {'importance': _IMPORTANCE_NAMES.get(importance, str(importance)),
+            'level': importance,
+            'message': format_report_message(report)}
+
+
 def print_report(importance:int, message:str, message_limit:int=240):
     log = []
-    log = log_report(
-            log=log, 
-            importance=importance, 
-            message=message, message_limit=message_limit)
+    log.append({"importance":importance, "message":message,
+                "message_limit":message_limit})
     print_log(log, min_importance=_NOTE)
 
 
 def print_log(log, min_importance:int):
     global _PREPEND_TO_REPORT
+    lines = []
+    flush = False
     for report in log:
-        if report['importance'] >= min_importance:
-            if report['importance'] == _NOTE:
-                report_str = \
-                    f"{_PREPEND_TO_REPORT}message  : {report['message']}"
-            elif report['importance'] == _WARNING:
-                report_str = \
-                    f"{_PREPEND_TO_REPORT}warning  : {report['message']}"
-            elif report['importance'] == _ERROR:
-                report_str = \
-                    f"{_PREPEND_TO_REPORT}ERROR    : {report['message']}"
-            elif report['importance'] == _CRITICAL:
-                report_str = \
-                    f"{_PREPEND_TO_REPORT}CRITICAL : {report['message']}"
-            else:
-                report_str = \
-                    f"{_PREPEND_TO_REPORT}---------: {report['message']}"
-            print(report_str)
-            
-            
+        importance = report['importance']
+        if importance >= min_importance:
+            message = format_report_message(report)
+            label = _IMPORTANCE_LABELS.get(importance, "---------")
+            lines.append(f"{_PREPEND_TO_REPORT}{label}: {message}\n")
+            if _JSONL_SINK is not None:
+                record = dict(_LOG_CONTEXT)
+                record.update(format_report_record(report))
+                _JSONL_SINK.write(json.dumps(record) + "\n")
+            # critical reports are usually followed by exit
+            flush = flush or importance >= _CRITICAL
+    if lines:
+        _console_write(''.join(lines), flush=flush)
+
+
 # auxiliary functions
+def print_text(text:str):
+    """ Print plain line of text through the buffered console output.
+    """
+    _console_write(f"{text}\n")
+
+
 def print_headline(headline:str, fill:str='-', width:int=80):
     """ Print nicely formatted header.
-    
+
         #================== ... ==================#
         =                <headline>               =
         #================== ... ==================#
@@ -111,11 +271,12 @@ def print_headline(headline:str, fill:str='-', width:int=80):
     else:
         spaces_left = int((spaces_to_center-1)/2) * " "
         spaces_right = int((spaces_to_center+1)/2) * " "
-    print(f"{_PREPEND_TO_REPORT}#{filler}#")
-    print(f"{_PREPEND_TO_REPORT}{fill}{spaces_left}{headline}{spaces_right}{fill}")
-    print(f"{_PREPEND_TO_REPORT}#{filler}#")
-    
-    
+    _console_write(
+        f"{_PREPEND_TO_REPORT}#{filler}#\n"\
+        f"{_PREPEND_TO_REPORT}{fill}{spaces_left}{headline}{spaces_right}{fill}\n"\
+        f"{_PREPEND_TO_REPORT}#{filler}#\n")
+
+
 def print_notice(notice:str, fill:str='#', width:int=80):
     if len(fill) != 1:
         raise ValueError(
@@ -129,4 +290,5 @@ def print_notice(notice:str, fill:str='#', width:int=80):
     else:
         spaces_left = int((spaces_to_center-1)/2) * fill
         spaces_right = int((spaces_to_center+1)/2) * fill
-    print(f"{_PREPEND_TO_REPORT}{fill}{spaces_left} {notice} {spaces_right}{fill}")
\ No newline at end of file
+    _console_write(
+        f"{_PREPEND_TO_REPORT}{fill}{spaces_left} {notice} {spaces_right}{fill}\n")
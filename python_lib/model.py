@@ -0,0 +1,208 @@
+import sys
+from typing import Any, List, Union
+
+
+## ========================================================================== ##
+##                                   CONSTS                                   ##
+## ========================================================================== ##
+class _Missing():
+    """ Marks a member absent from the .yaml file (unlike a member present
+    with empty value, which is `None`).
+    """
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "MISSING"
+
+    def __bool__(self) -> bool:
+        return False
+
+MISSING = _Missing()
+
+
+def _intern(value:Any) -> Any:
+    # values repeated across links/sections/pages share one string object
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _get_member(data:Any, key:str, default:Any=None) -> Any:
+    return data.get(key, default) if isinstance(data, dict) else default
+
+
+## ========================================================================== ##
+##                                   MODEL                                    ##
+## ========================================================================== ##
+# Page data (loaded .yaml file) built once per file. Members keep the raw
+# values of the .yaml file (no conversion), validation (see `StructToHtml`
+# and `DataStructureChecker`) decides what is valid. Members not listed in
+# `config.dataStructure` are not kept.
+
+## ================================= Header ================================= ##
+class Header():
+    """ `header` of page or section.
+    """
+    __slots__ = ("title", "title_prefix", "permalink")
+
+    def __init__(self, title:Any=None, title_prefix:Any=None,
+                 permalink:Any=None):
+        self.title = title
+        self.title_prefix = title_prefix
+        self.permalink = permalink
+
+    @classmethod
+    def from_dict(cls, data:Union[dict, None]) -> Union['Header', None]:
+        if data is None:
+            return None
+        return cls(
+            title=_get_member(data, 'title'),
+            title_prefix=_get_member(data, 'titlePrefix'),
+            permalink=_get_member(data, 'permalink'),
+        )
+
+
+## ================================== Link ================================== ##
+class Link():
+    """ Member of `sections[].links`, compulsory members are `MISSING` if
+    absent.
+    """
+    __slots__ = ("match_string", "link_file", "match_index", "section_tag",
+                 "css_class")
+
+    def __init__(self, match_string:Any=MISSING, link_file:Any=MISSING,
+                 match_index:Any=MISSING, section_tag:Any=None,
+                 css_class:Any=None):
+        self.match_string = match_string
+        self.link_file = _intern(link_file)
+        self.match_index = match_index
+        self.section_tag = _intern(section_tag)
+        self.css_class = _intern(css_class)
+
+    @classmethod
+    def from_dict(cls, data:dict) -> 'Link':
+        return cls(
+            match_string=_get_member(data, 'matchString', MISSING),
+            link_file=_get_member(data, 'linkFile', MISSING),
+            match_index=_get_member(data, 'matchIndex', MISSING),
+            section_tag=_get_member(data, 'sectionTag'),
+            css_class=_get_member(data, 'cssClass'),
+        )
+
+
+## ================================== Image ================================= ##
+class Image():
+    """ `sections[].image`, optional members keep their (HTML) defaults.
+    """
+    __slots__ = ("path", "alt_text", "max_width", "max_height")
+
+    def __init__(self, path:Any=None, alt_text:Any="", max_width:Any=None,
+                 max_height:Any=None):
+        self.path = path
+        self.alt_text = alt_text
+        self.max_width = max_width
+        self.max_height = max_height
+
+    @classmethod
+    def from_dict(cls, data:Union[dict, None], default_max_width:str,
+                  default_max_height:str) -> Union['Image', None]:
+        if data is None:
+            return None
+        return cls(
+            path=_get_member(data, 'path'),
+            alt_text=_get_member(data, 'altText', ""),
+            max_width=_get_member(data, 'maxWidth', default_max_width),
+            max_height=_get_member(data, 'maxHeight', default_max_height),
+        )
+
+
+## ================================= Content ================================ ##
+class Content():
+    """ `sections[].content`.
+    """
+    __slots__ = ("syntax_highlight", "text", "source_file", "lines",
+                 "line_number_start")
+
+    def __init__(self, syntax_highlight:Any=None, text:Any=None,
+                 source_file:Any=None, lines:Any=None,
+                 line_number_start:Any=None):
+        self.syntax_highlight = _intern(syntax_highlight)
+        self.text = text
+        self.source_file = _intern(source_file)
+        self.lines = lines
+        self.line_number_start = line_number_start
+
+    @classmethod
+    def from_dict(cls, data:Union[dict, None]) -> Union['Content', None]:
+        if data is None:
+            return None
+        return cls(
+            syntax_highlight=_get_member(data, 'syntaxHighlight'),
+            text=_get_member(data, 'text'),
+            source_file=_get_member(data, 'sourceFile'),
+            lines=_get_member(data, 'lines'),
+            line_number_start=_get_member(data, 'lineNumberStart'),
+        )
+
+
+## ================================= Section ================================ ##
+class Section():
+    """ Member of `sections`, a section without `header` gets an empty one.
+    """
+    __slots__ = ("section_tag", "header", "content", "links", "image")
+
+    def __init__(self, section_tag:Any=None, header:Header=None,
+                 content:Content=None, links:List[Link]=None,
+                 image:Image=None):
+        self.section_tag = _intern(section_tag)
+        self.header = header if header is not None else Header()
+        self.content = content
+        self.links = links if links is not None else []
+        self.image = image
+
+    @classmethod
+    def from_dict(cls, data:dict, default_max_width:str,
+                  default_max_height:str) -> 'Section':
+        links = _get_member(data, 'links')
+        return cls(
+            section_tag=_get_member(data, 'sectionTag'),
+            header=Header.from_dict(_get_member(data, 'header')),
+            content=Content.from_dict(_get_member(data, 'content')),
+            # `links:` without any content is None
+            links=[Link.from_dict(link) for link in links]
+                  if isinstance(links, list) else [],
+            image=Image.from_dict(
+                _get_member(data, 'image'),
+                default_max_width=default_max_width,
+                default_max_height=default_max_height),
+        )
+
+
+## ================================== Page ================================== ##
+class Page():
+    """ Page data, `header` is `None` if missing.
+    """
+    __slots__ = ("header", "sections")
+
+    def __init__(self, header:Header=None, sections:List[Section]=None):
+        self.header = header
+        self.sections = sections if sections is not None else []
+
+    @classmethod
+    def from_dict(cls, data:Union[dict, None],
+                  default_max_width:str=None,
+                  default_max_height:str=None) -> 'Page':
+        """ Build page from loaded .yaml file.
+
+        :param data: Loaded .yaml file.
+        :param default_max_width: Default of `image.maxWidth`.
+        :param default_max_height: Default of `image.maxHeight`.
+        :return: Page.
+        """
+        sections = _get_member(data, 'sections')
+        return cls(
+            header=Header.from_dict(_get_member(data, 'header')),
+            sections=[Section.from_dict(section,
+                        default_max_width=default_max_width,
+                        default_max_height=default_max_height)
+                      for section in sections]
+                     if isinstance(sections, list) else [],
+        )
@@ -0,0 +1,775 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+import re
+import threading
+import time
+from typing import List, Tuple, Union
+
+
+from python_lib.budget import Budget
+from python_lib.check_structure import DataStructureChecker
+from python_lib.to_html import StructToHtml
+from python_lib.log import print_log, log_set_prepend, log_reset_prepend, \
+    log_flush, log_set_min_importance, _WARNING, _ERROR, _CRITICAL
+from python_lib.source_files import SourceFileCache
+from python_lib.utils import load_yaml_file, load_config_file, \
+    get_files_of_type
+
+
+## ========================================================================== ##
+##                                   CONSTS                                   ##
+## ========================================================================== ##
+_RENDER_CACHE_DIR = ".cache/render"
+# `<key>.html`, `<key>.json` and temporary `<key>.<thread id>` of a page
+_RENDER_CACHE_REGEX = re.compile(r'^[0-9a-f]{32}\.(html|json|\d+)$')
+# [s] - the disk cache is pruned at most once per interval
+_RENDER_CACHE_PRUNE_INTERVAL = 60.0
+# renders of one page are serialized by one of these locks (fixed memory)
+_PAGE_LOCK_STRIPES = 64
+# `<page>.preview.html` is the preview of `<page>.html` (hover, right panel)
+_PREVIEW_SUFFIX = ".preview"
+# [s] - pages are listed (auto-link dictionary) at most once per interval
+_AUTOLINK_CHECK_INTERVAL = 2.0
+
+_PRINT_LOCK = threading.Lock()
+
+
+def _get_code_digest() -> str:
+    # rendered pages also depend on the code that renders them
+    stats = [(path.name, path.stat().st_mtime_ns, path.stat().st_size)
+             for path in sorted(Path(__file__).parent.glob("*.py"))]
+    return hashlib.sha256(str(stats).encode()).hexdigest()[0:16]
+
+_CODE_DIGEST = _get_code_digest()
+
+
+## ========================================================================== ##
+##                                  RENDER                                    ##
+## ========================================================================== ##
+
+## ============================== get_html_path ============================= ##
+def get_html_path(file_path:str, config) -> Path:
+    """ Return path of the HTML file generated from `file_path` (.yaml).
+    """
+    return Path(file_path)\
+        .with_suffix('')\
+        .with_suffix(config.generate.targetFileExtension)
+
+
+## ============================ get_preview_path ============================ ##
+def get_preview_path(html_path:Path) -> Path:
+    """ Return path of the preview of `html_path` (`<page>.preview.html`).
+    """
+    html_path = Path(html_path)
+    return html_path.with_suffix(_PREVIEW_SUFFIX + html_path.suffix)
+
+
+## ============================= is_preview_path ============================ ##
+def is_preview_path(file_path) -> bool:
+    """ Return True if `file_path` (source or page) is named like a preview
+    (`<page>.preview.*`), such names are reserved: the page of 
+    `x.preview.yaml` would overwrite the preview of `x.yaml`.
+    """
+    return Path(file_path).with_suffix('').name.endswith(_PREVIEW_SUFFIX)
+
+
+## =============================== render_page ============================== ##
+def render_page(data:dict,
+                config,
+                root_path:str,
+                source_file_cache:SourceFileCache=None,
+                auto_linker=None,
+                page_file:str=None,
+                image_store=None,
+                fragment_store=None,
+                section_pool=None,
+                lexer_pool=None,
+            ) -> Tuple[DataStructureChecker, StructToHtml]:
+    """ Check `data` against `config.dataStructure` and generate HTML page.
+
+    :param data: Page data (loaded .yaml file).
+    :param config: Parsed config (see `load_config_file`).
+    :param root_path: Project root (where `config.display.pathData` is).
+    :param source_file_cache: Cache of mapped `content.sourceFile` files 
+        shared across pages of one run, defaults to None (own cache)
+    :param auto_linker: Auto-link dictionary shared across pages of one run
+        (see `python_lib.autolink`), defaults to None (no auto-linking)
+    :param page_file: Page as `linkFile` (not auto-linked from itself), 
+        defaults to None
+    :param image_store: Resized variants of images shared across pages of 
+        one run (see `python_lib.images`), defaults to None (original images)
+    :param fragment_store: Section content shared across pages of one run
+        (see `python_lib.fragments`), defaults to None (content in the page)
+    :param section_pool: Worker processes rendering large sections (see 
+        `python_lib.section_pool`), defaults to None (rendered in-process)
+    :param lexer_pool: Worker processes running lexers limited by 
+        `generate.highlightTimeout` (see `python_lib.lexer_pool`), defaults 
+        to None (lexers run in-process)
+    :return: Tuple of checker and generator, the HTML page is
+        `struct_to_html.html_page` (if `struct_to_html.valid`).
+    """
+    # detect deviations of the data structure from reference structure
+    file_checker = DataStructureChecker(
+            data=data,
+            reference=config.dataStructure,
+        )
+    file_checker.is_valid()
+
+    # get struct_to_html generator
+    struct_to_html = StructToHtml(
+            data=data,
+            config=config,
+            root_path=root_path,
+            suffix=config.generate.targetFileExtension,
+            source_file_cache=source_file_cache,
+            auto_linker=auto_linker,
+            page_file=page_file,
+            image_store=image_store,
+            fragment_store=fragment_store,
+            section_pool=section_pool,
+            lexer_pool=lexer_pool,
+        )
+    struct_to_html.generate_html_page()
+    return file_checker, struct_to_html
+
+
+## =============================== check_file =============================== ##
+def check_file(file_path:str,
+               config,
+               root_path:str,
+               min_importance:int,
+            ) -> Tuple[str, bool, list]:
+    """ Validate .yaml file without generating HTML (see `--check-only`), 
+    suitable for worker processes.
+
+    :param file_path: Path to .yaml file.
+    :param config: Parsed config (see `load_config_file`).
+    :param root_path: Project root (where `config.display.pathData` is).
+    :param min_importance: Minimum importance of kept reports.
+    :return: Tuple of file path, validity and list of reports.
+    """
+    log_set_min_importance(min_importance=min_importance)
+    try:
+        data = load_yaml_file(file_path, report=False)
+    except RuntimeError as e:
+        return file_path, False, [{"importance": _CRITICAL, "message": str(e)}]
+
+    valid, log = check_data(data=data, config=config, root_path=root_path)
+    return file_path, valid, log
+
+
+## =============================== check_data =============================== ##
+def check_data(data:dict,
+               config,
+               root_path:str,
+            ) -> Tuple[bool, list]:
+    """ Validate page data without generating HTML (see `check_file`).
+
+    :param data: Page data (loaded .yaml file or record of a bulk file).
+    :param config: Parsed config (see `load_config_file`).
+    :param root_path: Project root (where `config.display.pathData` is).
+    :return: Tuple of validity and list of reports.
+    """
+    file_checker = DataStructureChecker(
+            data=data,
+            reference=config.dataStructure,
+        )
+    valid = file_checker.is_valid()
+    if data is None:
+        return False, file_checker.log
+
+    struct_to_html = StructToHtml(
+            data=data,
+            config=config,
+            root_path=root_path,
+            suffix=config.generate.targetFileExtension,
+        )
+    valid = struct_to_html.check_page() and valid
+    return valid, file_checker.log + struct_to_html.log
+
+
+## ========================================================================== ##
+##                               RenderedPage                                 ##
+## ========================================================================== ##
+class RenderedPage():
+    """ Result of on-demand rendering, `html` is `None` if the page is not
+    valid (see `log`).
+    """
+    __slots__ = ("html", "etag", "mtime", "log")
+
+    def __init__(self, html:Union[bytes, None], etag:str, mtime:float,
+                 log:list):
+        self.html = html
+        self.etag = etag
+        self.mtime = mtime
+        self.log = log
+
+
+## ========================== list_render_cache ============================= ##
+def list_render_cache(root_path:str, cache_dir:str=None) -> List[Path]:
+    """ Return paths of all files of pages cached on disk by
+    `OnDemandRenderer` (`<root>/.cache/render/`).
+    """
+    cache_dir = Path(cache_dir) if cache_dir is not None \
+                    else Path(root_path, _RENDER_CACHE_DIR)
+    if not cache_dir.exists():
+        return []
+    return sorted(path for path in cache_dir.iterdir()
+                  if _RENDER_CACHE_REGEX.match(path.name))
+
+
+## ========================== prune_render_cache ============================ ##
+def prune_render_cache(root_path:str, cache_dir:str=None, max_bytes:int=0,
+                       max_age:float=0) -> int:
+    """ Delete pages cached on disk that were not used for `max_age`, then
+    the least recently used ones until the cache fits into `max_bytes`
+    (reading a cached page marks it as used, see `OnDemandRenderer`).
+
+    :param root_path: Project root (where `index.html` is).
+    :param cache_dir: Cache directory, defaults to None (`.cache/render/`)
+    :param max_bytes: Size limit of the cache [B], 0 disables the limit.
+    :param max_age: Age limit of unused pages [s], 0 disables the limit.
+    :return: Number of deleted pages.
+    """
+    entries = {} # key -> [last use, bytes, paths]
+    for path in list_render_cache(root_path=root_path, cache_dir=cache_dir):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entry = entries.setdefault(path.stem, [0, 0, []])
+        entry[0] = max(entry[0], stat.st_mtime)
+        entry[1] += stat.st_size
+        entry[2].append(path)
+    num_bytes = sum(entry[1] for entry in entries.values())
+    now = time.time()
+    num_deleted = 0
+    for last_use, entry_bytes, paths in sorted(entries.values(),
+                                               key=lambda entry: entry[0]):
+        expired = max_age > 0 and now - last_use > max_age
+        if not expired and not (max_bytes > 0 and num_bytes > max_bytes):
+            break
+        for path in paths:
+            try:
+                path.unlink()
+            except OSError:
+                pass # deleted meanwhile
+        num_bytes -= entry_bytes
+        num_deleted += 1
+    return num_deleted
+
+
+## ========================================================================== ##
+##                             OnDemandRenderer                               ##
+## ========================================================================== ##
+class OnDemandRenderer():
+    """ Renders `<page>.html` from the matching `<page>.yaml` (within
+    `config.display.pathData`) when it is first requested. Valid pages are
+    cached in memory (bounded LRU) and on disk (`<root>/.cache/render/`),
+    both keyed by the source mtime/size and the config content, thus editing
+    the source or the config invalidates the cached page, the disk cache is
+    limited by `config.generate.renderCacheBytes` and
+    `config.generate.renderCacheDays`. Files read through
+    `content.sourceFile` are recorded and checked as well. With
+    `config.generate.autoLink`, the key includes the auto-link dictionary
+    (rebuilt when any page changes). Token classes of rendered pages missing
+    from stylesheets pruned by `generate_css.py --prune` are reported. With
+    `config.generate.highlightTimeout`, lexers run in worker processes (see
+    `python_lib.lexer_pool`), pages are rendered by threads that cannot
+    interrupt a lexer otherwise.
+    """
+
+    def __init__(self, root_path:str, config_path:str,
+                 cache_dir:str=None, cache_bytes:int=64*1024*1024):
+        self.root_path = str(Path(root_path).resolve())
+        self.config_path = str(config_path)
+        self.cache_dir = Path(cache_dir) if cache_dir is not None \
+                            else Path(self.root_path, _RENDER_CACHE_DIR)
+        self._config = None
+        self._config_key = None
+        self._config_digest = None
+        # reason the config cannot be loaded (last good config is kept)
+        self._config_error = None
+        from python_lib.server import FileCache
+        self._memory_cache = FileCache(max_bytes=cache_bytes,
+                                       max_entry_bytes=cache_bytes)
+        self._lock = threading.Lock()
+        self._page_locks = [threading.Lock()
+                            for _ in range(_PAGE_LOCK_STRIPES)]
+        # files read by rendered pages, {source: (cache_key, dependencies)}
+        self._dependencies = {}
+        self._source_file_cache = SourceFileCache()
+        self._auto_linker = None
+        self._auto_linker_key = None
+        self._auto_linker_time = None
+        self._image_store = None
+        self._fragment_store = None
+        self._lexer_pool = None
+        self._cache_pruned_time = None
+        from python_lib.token_css import PrunedStylesheets
+        self._pruned_stylesheets = PrunedStylesheets(root_path=self.root_path)
+        self._load_config()
+
+    @property
+    def config(self):
+        return self._config
+
+    def _load_config(self) -> None:
+        """ Load the config if it changed. A config that cannot be loaded 
+        (e.g. saved halfway) is reported once, the last good config is kept 
+        and pages fail (`_config_error`) until it is fixed.
+
+        :raises RuntimeError: If the first config cannot be loaded.
+        """
+        try:
+            stat = os.stat(self.config_path)
+            config_key = (stat.st_mtime_ns, stat.st_size)
+            if config_key == self._config_key:
+                return
+            with open(self.config_path, 'rb') as file:
+                config_digest = hashlib.sha256(file.read()).hexdigest()
+            config = load_config_file(self.config_path)
+        except (OSError, RuntimeError) as e:
+            if self._config is None:
+                raise RuntimeError(str(e))
+            config_key = None
+            try:
+                stat = os.stat(self.config_path)
+                config_key = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                pass
+            if self._config_error is None or config_key != self._config_key:
+                with _PRINT_LOCK:
+                    print_log(log=[{"importance": _CRITICAL, "message": 
+                                    f"{e} (pages are not rendered until "\
+                                    f"it is fixed)"}], 
+                              min_importance=_ERROR)
+                    log_flush()
+            self._config_key = config_key
+            self._config_error = str(e)
+            return
+        self._config = config
+        self._config_digest = config_digest
+        self._config_key = config_key
+        self._config_error = None
+        from python_lib.images import ImageStore
+        if self._image_store is not None:
+            self._image_store.close()
+        self._image_store = ImageStore(
+            root_path=self.root_path,
+            widths=getattr(self._config.generate, 'imageWidths', None),
+            inline_bytes=getattr(self._config.generate, 'imageInlineBytes', 0),
+        )
+        self._fragment_store = None
+        fragment_min_bytes = getattr(self._config.generate, 
+                                     'fragmentMinBytes', 0)
+        if isinstance(fragment_min_bytes, int) and fragment_min_bytes > 0:
+            from python_lib.fragments import FragmentStore
+            self._fragment_store = FragmentStore(root_path=self.root_path,
+                                                 min_bytes=fragment_min_bytes)
+        highlight_timeout = getattr(self._config.generate, 
+                                    'highlightTimeout', 0)
+        if isinstance(highlight_timeout, (int, float)) \
+           and highlight_timeout > 0:
+            if self._lexer_pool is None:
+                from python_lib.lexer_pool import LexerPool
+                self._lexer_pool = LexerPool(max_workers=os.cpu_count() or 1)
+        elif self._lexer_pool is not None:
+            self._lexer_pool.close()
+            self._lexer_pool = None
+
+    def _get_auto_linker(self, config):
+        """ Return auto-link dictionary of all pages (`None` if disabled),
+        rebuilt when the list of pages or any page changes.
+        """
+        if not getattr(config.generate, 'autoLink', False):
+            return None
+        now = time.monotonic()
+        if self._auto_linker_time is not None and \
+           now - self._auto_linker_time < _AUTOLINK_CHECK_INTERVAL:
+            return self._auto_linker
+        from python_lib.autolink import build_autolink_dictionary, \
+            get_cache_path
+        from python_lib.bulk import is_bulk_file, get_bulk_files
+        data_path = Path(self.root_path, config.display.pathData)
+        file_paths = sorted((file_path for file_path in get_files_of_type(
+            folder_path=data_path, 
+            file_extension=config.generate.sourceFileExtension, 
+            recursive=True)
+            if not is_bulk_file(file_path=file_path, config=config)), key=str)
+        # titles of records of bulk files link their generated pages
+        bulk_paths = get_bulk_files(folder_path=data_path, config=config,
+                                    recursive=True)
+        auto_linker_key = []
+        for is_bulk, paths in [(False, file_paths), (True, bulk_paths)]:
+            for file_path in paths:
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                auto_linker_key.append((str(file_path), stat.st_mtime_ns,
+                                        stat.st_size, is_bulk))
+        auto_linker_key = tuple(auto_linker_key)
+        if auto_linker_key != self._auto_linker_key:
+            self._auto_linker, log = build_autolink_dictionary(
+                file_paths=[path for path, _, _, is_bulk in auto_linker_key
+                            if not is_bulk],
+                bulk_paths=[path for path, _, _, is_bulk in auto_linker_key
+                            if is_bulk],
+                target_extension=config.generate.targetFileExtension,
+                data_path=data_path,
+                cache_path=get_cache_path(root_path=self.root_path),
+            )
+            with _PRINT_LOCK:
+                print_log(log=log, min_importance=_ERROR)
+                log_flush()
+            self._auto_linker_key = auto_linker_key
+        self._auto_linker_time = now
+        return self._auto_linker
+
+    def find_source(self, html_path:str) -> Union[Path, None]:
+        """ Return the .yaml file matching requested `html_path`, `None`
+        if the request is not a page within `config.display.pathData`.
+        """
+        config = self._config
+        html_path = Path(html_path).resolve()
+        if html_path.suffix != config.generate.targetFileExtension:
+            return None
+        data_path = Path(self.root_path, config.display.pathData).resolve()
+        if data_path not in html_path.parents:
+            return None
+        extensions = config.generate.sourceFileExtension
+        if not isinstance(extensions, list):
+            extensions = [extensions]
+        from python_lib.bulk import is_bulk_file
+        if is_preview_path(file_path=html_path):
+            return None # a preview is never a page (see `is_preview_path`)
+        for extension in extensions:
+            source_path = html_path.with_suffix(extension)
+            # pages of bulk files are generated by `generate_html.py` only
+            if source_path.is_file() and \
+               not is_bulk_file(file_path=source_path, config=config):
+                return source_path
+        return None
+
+    def render(self, html_path:str) -> Union[RenderedPage, None]:
+        """ Return rendered page for requested `html_path`, `None` if there
+        is no matching source. Pages are re-rendered when the source, files
+        it reads (`content.sourceFile`) or the config change. Previews
+        (`<page>.preview.html`) are rendered from the source of the page.
+        """
+        with self._lock:
+            self._load_config()
+            config, config_digest = self._config, self._config_digest
+            config_error = self._config_error
+            image_store = self._image_store
+            fragment_store = self._fragment_store
+            lexer_pool = self._lexer_pool
+            auto_linker = None
+            if config_error is None:
+                auto_linker = self._get_auto_linker(config=config)
+        preview = Path(html_path).name.endswith(
+            _PREVIEW_SUFFIX + config.generate.targetFileExtension)
+        if preview:
+            if not getattr(config.generate, 'previewLines', 0):
+                return None
+            html_path = Path(html_path).with_suffix('')\
+                .with_suffix(config.generate.targetFileExtension)
+        source_path = self.find_source(html_path=html_path)
+        if source_path is None:
+            return None
+        if config_error is not None:
+            # pages (found by the last good config) fail, other files not
+            return RenderedPage(html=None, etag='', mtime=0, log=[
+                {"importance": _CRITICAL, "message": config_error}])
+        # page and its preview are cached separately
+        entry = f"{source_path}{_PREVIEW_SUFFIX}" if preview \
+                    else str(source_path)
+        stat = os.stat(source_path)
+        source_key = (stat.st_mtime_ns, stat.st_size, config_digest,
+                      _CODE_DIGEST)
+        if auto_linker is not None:
+            source_key += (auto_linker.digest,)
+        cache_key = hashlib.sha256(
+            f"{entry}\0{source_key}".encode()).hexdigest()[0:32]
+
+        # memory cache
+        html, dependency_key = self._read_memory_cache(
+            entry=entry, cache_key=cache_key)
+
+        # one render per page at a time
+        log = []
+        if html is None:
+            page_lock = self._page_locks[
+                hash(entry) % _PAGE_LOCK_STRIPES]
+            with page_lock:
+                html, dependency_key = self._read_memory_cache(
+                    entry=entry, cache_key=cache_key)
+                dependencies = None
+                if html is None:
+                    html, dependencies = self._read_disk_cache(
+                        cache_key=cache_key)
+                if html is None:
+                    html, dependencies, log = self._render_source(
+                        source_path=source_path, config=config,
+                        auto_linker=auto_linker, image_store=image_store,
+                        fragment_store=fragment_store, lexer_pool=lexer_pool,
+                        preview=preview)
+                    if html is not None:
+                        self._write_disk_cache(cache_key=cache_key, html=html,
+                                               dependencies=dependencies)
+                        self._prune_disk_cache(config=config)
+                if dependencies is not None:
+                    dependency_key = self._get_dependency_key(
+                        dependencies=dependencies)
+                    self._dependencies[entry] = (cache_key, dependencies)
+                    self._memory_cache.put(path=entry,
+                        key=(cache_key, dependency_key), data=html)
+
+        etag = '"' + hashlib.sha256(
+            f"{cache_key}\0{dependency_key}".encode()).hexdigest()[0:16] + '"'
+        return RenderedPage(html=html, etag=etag, mtime=stat.st_mtime,
+                            log=log)
+
+    def _get_dependency_key(self, dependencies:dict) -> Union[tuple, None]:
+        """ Return key of files read by a page, `None` if any of them changed
+        since `dependencies` (`{path: [st_mtime_ns, st_size]}`) were recorded.
+        """
+        dependency_key = []
+        for path, key in sorted(dependencies.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None
+            if [stat.st_mtime_ns, stat.st_size] != list(key):
+                return None
+            dependency_key.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(dependency_key)
+
+    def _check_token_classes(self, html:str, once:bool=True) -> list:
+        """ Return report of token classes of `html` that have no rule in
+        pruned stylesheets (with `once`, each class is reported once).
+        """
+        if not self._pruned_stylesheets.is_pruned():
+            return []
+        from python_lib.token_css import find_token_classes
+        message = self._pruned_stylesheets.get_report(
+            classes=find_token_classes(content=html.encode('utf-8')),
+            once=once)
+        if message is None:
+            return []
+        return [{"importance": _WARNING, "message": message}]
+
+    def _read_memory_cache(self, entry:str, cache_key:str,
+                        ) -> Tuple[Union[bytes, None], Union[tuple, None]]:
+        record = self._dependencies.get(entry, None)
+        if record is None or record[0] != cache_key:
+            return None, None
+        dependency_key = self._get_dependency_key(dependencies=record[1])
+        if dependency_key is None:
+            return None, None
+        html = self._memory_cache.get(path=entry,
+                                      key=(cache_key, dependency_key))
+        return html, dependency_key
+
+    def _read_disk_cache(self, cache_key:str,
+                        ) -> Tuple[Union[bytes, None], Union[dict, None]]:
+        cache_path = Path(self.cache_dir, f"{cache_key}.html")
+        try:
+            with open(cache_path.with_suffix(".json"), 'r') as file:
+                dependencies = json.load(file)["dependencies"]
+            if self._get_dependency_key(dependencies=dependencies) is None:
+                return None, None
+            with open(cache_path, 'rb') as file:
+                html = file.read()
+        except (OSError, ValueError, KeyError):
+            return None, None
+        try:
+            # recently used pages are pruned last
+            os.utime(cache_path)
+        except OSError:
+            pass
+        return html, dependencies
+
+    def _write_disk_cache(self, cache_key:str, html:bytes,
+                          dependencies:dict) -> None:
+        cache_path = Path(self.cache_dir, f"{cache_key}.html")
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            for path, content in [
+                    (cache_path, html),
+                    (cache_path.with_suffix(".json"),
+                     json.dumps({"dependencies": dependencies}).encode())]:
+                temp_path = path.with_suffix(f".{threading.get_ident()}")
+                with open(temp_path, 'wb') as file:
+                    file.write(content)
+                os.replace(temp_path, path)
+        except OSError:
+            pass # disk cache is optional
+
+    def _prune_disk_cache(self, config) -> None:
+        """ Delete unused and least recently used pages of the disk cache 
+        (see `prune_render_cache`), at most once per interval.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._cache_pruned_time is not None and \
+               now - self._cache_pruned_time < _RENDER_CACHE_PRUNE_INTERVAL:
+                return
+            self._cache_pruned_time = now
+        max_bytes = getattr(config.generate, 'renderCacheBytes', 0)
+        max_days = getattr(config.generate, 'renderCacheDays', 0)
+        prune_render_cache(
+            root_path=self.root_path,
+            cache_dir=str(self.cache_dir),
+            max_bytes=max_bytes if isinstance(max_bytes, int) else 0,
+            max_age=max_days * 24 * 3600 \
+                if isinstance(max_days, (int, float)) else 0,
+        )
+
+    def render_source(self, source_path:str=None, text:str=None,
+                      preview:bool=False,
+                    ) -> Tuple[Union[str, None], list, dict]:
+        """ Render page from YAML `text` (e.g. unsaved editor buffer) or from
+        the file `source_path`, caches are bypassed (see `render_daemon.py`).
+
+        :param source_path: Source .yaml file, with `text` it only names the 
+            page (not auto-linked from itself), defaults to None
+        :param text: YAML of the page, defaults to None (`source_path` is 
+            read)
+        :param preview: If True, the preview of the page is returned (the 
+            page if previews are disabled), defaults to False
+        :return: Tuple of HTML (`None` if the page is not valid), reports 
+            and timings [ms] of `parse`, `check`, `render` and `total`.
+        """
+        start_time = time.perf_counter()
+        with self._lock:
+            self._load_config()
+            config = self._config
+            config_error = self._config_error
+            image_store = self._image_store
+            fragment_store = self._fragment_store
+            lexer_pool = self._lexer_pool
+            auto_linker = None
+            if config_error is None:
+                auto_linker = self._get_auto_linker(config=config)
+        if config_error is not None:
+            return None, [{"importance": _CRITICAL, "message": config_error}], \
+                   {"total": (time.perf_counter() - start_time) * 1000}
+
+        # parse
+        try:
+            if text is None:
+                with open(source_path, 'r') as file:
+                    text = file.read()
+            import yaml
+            data = yaml.safe_load(text)
+        except Exception as e:
+            return None, [{"importance": _CRITICAL, "message": 
+                           f"Exception when reading/parsing "\
+                           f"'{source_path or '<text>'}': {e}"}], \
+                   {"total": (time.perf_counter() - start_time) * 1000}
+        parse_time = time.perf_counter()
+
+        # check data structure
+        file_checker = DataStructureChecker(
+                data=data,
+                reference=config.dataStructure,
+            )
+        file_checker.is_valid()
+        check_time = time.perf_counter()
+
+        # generate HTML
+        page_file = None
+        if auto_linker is not None and source_path is not None:
+            from python_lib.autolink import get_link_file
+            try:
+                page_file = get_link_file(file_path=source_path,
+                    data_path=Path(self.root_path, config.display.pathData))
+            except ValueError:
+                page_file = None # outside of `pathData`
+        struct_to_html = StructToHtml(
+                data=data,
+                config=config,
+                root_path=self.root_path,
+                suffix=config.generate.targetFileExtension,
+                source_file_cache=self._source_file_cache,
+                auto_linker=auto_linker,
+                page_file=page_file,
+                image_store=image_store,
+                fragment_store=fragment_store,
+                lexer_pool=lexer_pool,
+            )
+        struct_to_html.generate_html_page()
+        log = file_checker.log + struct_to_html.log
+        html = None
+        if struct_to_html.valid:
+            log += Budget.from_config(config).check(stats=struct_to_html.stats)
+            for error in image_store.wait(images=struct_to_html.images):
+                log.append({"importance": _ERROR, "message": error})
+            html = struct_to_html.html_page
+            # every request of an editor gets complete reports
+            log += self._check_token_classes(html=html, once=False)
+            if preview and struct_to_html.html_preview is not None:
+                html = struct_to_html.html_preview
+        end_time = time.perf_counter()
+        timings = {
+            "parse": (parse_time - start_time) * 1000,
+            "check": (check_time - parse_time) * 1000,
+            "render": (end_time - check_time) * 1000,
+            "total": (end_time - start_time) * 1000,
+        }
+        return html, log, timings
+
+    def _render_source(self, source_path:Path, config, auto_linker=None,
+                       image_store=None, fragment_store=None, 
+                       lexer_pool=None, preview:bool=False,
+                    ) -> Tuple[Union[bytes, None], dict, list]:
+        try:
+            data = load_yaml_file(source_path)
+            page_file = None
+            if auto_linker is not None:
+                from python_lib.autolink import get_link_file
+                page_file = get_link_file(file_path=source_path,
+                    data_path=Path(self.root_path, config.display.pathData))
+            file_checker, struct_to_html = render_page(
+                data=data, config=config, root_path=self.root_path,
+                source_file_cache=self._source_file_cache,
+                auto_linker=auto_linker, page_file=page_file,
+                image_store=image_store, fragment_store=fragment_store,
+                lexer_pool=lexer_pool)
+            log = file_checker.log + struct_to_html.log
+            token_log = []
+            if struct_to_html.valid:
+                log += Budget.from_config(config).check(
+                    stats=struct_to_html.stats)
+                token_log = self._check_token_classes(
+                    html=struct_to_html.html_page)
+                log += token_log
+            # variants referenced by the page must exist when it is served
+            if image_store is not None:
+                for error in image_store.wait(images=struct_to_html.images):
+                    log.append({"importance": _ERROR, "message": error})
+        except RuntimeError as e:
+            log = [{"importance": _CRITICAL, "message": str(e)}]
+            token_log = []
+            struct_to_html = None
+
+        # report (prepend is global, thus serialized)
+        with _PRINT_LOCK:
+            log_set_prepend(value=Path(source_path).name)
+            print_log(log=log, min_importance=_ERROR)
+            # stylesheets are fixed by the user, not by the page
+            print_log(log=token_log, min_importance=_WARNING)
+            log_reset_prepend()
+            log_flush()
+
+        if struct_to_html is None or not struct_to_html.valid:
+            return None, None, log
+        dependencies = {path: list(key) for path, key
+                        in struct_to_html.source_files.items()}
+        html = struct_to_html.html_preview if preview \
+                    else struct_to_html.html_page
+        return html.encode(), dependencies, log
@@ -0,0 +1,109 @@
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import Dict
+
+
+## ========================================================================== ##
+##                                   CONSTS                                   ##
+## ========================================================================== ##
+# renderer of the worker process (see `_init_worker`)
+_worker_renderer = None
+
+
+## ========================================================================== ##
+##                                   WORKER                                   ##
+## ========================================================================== ##
+def _init_worker(config, root_path:str, auto_linker) -> None:
+    # one renderer per worker, shared config and auto-link dictionary are
+    # sent once (not with every section)
+    global _worker_renderer
+    from python_lib.to_html import StructToHtml
+    _worker_renderer = StructToHtml(
+            data={'header': {'title': ''}},
+            config=config,
+            root_path=root_path,
+            suffix=config.generate.targetFileExtension,
+            auto_linker=auto_linker,
+        )
+
+
+def _render_section_content(page_file:str, content_args:dict) -> tuple:
+    # `(html, match_counts, num_auto_links, log)` of one section, reports 
+    # are printed by the page
+    renderer = _worker_renderer
+    renderer.page_file = page_file
+    renderer._auto_link_count = 0
+    renderer.log = []
+    html, match_counts = renderer.create_html_section_content(**content_args)
+    return html, match_counts, renderer._auto_link_count, renderer.log
+
+
+## ========================================================================== ##
+##                                SectionPool                                 ##
+## ========================================================================== ##
+class SectionPool():
+    """ Worker processes rendering content (highlighting and links) of large
+    sections, thus a page with many large sections is not rendered by one
+    process. Sections are submitted most expensive first, the page renders
+    its small sections meanwhile and puts everything together in order.
+    """
+
+    def __init__(self, config, root_path:str, max_workers:int, min_cost:int,
+                 auto_linker=None):
+        """
+        :param config: Parsed config (see `load_config_file`).
+        :param root_path: Project root (where `index.html` is).
+        :param max_workers: Number of worker processes.
+        :param min_cost: Sections of lower estimated cost (see
+            `estimate_cost`) are rendered by the page itself.
+        :param auto_linker: Auto-link dictionary of the run, defaults to
+            None (no auto-linking)
+        """
+        self.config = config
+        self.root_path = root_path
+        self.max_workers = max_workers
+        self.min_cost = min_cost
+        self.auto_linker = auto_linker
+        self.num_submitted = 0
+        self._executor = None
+
+    @staticmethod
+    def estimate_cost(content_args:dict) -> int:
+        """ Return estimated cost of rendering section content, characters
+        of the text (highlighting dominates, links are found by a substring
+        test on most lines), 0 if there is no text.
+        """
+        section_text = content_args['section_text']
+        if not isinstance(section_text, str):
+            return 0
+        return len(section_text)
+
+    def submit(self, page_file:str,
+               sections:Dict[int, dict]) -> Dict[int, Future]:
+        """ Submit sections worth rendering in a worker, most expensive
+        first (the longest ones do not end up last).
+
+        :param page_file: Page as `linkFile` (see `StructToHtml.page_file`).
+        :param sections: Arguments of `create_html_section_content` of every
+            section, `{section_index: content_args}`.
+        :return: Futures of submitted sections, `{section_index: Future}`.
+        """
+        costs = sorted(((self.estimate_cost(content_args), section_index)
+                        for section_index, content_args in sections.items()),
+                       reverse=True)
+        submitted = [section_index for cost, section_index in costs
+                     if cost >= self.min_cost]
+        if submitted and self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(self.config, self.root_path, self.auto_linker))
+        self.num_submitted += len(submitted)
+        return {section_index: self._executor.submit(
+                    _render_section_content, page_file,
+                    sections[section_index])
+                for section_index in submitted}
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
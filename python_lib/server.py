@@ -0,0 +1,444 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import email.utils
+from http import HTTPStatus
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+import io
+import os
+import re
+import select
+import threading
+import time
+from typing import Tuple, Union
+from urllib.parse import urlsplit
+
+
+from python_lib.log import format_report_message, _ERROR
+
+
+## ========================================================================== ##
+##                                   CONSTS                                   ##
+## ========================================================================== ##
+# precompressed variants, in order of preference
+_PRECOMPRESSED_VARIANTS = [("br", ".br"), ("gzip", ".gz")]
+# content-hashed URLs (see `python_lib.fingerprint`) never change
+_CACHE_CONTROL_IMMUTABLE = "public, max-age=31536000, immutable"
+_CACHE_CONTROL_REVALIDATE = "no-cache"
+_HASH_QUERY_REGEX = re.compile(r'(^|&)v=[0-9a-fA-F]+(&|$)')
+# files named by their content hash (fragments, resized images)
+_HASH_PATH_REGEX = re.compile(r'/(fragments|image_variants)/[0-9a-f]{16}[-.]')
+_RANGE_REGEX = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+_DEFAULT_MAX_WORKERS = 32
+# [s] - idle keep-alive connection is closed (it holds a worker of the pool)
+_KEEP_ALIVE_TIMEOUT = 10
+# [s] - idle keep-alive connection checks whether others wait for a worker
+_IDLE_POLL_INTERVAL = 0.1
+_DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+_DEFAULT_CACHE_ENTRY_BYTES = 4 * 1024 * 1024
+
+
+## ========================================================================== ##
+##                                 FileCache                                  ##
+## ========================================================================== ##
+class FileCache():
+    """ Bounded (by total bytes) least-recently-used cache of file contents.
+    Entries are validated by `(st_mtime_ns, st_size)` of the file, thus a
+    changed file is never served from the cache.
+    """
+
+    def __init__(self, max_bytes:int=_DEFAULT_CACHE_BYTES,
+                 max_entry_bytes:int=_DEFAULT_CACHE_ENTRY_BYTES):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path:str, key:tuple) -> Union[bytes, None]:
+        with self._lock:
+            entry = self._entries.get(path, None)
+            if entry is None or entry[0] != key:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, path:str, key:tuple, data:bytes) -> None:
+        if len(data) > self.max_entry_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(path, None)
+            if previous is not None:
+                self._size -= len(previous[1])
+            self._entries[path] = (key, data)
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def read(self, path:str, stat:os.stat_result) -> Union[bytes, None]:
+        """ Return file content from cache (or disk), `None` if the file
+        is too large to be cached.
+        """
+        if stat.st_size > self.max_entry_bytes:
+            return None
+        key = (stat.st_mtime_ns, stat.st_size)
+        data = self.get(path=path, key=key)
+        if data is None:
+            with open(path, 'rb') as file:
+                data = file.read()
+            self.put(path=path, key=key, data=data)
+        return data
+
+
+## ========================================================================== ##
+##                                 _FileRange                                 ##
+## ========================================================================== ##
+class _FileRange():
+    """ File-like object limited to `length` bytes from `start`, used to
+    stream (ranges of) files that are too large to be cached.
+    """
+
+    def __init__(self, path:str, start:int, length:int):
+        self._file = open(path, 'rb')
+        self._file.seek(start)
+        self._remaining = length
+
+    def read(self, size:int=-1) -> bytes:
+        if self._remaining <= 0:
+            return b''
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self) -> None:
+        self._file.close()
+
+
+## ========================================================================== ##
+##                          NavigatorRequestHandler                           ##
+## ========================================================================== ##
+class NavigatorRequestHandler(SimpleHTTPRequestHandler):
+    """ Static file handler with ETag/Last-Modified validation, precompressed
+    variants (`<file>.br`, `<file>.gz`), byte ranges and in-memory cache.
+    """
+    protocol_version = "HTTP/1.1"
+    timeout = _KEEP_ALIVE_TIMEOUT
+    file_cache = None
+    renderer = None
+    quiet = False
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def handle(self):
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection:
+            if not self.wait_for_request():
+                break
+            self.handle_one_request()
+
+    def wait_for_request(self) -> bool:
+        """ Wait for the next request of a keep-alive connection. Returns 
+        False if the connection stays idle for `timeout` or another 
+        connection waits for a worker (idle connection gives its worker up).
+        """
+        # pipelined request may already be buffered
+        self.connection.setblocking(False)
+        try:
+            if self.rfile.peek(1):
+                return True
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            readable, _, _ = select.select([self.connection], [], [],
+                                           min(remaining, _IDLE_POLL_INTERVAL))
+            if readable:
+                return True
+            if getattr(self.server, 'is_saturated', lambda: False)():
+                return False
+
+    def end_headers(self):
+        # connections waiting for a worker get it once this response is sent
+        if getattr(self.server, 'is_saturated', lambda: False)():
+            self.send_header("Connection", "close")
+        super().end_headers()
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            index_path = os.path.join(path, "index.html")
+            if not self.path.split('?', 1)[0].endswith('/') or \
+                not os.path.isfile(index_path):
+                # redirect and directory listing
+                return super().send_head()
+            path = index_path
+
+        # pages rendered on demand from their .yaml source
+        if self.renderer is not None:
+            rendered = self.renderer.render(html_path=path)
+            if rendered is not None:
+                return self.send_rendered(path=path, rendered=rendered)
+
+        if not os.path.isfile(path):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+
+        serve_path, encoding = self.select_variant(path=path)
+        try:
+            stat = os.stat(serve_path)
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}'\
+               f'{"-"+encoding if encoding else ""}"'
+
+        def read_body(start, end):
+            # body from cache (small files) or streamed from disk
+            data = self.file_cache.read(path=serve_path, stat=stat)
+            if data is not None:
+                return io.BytesIO(data[start:end + 1])
+            return _FileRange(path=serve_path, start=start,
+                              length=end - start + 1)
+
+        return self.send_content(path=path, size=stat.st_size, etag=etag,
+                                 mtime=stat.st_mtime, encoding=encoding,
+                                 read_body=read_body)
+
+    def send_rendered(self, path:str, rendered):
+        """ Send page rendered on demand (see `OnDemandRenderer`), pages that
+        are not valid are answered by the log of errors.
+        """
+        if rendered.html is None:
+            message = "\n".join(format_report_message(report)
+                                for report in rendered.log
+                                if report['importance'] >= _ERROR)
+            body = f"Cannot generate HTML page:\n{message}\n".encode()
+            self.send_response(HTTPStatus.INTERNAL_SERVER_ERROR)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            return io.BytesIO(body)
+        html = rendered.html
+        return self.send_content(path=path, size=len(html), etag=rendered.etag,
+                                 mtime=rendered.mtime, encoding=None,
+                                 read_body=lambda start, end: \
+                                     io.BytesIO(html[start:end + 1]),
+                                 immutable=False)
+
+    def send_content(self, path:str, size:int, etag:str, mtime:float,
+                     encoding:Union[str, None], read_body,
+                     immutable:bool=None):
+        """ Send headers (handles conditional requests and byte ranges) and
+        return the body as file-like object from `read_body(start, end)`.
+        """
+        last_modified = self.date_time_string(int(mtime))
+
+        # conditional requests
+        if self.is_not_modified(etag=etag, mtime=mtime):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_common_headers(etag=etag, last_modified=last_modified,
+                                     encoding=encoding, immutable=immutable)
+            self.end_headers()
+            return None
+
+        # byte ranges
+        byte_range = None
+        range_header = self.headers.get("Range", None)
+        if range_header is not None and \
+            self.headers.get("If-Range", etag) in (etag, last_modified):
+            byte_range = self.parse_range(range_header=range_header, size=size)
+            if byte_range == (None, None):
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return None
+        start, end = byte_range if byte_range is not None else (0, size - 1)
+        body = read_body(start, end)
+
+        if byte_range is not None:
+            self.send_response(HTTPStatus.PARTIAL_CONTENT)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Length", str(max(end - start + 1, 0)))
+        self.send_common_headers(etag=etag, last_modified=last_modified,
+                                 encoding=encoding, immutable=immutable)
+        self.end_headers()
+        return body
+
+    def select_variant(self, path:str) -> Tuple[str, Union[str, None]]:
+        """ Return path to precompressed variant accepted by the client
+        (and not older than `path`), otherwise `path` itself.
+        """
+        accept_encoding = self.headers.get("Accept-Encoding", "")
+        accepted = {item.split(';')[0].strip().lower()
+                    for item in accept_encoding.split(',')}
+        for encoding, extension in _PRECOMPRESSED_VARIANTS:
+            if encoding not in accepted:
+                continue
+            variant_path = path + extension
+            try:
+                if os.stat(variant_path).st_mtime_ns >= \
+                    os.stat(path).st_mtime_ns:
+                    return variant_path, encoding
+            except OSError:
+                continue
+        return path, None
+
+    def is_not_modified(self, etag:str, mtime:float) -> bool:
+        if_none_match = self.headers.get("If-None-Match", None)
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return "*" in tags or etag in tags or f"W/{etag}" in tags
+        if_modified_since = self.headers.get("If-Modified-Since", None)
+        if if_modified_since is not None:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+                return int(mtime) <= since.timestamp()
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+        return False
+
+    def parse_range(self, range_header:str, size:int) -> Union[tuple, None]:
+        """ Parse single byte range, returns `(start, end)` (inclusive),
+        `None` if the range is ignored (e.g. multiple ranges) and
+        `(None, None)` if the range is not satisfiable.
+        """
+        match = _RANGE_REGEX.match(range_header.strip())
+        if match is None:
+            return None
+        first, last = match.groups()
+        if first == "" and last == "":
+            return None
+        if first == "":
+            suffix_length = int(last)
+            if suffix_length == 0 or size == 0:
+                return (None, None)
+            return (max(size - suffix_length, 0), size - 1)
+        start = int(first)
+        end = size - 1 if last == "" else min(int(last), size - 1)
+        if start >= size or start > end:
+            return (None, None)
+        return (start, end)
+
+    def send_common_headers(self, etag:str, last_modified:str,
+                            encoding:Union[str, None],
+                            immutable:bool=None) -> None:
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Vary", "Accept-Encoding")
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        if immutable is None:
+            url = urlsplit(self.path)
+            immutable = bool(_HASH_QUERY_REGEX.search(url.query)
+                             or _HASH_PATH_REGEX.search(url.path))
+        if immutable:
+            self.send_header("Cache-Control", _CACHE_CONTROL_IMMUTABLE)
+        else:
+            self.send_header("Cache-Control", _CACHE_CONTROL_REVALIDATE)
+
+
+## ========================================================================== ##
+##                            ThreadPoolHTTPServer                            ##
+## ========================================================================== ##
+class ThreadPoolHTTPServer(HTTPServer):
+    """ HTTP server handling requests in a fixed-size pool of threads. A 
+    keep-alive connection holds its worker until it is closed, thus idle 
+    connections time out (`NavigatorRequestHandler.timeout`) and responses
+    close the connection while other connections wait for a worker.
+    """
+
+    def __init__(self, server_address, RequestHandlerClass,
+                 max_workers:int=_DEFAULT_MAX_WORKERS):
+        super().__init__(server_address, RequestHandlerClass)
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="navigator-server")
+        self._num_connections = 0
+        self._lock = threading.Lock()
+
+    def is_saturated(self) -> bool:
+        """ Return True if a connection waits for a worker of the pool.
+        """
+        return self._num_connections > self.max_workers
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self._num_connections += 1
+        self._pool.submit(self._process_request_in_pool,
+                          request, client_address)
+
+    def _process_request_in_pool(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._lock:
+                self._num_connections -= 1
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+## ========================================================================== ##
+##                                create_server                               ##
+## ========================================================================== ##
+def create_server(directory:str,
+                  bind:str='',
+                  port:int=8000,
+                  max_workers:int=_DEFAULT_MAX_WORKERS,
+                  cache_bytes:int=_DEFAULT_CACHE_BYTES,
+                  cache_entry_bytes:int=_DEFAULT_CACHE_ENTRY_BYTES,
+                  renderer=None,
+                  quiet:bool=False,
+                ) -> ThreadPoolHTTPServer:
+    """ Create server that serves `directory` (project root).
+
+    :param directory: Served directory.
+    :param bind: Address to bind, defaults to '' (all interfaces)
+    :param port: Port, defaults to 8000
+    :param max_workers: Number of threads handling requests, defaults to 32
+    :param cache_bytes: Size of in-memory file cache, defaults to 64MB
+    :param cache_entry_bytes: Largest cached file, defaults to 4MB
+    :param renderer: If set (see `python_lib.render.OnDemandRenderer`), 
+        pages are rendered from their source when requested, 
+        defaults to None
+    :param quiet: If True, requests are not logged, defaults to False
+    :return: Server, call `serve_forever()` to start it.
+    """
+    handler_class = type("NavigatorRequestHandler",
+        (NavigatorRequestHandler,),
+        {
+            "file_cache": FileCache(max_bytes=cache_bytes,
+                                    max_entry_bytes=cache_entry_bytes),
+            "renderer": renderer,
+            "quiet": quiet,
+        })
+
+    def handler(*args, **kwargs):
+        return handler_class(*args, directory=directory, **kwargs)
+
+    return ThreadPoolHTTPServer((bind, port), handler, max_workers=max_workers)
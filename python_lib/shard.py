@@ -0,0 +1,292 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+import re
+from typing import List, Tuple, Union
+
+
+from python_lib.fingerprint import get_content_hash
+from python_lib.log import format_report_message
+
+
+## ========================================================================== ##
+##                                   CONSTS                                   ##
+## ========================================================================== ##
+_SHARD_DIR = ".shards"
+_COST_FILE = "costs.json"
+_SHARD_FILE_REGEX = re.compile(r'^shard-(?P<index>\d+)-of-(?P<count>\d+)\.json$')
+
+
+## ========================================================================== ##
+##                                   SHARDS                                   ##
+## ========================================================================== ##
+
+## =============================== parse_shard ============================== ##
+def parse_shard(value:str) -> Tuple[int, int]:
+    """ Parse `--shard INDEX/COUNT` value (INDEX is 1-based).
+
+    :param value: String such as '2/4'.
+    :raises ValueError: If the value is malformed or out of range.
+    :return: Tuple `(index, count)`.
+    """
+    match = re.fullmatch(r'\s*(\d+)\s*/\s*(\d+)\s*', str(value))
+    if match is None:
+        raise ValueError(f"expected INDEX/COUNT (e.g. 1/4), got '{value}'")
+    index, count = int(match.group(1)), int(match.group(2))
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"INDEX must be within 1..COUNT, got '{value}'")
+    return index, count
+
+
+## ============================= get_shard_path ============================= ##
+def get_shard_path(root_path:str, index:int, count:int) -> Path:
+    """ Return path of the partial manifest written by shard `index`.
+    """
+    return Path(root_path, _SHARD_DIR, f"shard-{index}-of-{count}.json")
+
+
+## ========================== get_relative_file_path ======================== ##
+def get_relative_file_path(root_path:str, file_path:str) -> str:
+    """ Return posix path of `file_path` relative to `root_path`, identical
+    on every machine sharing the directory (mount points may differ).
+    """
+    return Path(file_path).resolve()\
+        .relative_to(Path(root_path).resolve()).as_posix()
+
+
+## =============================== load_costs =============================== ##
+def load_costs(root_path:str) -> dict:
+    """ Return historical cost (seconds) of every file, `{rel_path: cost}`,
+    as recorded by the last `--merge-shards`. Empty if there is no history.
+    """
+    try:
+        with open(Path(root_path, _SHARD_DIR, _COST_FILE), 'r') as file:
+            costs = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(costs, dict):
+        return {}
+    return {path: float(cost) for path, cost in costs.items()
+            if isinstance(cost, (int, float))}
+
+
+## =============================== split_files ============================== ##
+def split_files(file_paths:list,
+                root_path:str,
+                count:int,
+                costs:dict=None,
+            ) -> List[list]:
+    """ Split files into `count` shards of similar total cost. The split only
+    depends on the file list, file sizes and `costs`, thus every machine
+    computes the same split and each file belongs to exactly one shard.
+
+    Cost of a file is its historical cost, files without history are
+    estimated from their size (scaled by the seconds-per-byte rate of files
+    with history, or the size alone if there is no history at all). Files are
+    assigned greedily, most expensive first, to the cheapest shard.
+
+    :param file_paths: Files to split.
+    :param root_path: Project root (files are identified relative to it).
+    :param count: Number of shards.
+    :param costs: Historical costs `{rel_path: seconds}`, defaults to None
+    :return: List of `count` lists of file paths, each sorted.
+    """
+    costs = {} if costs is None else costs
+    files = sorted(
+        (get_relative_file_path(root_path=root_path, file_path=file_path),
+         os.path.getsize(file_path),
+         file_path)
+        for file_path in file_paths)
+
+    # seconds per byte of files with known cost
+    known_cost = sum(costs[path] for path, _, _ in files if path in costs)
+    known_size = sum(size for path, size, _ in files if path in costs)
+    rate = known_cost / known_size if known_cost > 0 and known_size > 0 \
+            else 1.0
+
+    def get_cost(path:str, size:int) -> float:
+        if path in costs:
+            return costs[path] if known_cost > 0 else float(size)
+        return size * rate
+
+    # longest processing time first (ties resolved by path)
+    weighted = sorted(((get_cost(path, size), path, file_path)
+                       for path, size, file_path in files),
+                      key=lambda item: (-item[0], item[1]))
+    loads = [0.0] * count
+    shards = [[] for _ in range(count)]
+    for cost, path, file_path in weighted:
+        shard_idx = min(range(count), key=lambda idx: (loads[idx], idx))
+        loads[shard_idx] += cost
+        shards[shard_idx].append((path, file_path))
+    return [[file_path for _, file_path in sorted(shard)] for shard in shards]
+
+
+## ============================== get_files_key ============================= ##
+def get_files_key(file_paths:list, root_path:str) -> str:
+    """ Return digest of the whole (unsplit) file list, shards of one build
+    must agree on it.
+    """
+    paths = sorted(get_relative_file_path(root_path=root_path,
+                                          file_path=file_path)
+                   for file_path in file_paths)
+    return hashlib.sha256("\0".join(paths).encode()).hexdigest()[0:16]
+
+
+## ========================= write_partial_manifest ========================= ##
+def write_partial_manifest(root_path:str,
+                           index:int,
+                           count:int,
+                           files_key:str,
+                           config_path:str,
+                           results:list,
+                        ) -> Path:
+    """ Write partial manifest of shard `index` into `<root>/.shards/`.
+
+    *Example*
+        {
+            "shard": 1, "count": 4, "filesKey": "...", "config": "...",
+            "files": {
+                "data_to_explore/_init.yaml": {
+                    "page": "data_to_explore/_init.html",
+                    "hash": "0123456789abcdef",
+                    "preview": "data_to_explore/_init.preview.html",
+                    "previewHash": "fedcba9876543210",
+                    "valid": true,
+                    "cost": 0.0123,
+                    "reports": [{"importance": 1, "message": "..."}]
+                }
+            }
+        }
+
+    :param root_path: Project root.
+    :param index: Shard index (1-based).
+    :param count: Number of shards.
+    :param files_key: Digest of the unsplit file list (see `get_files_key`).
+    :param config_path: Path to used config file.
+    :param results: List of tuples `(file_path, html_path, preview_path, 
+        valid, cost, log)`, paths of the page and preview written by this 
+        shard, `None` if not written (an existing page of a skipped file or
+        record is never listed).
+    :return: Path to written partial manifest.
+    """
+    files = {}
+    for file_path, page_path, preview_path, valid, cost, log in results:
+        files[get_relative_file_path(root_path, file_path)] = {
+            "page": get_relative_file_path(root_path, page_path)
+                    if page_path is not None else None,
+            "hash": get_content_hash(page_path)
+                    if page_path is not None else None,
+            "preview": get_relative_file_path(root_path, preview_path)
+                    if preview_path is not None else None,
+            "previewHash": get_content_hash(preview_path)
+                    if preview_path is not None else None,
+            "valid": bool(valid),
+            "cost": round(cost, 6),
+            "reports": [{"importance": report['importance'],
+                         "message": format_report_message(report)}
+                        for report in log],
+        }
+    partial_manifest = {
+        "shard": index,
+        "count": count,
+        "filesKey": files_key,
+        "config": get_content_hash(config_path),
+        "files": files,
+    }
+
+    shard_path = get_shard_path(root_path=root_path, index=index, count=count)
+    shard_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = shard_path.with_suffix(f".{os.getpid()}")
+    with open(temp_path, 'w') as file:
+        file.write(json.dumps(partial_manifest, indent=1, sort_keys=True))
+    os.replace(temp_path, shard_path)
+    return shard_path
+
+
+## ======================== read_partial_manifests ========================== ##
+def read_partial_manifests(root_path:str,
+                           count:int,
+                        ) -> Tuple[dict, List[str]]:
+    """ Read and combine partial manifests of all `count` shards.
+
+    :param root_path: Project root.
+    :param count: Number of shards of the build.
+    :return: Tuple of combined manifest (same layout as a partial manifest,
+        without `shard`) and list of problems (missing shards, shards of
+        different builds, pages generated by more files or records), the 
+        merge is valid only if the list is empty.
+    """
+    problems = []
+    merged = None
+    for index in range(1, count + 1):
+        shard_path = get_shard_path(root_path=root_path, index=index,
+                                    count=count)
+        try:
+            with open(shard_path, 'r') as file:
+                partial_manifest = json.load(file)
+        except OSError:
+            problems.append(f"missing partial manifest '{shard_path}'")
+            continue
+        except ValueError as e:
+            problems.append(f"cannot parse '{shard_path}': {e}")
+            continue
+
+        if merged is None:
+            merged = {key: partial_manifest[key]
+                      for key in ("count", "filesKey", "config")}
+            merged["files"] = {}
+        for key in ("filesKey", "config"):
+            if partial_manifest[key] != merged[key]:
+                problems.append(
+                    f"shard {index}/{count} was built from a different "\
+                    f"{'file list' if key == 'filesKey' else 'config'} "\
+                    f"than shard 1/{count}")
+        for file_path, record in partial_manifest["files"].items():
+            if file_path in merged["files"]:
+                problems.append(f"file '{file_path}' is in more shards")
+            merged["files"][file_path] = record
+
+    # records of bulk files may name a page of another shard
+    page_files = {}
+    for file_path, record in sorted((merged or {}).get("files", {}).items()):
+        page = record.get("page", None)
+        if page is None:
+            continue
+        if page in page_files:
+            problems.append(f"page '{page}' is generated by both "\
+                            f"'{page_files[page]}' and '{file_path}'")
+        else:
+            page_files[page] = file_path
+
+    if merged is None:
+        merged = {"count": count, "filesKey": None, "config": None,
+                  "files": {}}
+    return merged, problems
+
+
+## ========================== list_partial_manifests ======================== ##
+def list_partial_manifests(root_path:str) -> List[Path]:
+    """ Return paths of all partial manifests within `<root>/.shards/`.
+    """
+    shard_dir = Path(root_path, _SHARD_DIR)
+    if not shard_dir.exists():
+        return []
+    return sorted(path for path in shard_dir.iterdir()
+                  if _SHARD_FILE_REGEX.match(path.name))
+
+
+## =============================== save_costs =============================== ##
+def save_costs(root_path:str, merged:dict) -> Union[Path, None]:
+    """ Store costs of merged files as history for the next split, costs of
+    files outside this build are kept.
+    """
+    costs = load_costs(root_path=root_path)
+    costs.update({file_path: record["cost"] for file_path, record
+                  in merged["files"].items()})
+    cost_path = Path(root_path, _SHARD_DIR, _COST_FILE)
+    cost_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(cost_path, 'w') as file:
+        file.write(json.dumps(costs, indent=1, sort_keys=True))
+    return cost_path
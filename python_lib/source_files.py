@@ -0,0 +1,151 @@
+from array import array
+import mmap
+import os
+import threading
+from typing import Tuple, Union
+
+
+## ========================================================================== ##
+##                                _MappedFile                                 ##
+## ========================================================================== ##
+class _MappedFile():
+    """ Memory-mapped file with lazily built index of line offsets.
+    """
+    __slots__ = ("key", "mapping", "size", "line_offsets", "indexed")
+
+    def __init__(self, file_path:str, key:tuple):
+        self.key = key
+        self.size = key[1]
+        if self.size > 0:
+            with open(file_path, 'rb') as file:
+                self.mapping = mmap.mmap(file.fileno(), 0,
+                                         access=mmap.ACCESS_READ)
+        else:
+            self.mapping = b''
+        # offset of the first byte of every line, line 1 starts at 0
+        self.line_offsets = array('Q', [0])
+        self.indexed = self.size == 0
+
+    def index_until(self, line_count:int) -> None:
+        """ Extend line index until it covers `line_count` lines
+        (or the whole file).
+        """
+        offsets = self.line_offsets
+        position = offsets[-1]
+        while not self.indexed and len(offsets) <= line_count:
+            position = self.mapping.find(b'\n', position)
+            if position < 0 or position + 1 >= self.size:
+                self.indexed = True
+                break
+            position += 1
+            offsets.append(position)
+
+    def line_count(self) -> int:
+        self.index_until(line_count=self.size)
+        return len(self.line_offsets) if self.size > 0 else 0
+
+    def read_lines(self, first_line:int, last_line:int) -> bytes:
+        self.index_until(line_count=last_line)
+        offsets = self.line_offsets
+        start = offsets[first_line - 1]
+        end = offsets[last_line] if last_line < len(offsets) else self.size
+        return self.mapping[start:end]
+
+    def close(self) -> None:
+        if isinstance(self.mapping, mmap.mmap):
+            self.mapping.close()
+
+
+## ========================================================================== ##
+##                              SourceFileCache                               ##
+## ========================================================================== ##
+class SourceFileCache():
+    """ Cache of memory-mapped source files shared by all sections (and pages)
+    within one run, every file is mapped and indexed (line offsets) once, no
+    matter how many sections slice it. A file changed on disk (mtime, size)
+    is mapped again.
+    """
+
+    def __init__(self):
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def _get(self, file_path:str) -> _MappedFile:
+        stat = os.stat(file_path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            mapped_file = self._files.get(file_path, None)
+            if mapped_file is None or mapped_file.key != key:
+                if mapped_file is not None:
+                    mapped_file.close()
+                mapped_file = _MappedFile(file_path=file_path, key=key)
+                self._files[file_path] = mapped_file
+        return mapped_file
+
+    def get_key(self, file_path:str) -> Union[tuple, None]:
+        """ Return `(st_mtime_ns, st_size)` of the mapped `file_path`.
+        """
+        mapped_file = self._files.get(str(file_path), None)
+        return None if mapped_file is None else mapped_file.key
+
+    def read_lines(self,
+                   file_path:str,
+                   first_line:int=None,
+                   last_line:int=None,
+                   encoding:str='utf-8',
+                ) -> Tuple[str, int, int]:
+        """ Read range of lines (1-based, inclusive) from `file_path`.
+
+        :param file_path: Path to source file.
+        :param first_line: First line, defaults to None (first line of file)
+        :param last_line: Last line, defaults to None (last line of file),
+            values beyond the end of file are clipped
+        :param encoding: Encoding of the file, defaults to 'utf-8'
+            (invalid bytes are replaced)
+        :raises ValueError: If `first_line` is out of the file.
+        :return: Tuple of text, first and last line actually read.
+        """
+        mapped_file = self._get(file_path=str(file_path))
+        with self._lock:
+            first_line = 1 if first_line is None else first_line
+            if last_line is None:
+                last_line = mapped_file.line_count()
+            else:
+                mapped_file.index_until(line_count=last_line)
+                if mapped_file.indexed:
+                    last_line = min(last_line, mapped_file.line_count())
+            if first_line > last_line:
+                if mapped_file.size == 0 and first_line == 1:
+                    return "", first_line, last_line
+                raise ValueError(
+                    f"line {first_line} is out of file '{file_path}' "\
+                    f"({mapped_file.line_count()} lines)")
+            data = mapped_file.read_lines(first_line=first_line,
+                                          last_line=last_line)
+        return data.decode(encoding, errors='replace'), first_line, last_line
+
+    def close(self) -> None:
+        with self._lock:
+            for mapped_file in self._files.values():
+                mapped_file.close()
+            self._files.clear()
+
+
+## ============================ parse_line_range ============================ ##
+def parse_line_range(lines) -> Union[Tuple[int, int], None]:
+    """ Parse `content.lines` value, either `[first, last]` or `[first]`
+    (until the end of file), lines are 1-based and inclusive.
+
+    :param lines: Value of `content.lines`.
+    :return: Tuple `(first, last)` (`last` can be None), `None` if invalid.
+    """
+    if not isinstance(lines, list) or len(lines) not in (1, 2):
+        return None
+    if not all(isinstance(line, int) and not isinstance(line, bool)
+               for line in lines):
+        return None
+    first_line = lines[0]
+    last_line = lines[1] if len(lines) == 2 else None
+    if first_line < 1 or (last_line is not None and last_line < first_line):
+        return None
+    return first_line, last_line
@@ -1,16 +1,21 @@
-import markdown2
+from concurrent.futures import Future
+import html
+from itertools import islice
+import io
+import json
 from pathlib import Path
-from pygments import highlight
-from pygments.formatters import HtmlFormatter
-from pygments.lexers import get_lexer_by_name
 import re
-from typing import Tuple, List
+import time
+from typing import Tuple, List, Union
 
 
 from python_lib.utils import get_line_number_from_permalink, \
-    check_valid_syntax_highlight
+    check_valid_syntax_highlight, get_lexer
+from python_lib.source_files import SourceFileCache, parse_line_range
+from python_lib.model import Page, Header, Section, Link, Image, MISSING
+from python_lib.budget import PageStats, SectionStats
 from python_lib.log import log_branch_report, log_report, print_log, \
-    _NOTE, _WARNING, _ERROR, _CRITICAL
+    log_enabled, _NOTE, _WARNING, _ERROR, _CRITICAL
 
 
 ## ========================================================================== ##
@@ -29,12 +34,71 @@ _HTML_SECTION_HEADER = "section-header"
 _HTML_SECTION_CONTENT = "section-content"
 _HTML_SECTION_IMAGE_CONTAINER = "section-image-container"
 _HTML_SECTION_IMAGE = "section-image"
+_HTML_SECTION_PREVIEW_MORE = "section-preview-more"
+_HTML_PAGE_PREVIEW = "page-preview"
+# content of a section omitted from the preview (lines of the page used up)
+_HTML_SECTION_PREVIEW_OMITTED = "data-preview-omitted"
+# first and last rows of content with line numbers
+_HTML_DISPLAY_START = \
+    '<div id="display" class="display">\n'\
+    '<div class="display-line display-start">'\
+    '<div class="display-line-num"></div>'\
+    '<div class="display-line-text"></div></div>\n'
+_HTML_DISPLAY_END = \
+    '<div class="display-line display-end">'\
+    '<div class="display-line-num"></div>'\
+    '<div class="display-line-text"></div></div>\n'\
+    '</div>'
 _HTML_LINK = "navigator-link"
+_HTML_AUTOLINK = "navigator-autolink"
 _HTML_DEFAULT_IMAGE_MAX_WIDTH = "95%"
 _HTML_DEFAULT_IMAGE_MAX_HEIGHT = "90vh"
+# each panel takes half of the viewport
+_HTML_IMAGE_SIZES = "50vw"
+
+# lexer of section content shown as plain text (highlighting limits exceeded)
+_PLAIN_TEXT_LEXER = "text"
 
 _LINK_SEARCH_PREFIX = ""
 _LINK_SEARCH_SUFFIX = ""
+# markup never searched for links: links, tags and entities
+_HTML_MARKUP_REGEX = re.compile(r'(<a\b[^>]*>.*?</a>|<[^>]*>|&#?\w+;)', 
+                                re.DOTALL)
+
+
+## ========================================================================== ##
+##                             _DisplayLineWriter                             ##
+## ========================================================================== ##
+class _DisplayLineWriter():
+    """ File-like adapter that wraps every written line into numbered 
+    `display-line` row and passes it on to `writer`. Text not ending with 
+    a line break is held until the line is completed (or `close()`).
+    """
+
+    def __init__(self, writer, line_number_start:int=1):
+        self._writer = writer
+        self._line_number = line_number_start
+        self._pending = ""
+
+    def write(self, text:str) -> None:
+        lines = (self._pending + text).splitlines(keepends=True)
+        self._pending = ""
+        if lines and lines[-1].splitlines()[0] == lines[-1]:
+            self._pending = lines.pop()
+        for line in lines:
+            self._write_line(line.splitlines()[0])
+
+    def close(self) -> None:
+        if self._pending:
+            self._write_line(self._pending)
+            self._pending = ""
+
+    def _write_line(self, line:str) -> None:
+        self._writer.write(
+            f'<div class="display-line"><div class="display-line-num">'\
+            f'{self._line_number}</div><div class="display-line-text">'\
+            f'{line.rstrip()}</div></div>\n')
+        self._line_number += 1
 
 
 ## ========================================================================== ##
@@ -42,14 +106,81 @@ _LINK_SEARCH_SUFFIX = ""
 ## ========================================================================== ##
 class StructToHtml():
 
-    def __init__(self, data:dict, config:dict, root_path:str, suffix:str):
+    def __init__(self, data:Union[dict, Page], config:dict, root_path:str, 
+                 suffix:str, source_file_cache:SourceFileCache=None,
+                 auto_linker=None, page_file:str=None, image_store=None,
+                 fragment_store=None, section_pool=None, lexer_pool=None):
         self.root_path = root_path
-        self.data = data
+        # typed model of the page, the loaded .yaml file is not kept
+        self.page = data if isinstance(data, Page) else Page.from_dict(data,
+                default_max_width=_HTML_DEFAULT_IMAGE_MAX_WIDTH,
+                default_max_height=_HTML_DEFAULT_IMAGE_MAX_HEIGHT,
+            )
         self._default_syntax_highlight = config.default.syntaxHighlight
         self._config_data_path = config.display.pathData
         
         self.suffix = suffix
 
+        # sections backed by `content.sourceFile` share mapped files
+        self.source_file_cache = source_file_cache \
+            if source_file_cache is not None else SourceFileCache()
+        # source files read by this page, {path: (st_mtime_ns, st_size)}
+        self.source_files = {}
+
+        # corpus-wide auto-linking (see `python_lib.autolink`), `page_file`
+        # (relative to `pathData`) is never linked from its own page
+        self.auto_linker = auto_linker
+        self.page_file = page_file
+        self._auto_link_tags = {}
+        self._auto_link_count = 0
+
+        # resized variants of images (see `python_lib.images`), images of 
+        # this page are kept in `images` (their resizes may be pending)
+        self.image_store = image_store
+        self.images = []
+
+        # section content shared across pages (see `python_lib.fragments`), 
+        # identical content is rendered once and may be a fragment file
+        self.fragment_store = fragment_store
+
+        # large sections are rendered by worker processes (see 
+        # `python_lib.section_pool`)
+        self.section_pool = section_pool
+        # lexers limited by `generate.highlightTimeout` outside of the main
+        # thread run in worker processes (see `python_lib.lexer_pool`)
+        self.lexer_pool = lexer_pool
+        # bytes of section content moved into fragment files (beyond their
+        # placeholders), counted by `stats` as if within the page
+        self._fragment_bytes = 0
+        self._page_fragment_bytes = 0
+
+        # size of generated page and sections (see `python_lib.budget`)
+        self.stats = PageStats()
+
+        # preview (hover, right panel) shows first `preview_lines` of the 
+        # page (sections in order), disabled if 0
+        preview_lines = getattr(config.generate, 'previewLines', 0)
+        self.preview_lines = preview_lines \
+            if isinstance(preview_lines, int) and preview_lines > 0 else 0
+        self._preview_lines_left = self.preview_lines
+        self._preview_sections = []
+        self._html_preview = None
+        # rendered content of the last section (previews are cut from it), 
+        # `_content_path` if it is only in a fragment file
+        self._content_html = None
+        self._content_path = None
+
+        # limits of highlighting one section (lexers may backtrack on 
+        # malformed input), content exceeding them is shown as plain text
+        highlight_timeout = getattr(config.generate, 'highlightTimeout', 0)
+        self.highlight_timeout = highlight_timeout \
+            if isinstance(highlight_timeout, (int, float)) \
+               and highlight_timeout > 0 else 0
+        highlight_max_chars = getattr(config.generate, 'highlightMaxChars', 0)
+        self.highlight_max_chars = highlight_max_chars \
+            if isinstance(highlight_max_chars, int) \
+               and highlight_max_chars > 0 else 0
+
         self.log = []
         self._html_page = ""
         self.done = False
@@ -61,17 +192,29 @@ class StructToHtml():
             self.generate_html_page()
         return self._html_page
 
+    @property
+    def html_preview(self):
+        """ Preview of the page (`<page>.preview.html`), `None` if disabled.
+        """
+        if not self.done:
+            self.generate_html_page()
+        return self._html_preview
+
 
     ## =============================== report =============================== ##
     def log_branch_report(self, importance:int, branch:list, message:str, 
+            message_args:tuple=None,
         ) -> None:
         self.log = log_branch_report(log=self.log, importance=importance, 
             branch=branch, message=message, message_limit=240,
+            message_args=message_args,
             )
 
-    def log_report(self, importance:int, message:str) -> None:
+    def log_report(self, importance:int, message:str, 
+            message_args:tuple=None,
+        ) -> None:
         self.log = log_report(log=self.log, importance=importance, 
-                message=message, message_limit=240,
+                message=message, message_limit=240, message_args=message_args,
             )
 
     def print_log(self, min_importance) -> None:
@@ -85,7 +228,7 @@ class StructToHtml():
         """
         # header checkpoint
         valid_header = self.check_html_header(
-                header=self.data.get('header', None), 
+                header=self.page.header, 
                 importance=_CRITICAL,
             )
         if not valid_header: 
@@ -95,21 +238,75 @@ class StructToHtml():
         
         # header html
         html_header = self.create_html_header(
-                header=self.data.get('header', None), 
+                header=self.page.header, 
                 css_class_list=[],
             )
         
-        # sections
-        sections = self.data.get('sections', [])
+        # sections (large ones rendered by workers meanwhile)
+        prepared = {}
+        rendered = {}
+        if self.section_pool is not None:
+            prepared, rendered = self._submit_sections()
         html_sections = ""
-        for section in sections:
-            html_section = self.create_html_section(section=section)
+        for section_index, section in enumerate(self.page.sections):
+            html_section = self.create_html_section(
+                    section=section, 
+                    section_index=section_index,
+                    prepared=prepared.get(section_index, None),
+                    rendered=rendered.get(section_index, None),
+                )
             html_sections += html_section
 
-        html_page = \
-        f'<div class="{_HTML_PAGE}">\n' \
+        html_page = self._join_page_html(
+                html_header=html_header, 
+                html_sections=html_sections,
+            )
+        if self.preview_lines > 0:
+            self._html_preview = self._join_page_html(
+                html_header=html_header, 
+                html_sections=''.join(self._preview_sections),
+                css_class=f" {_HTML_PAGE_PREVIEW}",
+            )
+
+        self.stats.num_bytes = len(html_page.encode('utf-8')) \
+                                + self._page_fragment_bytes
+        self._html_page = html_page
+        self.done = True
+        self.valid = True
+        return
+
+
+    def _submit_sections(self) -> Tuple[dict, dict]:
+        """ Prepare content of all sections and submit it to `section_pool`
+        (content already in `fragment_store` is not). Returns 
+        `{section_index: prepared}` and `{section_index: Future}`.
+        """
+        prepared = {}
+        for section_index, section in enumerate(self.page.sections):
+            section_prepared = self.prepare_section_content(
+                    section=section, 
+                    section_index=section_index,
+                )
+            if section_prepared is not None:
+                prepared[section_index] = section_prepared
+        sections = {section_index: content_args 
+                    for section_index, (content_args, _) in prepared.items()
+                    if self.fragment_store is None 
+                    or not self.fragment_store.has(
+                        self.get_fragment_key(content_args=content_args))}
+        rendered = self.section_pool.submit(
+                page_file=self.page_file,
+                sections=sections,
+            )
+        return prepared, rendered
+
+
+    def _join_page_html(self, html_header:str, html_sections:str,
+                        css_class:str="") -> str:
+        return \
+        f'<div class="{_HTML_PAGE}{css_class}">\n' \
             f'<script type="application/json" id="page-data">\n' \
-                f'{"{"}"pageTitle": "{self.data["header"]["title"]}"{"}"}\n'\
+                f'{self._get_page_data()}\n'\
             f'</script>\n'\
             f'<div class="{_HTML_PAGE_HEADER}">'\
                 f'{html_header}'\
@@ -119,10 +316,52 @@ class StructToHtml():
             f'</div>\n' \
         f'</div>\n'
 
-        self._html_page = html_page
+
+    def _get_page_data(self) -> str:
+        """ Return JSON embedded in the page (keys sorted, no run-dependent
+        values, thus identical input renders identical bytes).
+        """
+        page_data = {"pageTitle": str(self.page.header.title)}
+        return json.dumps(page_data, sort_keys=True, ensure_ascii=False)\
+            .replace("</", "<\\/")
+
+
+    ## ============================= check_page ============================= ##
+    def check_page(self) -> bool:
+        """ Run the checks of `generate_html_page()` (header, links, 
+        duplicate `matchString`, images and source files) without 
+        highlighting text or generating HTML.
+
+        :return: True if no error (or worse) was found.
+        """
+        valid = self.check_html_header(
+                header=self.page.header, 
+                importance=_CRITICAL,
+            )
+        if valid:
+            for section_index, section in enumerate(self.page.sections):
+                if section.content is not None:
+                    self.check_links(
+                        links=section.links,
+                        section_index=section_index,
+                    )
+                    source_file = section.content.source_file
+                    if source_file is not None and not Path(self.root_path, 
+                        self._config_data_path, source_file).is_file():
+                        self.log_report(
+                            importance=_ERROR,
+                            message=\
+                                f"File `data.sections[{section_index}]."\
+                                f"content.sourceFile = '{source_file}'` "\
+                                f"does not exist.")
+                self.check_section_image(
+                    section_image=section.image, 
+                    section_index=section_index,
+                )
         self.done = True
-        self.valid = True
-        return
+        self.valid = valid and \
+            not any(report['importance'] >= _ERROR for report in self.log)
+        return self.valid
 
 
     ## =========================== highlight_text =========================== ##
@@ -138,39 +377,120 @@ class StructToHtml():
         :param syntax_highlight: Syntax highlight alias (e.g. cpp)
         :return: Highlighted HTML text using Pygments Lexer 
         """
+        writer = io.StringIO()
+        self.write_highlighted_text(
+                writer=writer,
+                text=text, 
+                syntax_highlight=syntax_highlight,
+                include_line_numbers=include_line_numbers,
+                line_number_start=line_number_start,
+            )
+        return writer.getvalue()
+
+
+    ## ======================== write_highlighted_text ====================== ##
+    def write_highlighted_text(self, 
+                               writer,
+                               text:str, 
+                               syntax_highlight:str, 
+                               include_line_numbers:bool, 
+                               line_number_start:int=1,
+                               links:List[Tuple[str, List[int], str]]=None,
+                               auto_link_exclude:frozenset=None,
+                               deadline:float=None,
+                            ) -> List[int]:
+        """ Highlight syntax, insert links and write the result into 
+        `writer` as it is produced. Tokens from `lexer.get_tokens` are 
+        formatted by `DisplayLineFormatter` in one pass, each line is written 
+        as `display-line` row with links inserted right away, thus the 
+        highlighted text is not split into lines (nor searched for links) 
+        as a whole. Memory still grows with the section: callers collect 
+        `writer` into one string and the page is joined from its sections.
+
+        :param writer: File-like object with `write(str)`
+        :param text: String representing the text to be highlighted
+        :param syntax_highlight: Syntax highlight alias (e.g. cpp)
+        :param include_line_numbers: If True, lines are wrapped into 
+            numbered `display-line` rows
+        :param line_number_start: Number of the first line, defaults to 1
+        :param links: List of `(match_string, match_index, open_tag)` 
+            inserted into the text, defaults to None
+        :param auto_link_exclude: Terms not auto-linked, auto-linking is 
+            off if None, defaults to None
+        :param deadline: `time.monotonic()` after which highlighting is 
+            interrupted (see `highlight_time_limit`), defaults to None
+        :return: Number of matches of every link.
+        """
+        links = links if links is not None else []
+        if include_line_numbers:
+            writer.write(_HTML_DISPLAY_START)
+
         if syntax_highlight == "markdown":
-            highlighted_text = markdown2.markdown(text)
+            # markdown is not tokenized, links are inserted into its HTML
+            import markdown2
+            html = markdown2.markdown(text)
+            match_counts = []
+            for match_string, match_index, open_tag in links:
+                html, match_count = self.insert_link_to_highlighted_code(
+                        highlighted_code=html, 
+                        match_string=match_string, 
+                        match_index=match_index,
+                        link=f"{open_tag}{match_string}</a>",
+                    )
+                match_counts.append(match_count)
+            if auto_link_exclude is not None:
+                html = self.insert_auto_links_to_html(
+                        html=html, 
+                        exclude_terms=auto_link_exclude,
+                    )
+            if include_line_numbers:
+                outfile = _DisplayLineWriter(
+                        writer=writer, 
+                        line_number_start=line_number_start,
+                    )
+                outfile.write(html)
+                outfile.close()
+            else:
+                writer.write(html)
         else:
-            lexer = get_lexer_by_name(syntax_highlight, stripall=True)
-            formatter = HtmlFormatter(
-                    # linenostart=line_number_start,
-                    nowrap=True,
-                    linenos=False, #'table' if include_line_numbers else False,
-                    full=False, # do not include CSS 
+            from python_lib.highlight import DisplayLineFormatter, LinkTarget
+            link_targets = [
+                LinkTarget(
+                    match_string=match_string, 
+                    pattern=self.create_whole_word_regex(
+                        word=match_string, 
+                        prefix=_LINK_SEARCH_PREFIX, 
+                        suffix=_LINK_SEARCH_SUFFIX,
+                    ),
+                    open_tag=open_tag,
+                    is_selected=lambda index, match_index=match_index: \
+                        self.check_index_within_match_index(
+                            index=index, match_index=match_index),
+                ) for match_string, match_index, open_tag in links]
+            formatter = DisplayLineFormatter(
+                    line_numbers=include_line_numbers,
+                    line_number_start=line_number_start,
+                    links=link_targets,
+                    auto_link=None if auto_link_exclude is None else \
+                        lambda line: self.find_auto_links(
+                            text=line, exclude_terms=auto_link_exclude),
+                    deadline=deadline,
                 )
-            highlighted_text = highlight(text, lexer, formatter)
-
+            tokens = None
+            if deadline is not None and self.lexer_pool is not None:
+                # a worker stuck in the lexer is killed on timeout
+                tokens = self.lexer_pool.get_tokens(
+                    syntax_highlight=syntax_highlight, 
+                    text=text, 
+                    timeout=deadline - time.monotonic())
+            if tokens is None:
+                tokens = get_lexer(syntax_highlight).get_tokens(text)
+            formatter.format(tokens, writer)
+            match_counts = [link.match_count for link in link_targets]
 
         if include_line_numbers:
-            _text = f'<div id="display" class="display">\n'
-            _text += \
-                f'<div class="display-line display-start">'\
-                f'<div class="display-line-num"></div>'\
-                f'<div class="display-line-text"></div></div>\n'
-            _line_number = ""
-            for line_idx, line in enumerate(highlighted_text.splitlines()):
-                line_number = line_number_start + line_idx
-                _line_number = \
-                    f'<div class="display-line"><div class="display-line-num">'\
-                    f'{line_number}</div><div class="display-line-text">'
-                _text += f'{_line_number}{line.rstrip()}</div></div>\n'
-            _text += \
-                f'<div class="display-line display-end">'\
-                f'<div class="display-line-num"></div>'\
-                f'<div class="display-line-text"></div></div>\n'
-            _text += f'</div>'
-            highlighted_text = _text
-        return highlighted_text
+            writer.write(_HTML_DISPLAY_END)
+        return match_counts
 
 
     ## ======================= create_whole_word_regex ====================== ##
@@ -245,6 +565,25 @@ class StructToHtml():
                 return True
 
 
+    ## ======================== count_linked_matches ======================== ##
+    def count_linked_matches(self, 
+                             match_count:int, 
+                             match_index:List[int],
+                        ) -> int:
+        """ Return number of the `match_count` matches that are linked 
+            according to `match_index` (see `check_index_within_match_index`).
+        """
+        match_index = [index for index in match_index 
+                       if isinstance(index, int)]
+        if len(match_index) == 0:
+            return match_count
+        if match_index[0] >= 0:
+            return len(set(index for index in match_index 
+                           if index < match_count))
+        return match_count - len(set(-index for index in match_index 
+                                     if -index < match_count))
+
+
     ## ============================= create_link ============================ ##
     def create_link(self,
                 match_string:str, 
@@ -261,6 +600,24 @@ class StructToHtml():
         :param css_class: _description_
         :return: _description_
         """
+        return self.create_link_tag(
+                match_string=match_string, 
+                link_file=link_file, 
+                section_tag=section_tag, 
+                css_class=css_class,
+            ) + f"{match_string}</a>"
+
+
+    ## =========================== create_link_tag ========================== ##
+    def create_link_tag(self,
+                match_string:str, 
+                link_file:str, 
+                section_tag:str=None, 
+                css_class:str=None,
+            ) -> str:
+        """ Format opening `<a ...>` tag of the link (see `create_link`), 
+            the linked text and `</a>` are written by the formatter.
+        """
         link_file = Path(link_file).with_suffix('').with_suffix(self.suffix)
         # link_file = link_file + self.suffix
         link = f"<a "
@@ -272,7 +629,7 @@ class StructToHtml():
             link += f"class=\"{_HTML_LINK} {css_class}\""
         else:
             link += f"class=\"{_HTML_LINK}\""
-        link += f">{match_string}</a>"
+        link += f">"
 
         return link
 
@@ -285,7 +642,9 @@ class StructToHtml():
             match_index:List[int],
             link:str) -> Tuple[str, int]:
         """ Replace `match_string` with `link` within `highlighted_code` (HTML) 
-            according to logic provided throug `match_index`.
+            according to logic provided throug `match_index`. Tags, 
+            entities and existing links are skipped (used for markdown, 
+            highlighted code gets links from `DisplayLineFormatter`).
 
         :param highlighted_code: String representing highlighted code.
         :param match_string: String to be replaced by `link`.
@@ -297,42 +656,98 @@ class StructToHtml():
         :return: Returns highlighted code (HTML) with inserted HTML tags 
             representing the links.
         """
-        pattern = self.create_whole_word_regex(
+        pattern = re.compile(self.create_whole_word_regex(
                 word=match_string, 
                 prefix=_LINK_SEARCH_PREFIX, 
                 suffix=_LINK_SEARCH_SUFFIX,
-            )
+            ))
         result = []
-        last_end = 0
         match_count = 0
 
-        while True:
-            match = re.search(pattern, highlighted_code[last_end:])
-            if not match:
-                result.append(highlighted_code[last_end:])
-                break
+        # only text between markup is searched (odd chunks are markup)
+        chunks = _HTML_MARKUP_REGEX.split(highlighted_code)
+        for chunk_index, chunk in enumerate(chunks):
+            if chunk_index % 2 == 1:
+                result.append(chunk)
+                continue
+            last_end = 0
+            for match in pattern.finditer(chunk):
+                start, end = match.span()
+                result.append(chunk[last_end:start])
+                if self.check_index_within_match_index(
+                        index=match_count, 
+                        match_index=match_index,
+                    ):
+                    result.append(_LINK_SEARCH_PREFIX+link+_LINK_SEARCH_SUFFIX)
+                else:
+                    result.append(match.group(1))
+                last_end = end
+                match_count = match_count + 1
+            result.append(chunk[last_end:])
 
-            start, end = match.span()
-            result.append(highlighted_code[last_end:(last_end+start)])
+        return ''.join(result), match_count
 
-            if self.check_index_within_match_index(
-                    index=match_count, 
-                    match_index=match_index,
-                ):
-                result.append(_LINK_SEARCH_PREFIX+link+_LINK_SEARCH_SUFFIX)
-            else:
-                result.append(match.group(1))
 
-            last_end = last_end + end
-            match_count = match_count + 1
+    ## =========================== find_auto_links ========================== ##
+    def find_auto_links(self, 
+                        text:str, 
+                        exclude_terms:frozenset,
+                    ) -> List[Tuple[int, int, str]]:
+        """ Return `(start, end, open_tag)` of auto-linked terms within 
+            `text` (see `AutoLinker.find`), self-links are skipped.
 
-        return ''.join(result), match_count
+        :param text: Searched text (plain, not HTML).
+        :param exclude_terms: Terms not linked (explicit `links`).
+        :return: Sorted list of non-overlapping links.
+        """
+        found = self.auto_linker.find(
+                text=text, 
+                exclude_terms=exclude_terms, 
+                exclude_link_file=self.page_file,
+            )
+        self._auto_link_count += len(found)
+        auto_links = []
+        for start, end, term_id in found:
+            open_tag = self._auto_link_tags.get(term_id, None)
+            if open_tag is None:
+                open_tag = self.create_link_tag(
+                        match_string=self.auto_linker.terms[term_id], 
+                        link_file=self.auto_linker.link_files[term_id], 
+                        css_class=_HTML_AUTOLINK,
+                    )
+                self._auto_link_tags[term_id] = open_tag
+            auto_links.append((start, end, open_tag))
+        return auto_links
+
+
+    ## ====================== insert_auto_links_to_html ===================== ##
+    def insert_auto_links_to_html(self, 
+                                  html:str, 
+                                  exclude_terms:frozenset,
+                                ) -> str:
+        """ Insert auto-links into `html` (markdown), tags, entities and 
+            existing links are skipped (see `insert_link_to_highlighted_code`).
+        """
+        result = []
+        chunks = _HTML_MARKUP_REGEX.split(html)
+        for chunk_index, chunk in enumerate(chunks):
+            if chunk_index % 2 == 1 or not chunk:
+                result.append(chunk)
+                continue
+            last_end = 0
+            for start, end, open_tag in self.find_auto_links(
+                    text=chunk, exclude_terms=exclude_terms):
+                result.append(f"{chunk[last_end:start]}{open_tag}"\
+                              f"{chunk[start:end]}</a>")
+                last_end = end
+            result.append(chunk[last_end:])
+        return ''.join(result)
 
 
     ## ========================= check_html_header ========================== ##
     def check_html_header(
             self, 
-            header:dict,
+            header:Header,
             importance:int,
         ) -> bool:
         valid_header = True
@@ -344,8 +759,7 @@ class StructToHtml():
             if importance > _WARNING:
                 valid_header = False
         else:
-            title = header.get('title', None)
-            if title is None:
+            if header.title is None:
                 self.log_report(
                     importance=importance,
                     message=f"`header.title` is missing."
@@ -357,7 +771,7 @@ class StructToHtml():
 
     ## ========================= create_html_header ========================= ##
     def create_html_header(self, 
-                           header:dict, 
+                           header:Header, 
                            css_class_list:List[str]=[],
                         ) -> str:
         """ Returns an HTML string representing header.
@@ -369,8 +783,8 @@ class StructToHtml():
             yields
                 /llama.cpp/simple.cpp [permalink]
 
-        :param header: Dictionary with optional keys: 'titlePrefix', 'title', 
-            'permalink'
+        :param header: Header with optional `title_prefix`, `title`, 
+            `permalink`
         :param css_class_list: List of CSS classes assigned to HTML, 
             defaults to []
         :return: HTML string
@@ -382,19 +796,19 @@ class StructToHtml():
             css_classes = ' '.join(css_class_list)
             if len(css_classes) > 0:
                 css_classes = ' '+css_classes
-            title_prefix = header.get('titlePrefix', None)
+            title_prefix = header.title_prefix
             if title_prefix is not None:
                 header_html += \
                     f'<span class="{_HTML_HEADER_TITLEPREFIX}{css_classes}">'\
                     f'{title_prefix}</span>'
-            title = header.get('title', None)
+            title = header.title
             if title is not None:
                 if title_prefix is not None:
                     header_html += f'<span>&nbsp;&#8594;&nbsp;</span>'
                 header_html += \
                 f'<span class="{_HTML_HEADER_TITLE}{css_classes}">'\
                 f'{title}</span>'
-            permalink = header.get('permalink', None)
+            permalink = header.permalink
             if permalink is not None:
                 header_html += \
                     f'<a href="{permalink}" target="_blank" '\
@@ -402,103 +816,348 @@ class StructToHtml():
         return header_html
 
 
-    ## =================== insert_link_to_highlighted_code ================== ##
+    ## ===================== create_html_section_content ==================== ##
     def create_html_section_content(
             self,
             section_text:str, 
             syntax_highlight:str, 
             include_line_numbers:bool,
             line_number_start:int=1,
-        ) -> str:
+            links:List[Tuple[str, List[int], str]]=None,
+            auto_link_exclude:frozenset=None,
+            section_index:int=None,
+        ) -> Tuple[str, List[int]]:
         """ Processes section content composed of text that is highlighted 
-            and formatted accordingly.
+            and formatted accordingly. Content exceeding highlighting limits
+            (`generate.highlightMaxChars`, `generate.highlightTimeout`) is 
+            reported and shown as plain text (numbered lines with links).
 
         :param section_text: `text` of the section
         :param syntax_highlight: Syntax highlighter passed to Pygments lexer
         :param include_line_numbers: If True, line numbers are included
         :param line_number_start: Start of line numbering, defaults to 1
-        :return: HTML string representing highlighted text
+        :param links: List of `(match_string, match_index, open_tag)` 
+            inserted into the text, defaults to None
+        :param auto_link_exclude: Terms not auto-linked, auto-linking is 
+            off if None, defaults to None
+        :param section_index: Section index (reports), defaults to None
+        :return: HTML string representing highlighted text and number of 
+            matches of every link
         """
         # TODO: highlight without numbers, add custom numbers 
         # (to stretch when the code is wrapped)
 
         if not check_valid_syntax_highlight(syntax_highlight=syntax_highlight):
             syntax_highlight = self._default_syntax_highlight
+        links = links if links is not None else []
         if isinstance(section_text, str):
-            section_text = self.highlight_text(
-                    text=section_text, 
-                    syntax_highlight=syntax_highlight,
-                    include_line_numbers=include_line_numbers,
-                    line_number_start=line_number_start,
+            from python_lib.highlight import HighlightTimeout, \
+                highlight_time_limit
+            def highlight(syntax_highlight:str, include_line_numbers:bool, 
+                          deadline:float=None) -> Tuple[str, List[int]]:
+                writer = io.StringIO()
+                match_counts = self.write_highlighted_text(
+                        writer=writer,
+                        text=section_text, 
+                        syntax_highlight=syntax_highlight,
+                        include_line_numbers=include_line_numbers,
+                        line_number_start=line_number_start,
+                        links=links,
+                        auto_link_exclude=auto_link_exclude,
+                        deadline=deadline,
+                    )
+                writer.write("\n")
+                return writer.getvalue(), match_counts
+
+            limit = None
+            if self.highlight_max_chars > 0 and \
+               len(section_text) > self.highlight_max_chars:
+                limit = f"has {len(section_text)} characters (limit "\
+                        f"`generate.highlightMaxChars = "\
+                        f"{self.highlight_max_chars}`)"
+            else:
+                auto_link_count = self._auto_link_count
+                try:
+                    with highlight_time_limit(
+                            seconds=self.highlight_timeout) as deadline:
+                        content_html, match_counts = highlight(
+                            syntax_highlight=syntax_highlight,
+                            include_line_numbers=include_line_numbers,
+                            deadline=deadline,
+                        )
+                except HighlightTimeout:
+                    limit = f"took longer than `generate.highlightTimeout "\
+                            f"= {self.highlight_timeout}` s"
+                    self._auto_link_count = auto_link_count
+            if limit is not None:
+                self.log_report(
+                    importance=_ERROR,
+                    message="Content of `data.sections[{}]` (lexer '{}') {}, "\
+                        "it is shown as plain text.",
+                    message_args=(
+                        '?' if section_index is None else section_index, 
+                        syntax_highlight, limit),
+                    )
+                content_html, match_counts = highlight(
+                    syntax_highlight=_PLAIN_TEXT_LEXER,
+                    include_line_numbers=True,
                 )
-            section_text += "\n"
+            section_text = content_html
         else:
             section_text = ""
-        return section_text
+            match_counts = [0] * len(links)
+        return section_text, match_counts
+
+    ## ======================= prepare_section_content ====================== ##
+    def prepare_section_content(
+            self,
+            section:Section, 
+            section_index:int=0,
+        ) -> Union[Tuple[dict, List[bool]], None]:
+        """ Resolve everything the content of the section is rendered from 
+            (text, highlighter, line numbers, checked links), nothing is 
+            highlighted yet.
+
+        :param section: Section of the page
+        :param section_index: Section index, defaults to 0
+        :return: Tuple of arguments of `create_html_section_content` and 
+            mask of valid `links`, None if the section has no content
+        """
+        section_content = section.content
+        if section_content is None:
+            return None
+        syntax_highlight = section_content.syntax_highlight
+        syntax_highlight = syntax_highlight \
+                            if syntax_highlight is not None \
+                            else self._default_syntax_highlight
+    
+        # line numbers are not included for default syntaxHighlight
+        include_line_numbers = \
+            not (syntax_highlight==self._default_syntax_highlight)
+
+        # section content
+        section_text = section_content.text
+        source_line_start = None
+        source_file = section_content.source_file
+        if source_file is not None:
+            if section_text is not None:
+                self.log_report(
+                    importance=_WARNING,
+                    message=\
+                        f"Both `data.sections[{section_index}].content."\
+                        f"text` and `sourceFile` are set, `sourceFile` "\
+                        f"is ignored.")
+            else:
+                section_text, source_line_start = self.read_source_file(
+                        source_file=source_file, 
+                        lines=section_content.lines,
+                        section_index=section_index,
+                    )
+
+        line_number_start = section_content.line_number_start
+        if line_number_start is None and source_line_start is not None:
+            line_number_start = source_line_start
+            # lexers strip leading blank lines (`stripall`), the excerpt 
+            # keeps line numbers of the file
+            if isinstance(section_text, str) and \
+               syntax_highlight != "markdown":
+                stripped = len(section_text) - len(section_text.lstrip())
+                line_number_start += section_text[0:stripped].count('\n')
+        if line_number_start is None:
+            line_number_start = get_line_number_from_permalink(
+                    permalink=section.header.permalink,
+                )
+        
+        # links (checked up front, inserted while highlighting)
+        links = section.links
+        valid_links_mask = self.check_links(
+            links=links,
+            section_index=section_index,
+        )
+        link_targets = [
+            (str(link.match_string), 
+             link.match_index if isinstance(link.match_index, list) \
+                else [],
+             self.create_link_tag(
+                    match_string=link.match_string, 
+                    link_file=link.link_file,
+                    section_tag=link.section_tag, 
+                    css_class=link.css_class,
+                ))
+            for valid_link, link in zip(valid_links_mask, links) 
+            if valid_link]
+
+        # explicit `links` override auto-linking of their `matchString`
+        auto_link_exclude = None
+        if self.auto_linker is not None:
+            auto_link_exclude = frozenset(
+                match_string for match_string, _, _ in link_targets)
+
+        content_args = dict(
+            section_text=section_text, 
+            syntax_highlight=syntax_highlight,
+            include_line_numbers=include_line_numbers,
+            line_number_start=line_number_start,
+            links=link_targets,
+            auto_link_exclude=auto_link_exclude,
+            section_index=section_index,
+        )
+        return content_args, valid_links_mask
+
+
+    ## ======================= render_section_content ======================= ##
+    def render_section_content(
+            self,
+            content_args:dict,
+            rendered:Future=None,
+        ) -> Tuple[str, List[int]]:
+        """ Render section content (see `create_html_section_content`), 
+            identical content of other pages is taken from `fragment_store`.
+
+        :param content_args: Arguments from `prepare_section_content`
+        :param rendered: Future of `(html, match_counts, num_auto_links, 
+            log)` rendered by a worker (see `python_lib.section_pool`), 
+            defaults to None (rendered here)
+        :return: HTML string of the content and number of matches of every 
+            link
+        """
+        # identical content of other pages is rendered once
+        fragment_key = None
+        fragment = None
+        if self.fragment_store is not None:
+            fragment_key = self.get_fragment_key(content_args=content_args)
+            fragment = self.fragment_store.get(fragment_key)
+        self._content_html = None
+        self._content_path = None
+        if fragment is None:
+            html = None
+            if rendered is not None:
+                try:
+                    html, match_counts, self._auto_link_count, log = \
+                        rendered.result()
+                    # reports of the worker (e.g. highlighting limits)
+                    self.log.extend(log)
+                except Exception as e:
+                    self.log_report(
+                        importance=_WARNING,
+                        message="Worker failed to render section content "\
+                            "('{}'), rendering it again.",
+                        message_args=(e,),
+                        )
+            if html is None:
+                self._auto_link_count = 0
+                html, match_counts = self.create_html_section_content(
+                    **content_args)
+            self._content_html = html
+            if fragment_key is not None:
+                fragment = self.fragment_store.put(
+                    key=fragment_key, 
+                    html=html, 
+                    match_counts=match_counts, 
+                    num_auto_links=self._auto_link_count,
+                    )
+        self._fragment_bytes = 0
+        if fragment is not None:
+            html = fragment.html
+            match_counts = fragment.match_counts
+            self._auto_link_count = fragment.num_auto_links
+            if fragment.path is None:
+                self._content_html = html
+            elif self._content_html is None:
+                self._content_path = fragment.path
+            # the page is served only with its fragment file
+            if fragment.path is not None:
+                self.source_files[fragment.path] = fragment.key
+                self._fragment_bytes = fragment.num_bytes \
+                                        - len(html.encode('utf-8'))
+        return html, match_counts
+
+
+    def get_fragment_key(self, content_args:dict) -> str:
+        """ Return key of section content in `fragment_store`, made of 
+            everything the rendered content depends on.
+        """
+        auto_link_exclude = content_args['auto_link_exclude']
+        return self.fragment_store.get_key(
+            content_args['section_text'], content_args['syntax_highlight'], 
+            self._default_syntax_highlight, 
+            content_args['include_line_numbers'], 
+            content_args['line_number_start'], content_args['links'],
+            None if self.auto_linker is None else (
+                self.auto_linker.digest, 
+                sorted(auto_link_exclude), 
+                self.page_file),
+            )
+
 
     ## ========================= create_html_section ======================== ##
     def create_html_section(
             self,
-            section:dict, 
+            section:Section, 
             section_index:int=0,
+            prepared:Tuple[dict, List[bool]]=None,
+            rendered:Future=None,
         ) -> str:
         """ Process section including: 
             - header - title, titlep prefix and external link
             - content - highlighted text
             - links - seraching highlighted text and injecting JS callbacks
 
-        :param section: Dictionary representing the section structure
+        :param section: Section of the page
         :param section_index: Section index, since page contains multiple 
             indices, defaults to 0
+        :param prepared: Result of `prepare_section_content` if prepared up 
+            front, defaults to None (prepared here)
+        :param rendered: Future of the content rendered by a worker (see 
+            `render_section_content`), defaults to None (rendered here)
         :return: HTML string representing section
         """
         # section header 
-        section_header = section.get('header', dict())
+        section_header = section.header
         section_header_html = self.create_html_header(
                 header=section_header, 
                 css_class_list=[],
             )
 
-        # section syntaxHighlight
-        section_content = section.get('content', None)
-        if section_content is None:
+        section_stats = SectionStats(
+                section_index=section_index, 
+                section_tag=section.section_tag,
+            )
+
+        # section content
+        if prepared is None:
+            prepared = self.prepare_section_content(
+                    section=section, 
+                    section_index=section_index,
+                )
+        fragment_bytes = 0
+        if prepared is None:
             section_highlighted_content = ""
+            preview_content = ""
         else:
-            syntax_highlight = section_content.get('syntaxHighlight', None)
-            syntax_highlight = syntax_highlight \
-                                if syntax_highlight is not None \
-                                else self._default_syntax_highlight
-        
-            # line numbers are not included for default syntaxHighlight
-            include_line_numbers = \
-                not (syntax_highlight==self._default_syntax_highlight)
-
-            # section content
-            line_number_start = section_content.get('lineNumberStart', None)
-            if line_number_start is None:
-                line_number_start = get_line_number_from_permalink(
-                        permalink=section_header.get('permalink', None),
-                    )
-            
-            section_text = section_content.get('text', None)
-            section_highlighted_content = \
-                self.create_html_section_content(
-                    section_text=section_text, 
-                    syntax_highlight=syntax_highlight,
-                    include_line_numbers=include_line_numbers,
-                    line_number_start=line_number_start,
+            content_args, valid_links_mask = prepared
+            section_text = content_args['section_text']
+            links = section.links
+            section_highlighted_content, match_counts = \
+                self.render_section_content(
+                    content_args=content_args, 
+                    rendered=rendered,
                 )
+            fragment_bytes = self._fragment_bytes
+            if isinstance(section_text, str):
+                section_stats.num_lines = section_text.count('\n') + \
+                    (0 if section_text.endswith('\n') else 1)
+            section_stats.num_links = self._auto_link_count \
+                if self.auto_linker is not None else 0
+            if self._auto_link_count > 0 and log_enabled(_NOTE):
+                self.log_report(
+                    importance=_NOTE,
+                    message="Auto-linked {} terms in data.sections[{}] "\
+                        "`content.text`.",
+                    message_args=(self._auto_link_count, section_index),
+                    )
 
-            # links
-            links = section.get('links', [])
-            if isinstance(links, type(None)): 
-                # this may happe if links are `links:` without any content
-                links = []
-            valid_links_mask = self.check_links(
-                links=links,
-                section_index=section_index,
-            )
-            
+            match_counts = iter(match_counts)
             for valid_link, (link_index, link) in \
                 zip(valid_links_mask, enumerate(links)):
                 if not valid_link:
@@ -508,79 +1167,260 @@ class StructToHtml():
                             f"Skipping `data.sections[{section_index}]."\
                             f"links[{link_index}]' due to previous errors."\
                         )
+                    continue
             
-                html_link = \
-                    self.create_link(
-                            match_string=link['matchString'], 
-                            link_file=link['linkFile'],
-                            section_tag=link.get('sectionTag', None), 
-                            css_class=link.get('cssClass', None),
-                        )
-                section_highlighted_content, match_count = \
-                    self.insert_link_to_highlighted_code(
-                            highlighted_code=section_highlighted_content, 
-                            match_string=link['matchString'], 
-                            match_index=link['matchIndex'],
-                            link=html_link,
-                        )
+                match_count = next(match_counts)
+                num_linked = self.count_linked_matches(
+                    match_count=match_count, 
+                    match_index=link.match_index \
+                        if isinstance(link.match_index, list) else [],
+                    )
+                section_stats.num_links += num_linked
+                section_stats.link_matches.append(
+                    (link_index, link.match_string, num_linked))
                 if match_count == 0:
                     self.log_report(
                         importance=_ERROR, 
                         message= \
-                        f"No match found for '{link['matchString']}'"\
+                        f"No match found for '{link.match_string}'"\
                         f" from data.sections[{section_index}]."\
                         f"link[{link_index}] in section `content.text`.")
-                else:
+                elif log_enabled(_NOTE):
+                    # formatting deferred until the log is printed
                     self.log_report(
-                        importance=_NOTE, 
-                        message= \
-                        f"Found {match_count} matches for "\
-                        f"'{link['matchString']}'"\
-                        f" from data.sections[{section_index}]."\
-                        f"link[{link_index}] in section `content.text`.")
+                        importance=_NOTE,
+                        message="Found {} matches for '{}' from "\
+                            "data.sections[{}].link[{}] in section "\
+                            "`content.text`.",
+                        message_args=(match_count, link.match_string,
+                                      section_index, link_index),
+                        )
+
+            if self.preview_lines > 0:
+                preview_content = self.create_preview_content(
+                    num_lines=section_stats.num_lines)
         
         section_image_content = \
             self.create_html_section_image(
-                section_image = section.get('image', None), 
+                section_image = section.image, 
                 section_index = section_index)
 
-        # put together section
+        section_html = self._join_section_html(
+                section_header_html=section_header_html,
+                section_content_html=section_highlighted_content,
+                section_image_html=section_image_content,
+            )
+        if self.preview_lines > 0:
+            section_tag = html.escape(str(section.section_tag), quote=True)
+            section_attributes = f' data-section-tag="{section_tag}"'
+            if preview_content.startswith(
+                    f'<div class="{_HTML_SECTION_PREVIEW_MORE}">'):
+                # the viewer loads the page if the link targets this section
+                section_attributes += f' {_HTML_SECTION_PREVIEW_OMITTED}'
+            self._preview_sections.append(self._join_section_html(
+                section_header_html=section_header_html,
+                section_content_html=preview_content,
+                section_image_html=section_image_content,
+                section_attributes=section_attributes,
+            ))
+
+        # content of a fragment file counts as part of the section
+        section_stats.num_bytes = len(section_html.encode('utf-8')) \
+                                    + fragment_bytes
+        self._page_fragment_bytes += fragment_bytes
+        self.stats.sections.append(section_stats)
+        return section_html
+
+
+    def create_preview_content(self, num_lines:int) -> str:
+        """ Return preview of the content of the last rendered section, its
+            first rows (already highlighted, also read from a fragment file) 
+            as long as lines of the page preview (`preview_lines`) are left. 
+            Content without rows (e.g. markdown HTML) cannot be cut, it is 
+            shown whole if it fits. Occurrences (and `matchIndex`) are 
+            counted from the start, thus the same ones are linked.
+
+        :param num_lines: Lines of the section content.
+        :return: HTML of the preview content.
+        """
+        num_shown = min(num_lines, self._preview_lines_left)
+        preview_content = None
+        if num_shown > 0:
+            if self._content_html is not None:
+                preview_content = self._cut_content_rows(
+                    lines=io.StringIO(self._content_html), 
+                    num_lines=num_shown, 
+                    whole=num_shown == num_lines)
+            else:
+                with open(self._content_path, 'r', encoding='utf-8') as file:
+                    preview_content = self._cut_content_rows(
+                        lines=file, 
+                        num_lines=num_shown,
+                        whole=num_shown == num_lines)
+        if preview_content is None:
+            num_shown = 0
+            preview_content = ""
+        self._preview_lines_left -= num_shown
+        if num_lines > num_shown:
+            preview_content += \
+                f'<div class="{_HTML_SECTION_PREVIEW_MORE}">'\
+                f'&hellip; {num_lines - num_shown} more lines</div>\n'
+        return preview_content
+
+
+    @staticmethod
+    def _cut_content_rows(lines, num_lines:int, 
+                          whole:bool) -> Union[str, None]:
+        # first `num_lines` rows of rendered section content (its start/end 
+        # rows kept), content without rows only `whole`, else None
+        head = ''.join(islice(lines, 2))
+        if head == _HTML_DISPLAY_START:
+            rows = ''.join(islice(lines, num_lines))
+            return f"{head}{rows}{_HTML_DISPLAY_END}\n"
+        if whole:
+            return head + ''.join(lines)
+        return None
+
+
+    def _join_section_html(self, 
+                           section_header_html:str, 
+                           section_content_html:str,
+                           section_image_html:str,
+                           section_attributes:str="",
+                        ) -> str:
+        """ Put together section from its header, content and image HTML.
+        """
         section_html = ""
-        section_html += f'<div class="{_HTML_SECTION}">\n'
+        section_html += f'<div class="{_HTML_SECTION}"{section_attributes}>\n'
         if len(section_header_html) > 0:
             section_html += \
                 f'<div class="{_HTML_SECTION_HEADER}">\n' \
                     f'{section_header_html}' \
                 f'</div>\n'
-        if len(section_highlighted_content) > 0:
+        if len(section_content_html) > 0:
             section_html += \
                 f'<div class="{_HTML_SECTION_CONTENT}">\n' \
-                    f'{section_highlighted_content}' \
+                    f'{section_content_html}' \
                 f'</div>\n'
-        if len(section_image_content) > 0:
+        if len(section_image_html) > 0:
             section_html += \
                 f'<div class="{_HTML_SECTION_IMAGE_CONTAINER}">\n' \
-                    f'{section_image_content}' \
+                    f'{section_image_html}' \
                 f'</div>\n'
             section_html += f'</div>\n'
-            
         return section_html
     
     
-    def create_html_section_image(self, section_image, section_index):
+    ## =========================== read_source_file ========================= ##
+    def read_source_file(self,
+                         source_file:str,
+                         lines:list,
+                         section_index:int,
+                    ) -> Tuple[str, int]:
+        """ Read `content.lines` range of `content.sourceFile` (relative to 
+            `config.display.pathData`) through the memory-mapped cache.
+
+        :param source_file: Path to source file.
+        :param lines: `[first, last]` or `[first]` line (1-based, inclusive), 
+            None reads the whole file.
+        :param section_index: Section index (for reports).
+        :return: Tuple of text (None on error) and first line number 
+            (None if `lines` are not given).
+        """
+        line_range = (None, None)
+        if lines is not None:
+            line_range = parse_line_range(lines=lines)
+            if line_range is None:
+                self.log_report(
+                    importance=_ERROR,
+                    message=\
+                        f"Invalid `data.sections[{section_index}].content."\
+                        f"lines = {lines}`, valid values: [first, last] or "\
+                        f"[first] (1-based, first <= last).")
+                return None, None
+        source_path = Path(self.root_path, self._config_data_path, 
+                           source_file)
+        try:
+            text, first_line, _ = self.source_file_cache.read_lines(
+                    file_path=source_path, 
+                    first_line=line_range[0], 
+                    last_line=line_range[1],
+                )
+        except (OSError, ValueError) as e:
+            self.log_report(
+                importance=_ERROR,
+                message=\
+                    f"Cannot read `data.sections[{section_index}].content."\
+                    f"sourceFile = '{str(source_path)}'`: {e}")
+            return None, None
+        self.source_files[str(source_path)] = \
+            self.source_file_cache.get_key(file_path=source_path)
+        return text, (first_line if lines is not None else None)
+
+
+    def create_html_section_image(self, section_image:Image, 
+                                  section_index:int) -> str:
         section_image_content = ""
         
         # no image
         if section_image is None:
             return section_image_content
         # get path
-        section_image_path = section_image.get('path', None)
+        section_image_path = section_image.path
         if section_image_path is None:
             return section_image_content
         
         # continue processing image
+        self.check_section_image(
+                section_image=section_image, 
+                section_index=section_index,
+            )
+        image_path = str(Path(self._config_data_path, section_image_path))
+        image_alt_text = section_image.alt_text
+        image_max_width = section_image.max_width
+        image_max_height = section_image.max_height
+
+        # intrinsic size, variants and thumbnail (preview in right panel)
+        image_attributes = f'src="{image_path}"'
+        image = None
+        if self.image_store is not None:
+            image_full_path = Path(self.root_path, self._config_data_path, 
+                                   section_image_path)
+            image = self.image_store.get(file_path=image_full_path, 
+                                         url=image_path)
+        if image is not None:
+            self.images.append(image)
+            # pages are re-generated when the image changes
+            self.source_files[str(image_full_path)] = image.key
+            image_attributes = f'src="{image.src}"'
+            if image.srcset:
+                srcset = ", ".join(f"{url} {width}w" 
+                                   for url, width in image.srcset)
+                image_attributes += f' srcset="{srcset}" '\
+                                    f'sizes="{_HTML_IMAGE_SIZES}"'
+            if image.thumbnail is not None:
+                image_attributes += f' data-thumbnail="{image.thumbnail}"'
+            if image.width is not None and image.height is not None:
+                image_attributes += \
+                    f' width="{image.width}" height="{image.height}"'
+            image_attributes += f' loading="lazy" decoding="async"'
+            
+        section_image_content = \
+            f'<img {image_attributes} alt="{image_alt_text}" '\
+            f'style="max-width: {image_max_width}; '\
+            f'max-height: {image_max_height};" '\
+            f' class="{_HTML_SECTION_IMAGE}">'
+        
+        return section_image_content
+
+    def check_section_image(self, section_image:Image, 
+                            section_index:int) -> bool:
+        """ Check that the image file of the section exists.
+        """
+        if section_image is None or section_image.path is None:
+            return True
         image_full_path = Path(self.root_path, \
-            self._config_data_path, section_image_path)
+            self._config_data_path, section_image.path)
         if not image_full_path.exists():
             self.log_report(
                 importance=_ERROR, 
@@ -589,23 +1429,11 @@ class StructToHtml():
                     f"image' point to non-existent "\
                     f"file '{str(image_full_path)}'."\
                 )
-        image_path = str(Path(self._config_data_path, section_image_path))
-        image_alt_text = section_image.get('altText', "")
-        image_max_width = \
-            section_image.get('maxWidth', _HTML_DEFAULT_IMAGE_MAX_WIDTH)
-        image_max_height = \
-            section_image.get('maxHeight', _HTML_DEFAULT_IMAGE_MAX_HEIGHT)
-            
-        section_image_content = \
-            f'<img src="{image_path}" alt="{image_alt_text}" '\
-            f'style="max-width: {image_max_width}; '\
-            f'max-height: {image_max_height};" '\
-            f' class="{_HTML_SECTION_IMAGE}">'
-        
-        return section_image_content
+            return False
+        return True
 
     def check_links(self,
-                   links:dict,
+                   links:List[Link],
                    section_index:int,
                 ) -> List[bool]:
 
@@ -623,18 +1451,18 @@ class StructToHtml():
                
                 # if `valid_link==True`, check for duplicates
                 if valid_link:
-                    if link['matchString'] not in matchStrings:
-                        matchStrings.append(link['matchString'])
+                    if link.match_string not in matchStrings:
+                        matchStrings.append(link.match_string)
                     else:
                         dupklicated_indices = \
-                            matchStrings.index(link['matchString'])
+                            matchStrings.index(link.match_string)
                         self.log_report(
                             importance=_ERROR,
                             message=\
                                 f"Duplicate value for "\
                                 f"`data.sections[{section_index}]."\
                                 f"links[{link_index}].matchIndex = "\
-                                f"{link['matchIndex']}`, with previously "\
+                                f"{link.match_index}`, with previously "\
                                 f"checked links[{dupklicated_indices}]."
                             
                             )
@@ -646,7 +1474,7 @@ class StructToHtml():
         
     def check_yaml_section_link(
             self, 
-            link:dict, 
+            link:Link, 
             section_index:int, 
             link_index:int,
             ):
@@ -666,12 +1494,12 @@ class StructToHtml():
 
     def check_section_link_linkfile(
                 self, 
-                link:dict, 
+                link:Link, 
                 section_index:int, 
                 link_index:int,
             ) -> bool:
         valid_linkfile = True
-        if 'linkFile' not in link.keys():
+        if link.link_file is MISSING:
             self.log_report(
                 importance=_CRITICAL,
                 message=\
@@ -680,7 +1508,7 @@ class StructToHtml():
                     f"`linkFile` is compulsory!",
                 )            
             valid_linkfile = False
-        elif link['linkFile'] == None:
+        elif link.link_file is None:
             self.log_report(
                 importance=_CRITICAL,
                 message=\
@@ -692,10 +1520,10 @@ class StructToHtml():
         else:
             try:
                 if not Path(self.root_path).joinpath(\
-                    self._config_data_path, link['linkFile']\
+                    self._config_data_path, link.link_file\
                     ).exists():
                     path_str = str(Path(self.root_path).joinpath(\
-                        self._config_data_path, link['linkFile']))
+                        self._config_data_path, link.link_file))
                     self.log_report(
                         importance=_ERROR,
                         message=\
@@ -719,12 +1547,12 @@ class StructToHtml():
     
     def check_section_link_matchstring(
                 self, 
-                link:dict, 
+                link:Link, 
                 section_index:int, 
                 link_index:int,
             ) -> bool:
         valid_link = True
-        if 'matchString' not in link.keys():
+        if link.match_string is MISSING:
             self.log_report(
                 importance=_CRITICAL,
                 message=\
@@ -733,7 +1561,7 @@ class StructToHtml():
                     f"`matchString` is compulsory!",
                 )
             valid_link = False
-        elif link['matchString'] == None:
+        elif link.match_string is None:
             self.log_report(
                 importance=_CRITICAL,
                 message=\
@@ -0,0 +1,189 @@
+from pathlib import Path
+import re
+import threading
+from typing import List, Set, Tuple, Union
+
+
+## ========================================================================== ##
+##                                   CONSTS                                   ##
+## ========================================================================== ##
+# stylesheets of highlighted tokens loaded by `index.html`
+_TOKEN_STYLESHEETS = ["css/pygments_style.css",
+                      "css/pygments_style_default.css"]
+_SPAN_CLASS_REGEX = re.compile(rb'<span class="([^"]+)">')
+_TOKEN_RULE_REGEX = re.compile(r'^\.([\w-]+) \{ (.*?) \}')
+# rule of one or more (merged) token classes
+_TOKEN_SELECTORS_REGEX = re.compile(r'^(\.[\w-]+(?:, \.[\w-]+)*) \{')
+# first line of a pruned stylesheet, names the Pygments style
+_PRUNED_MARKER = "/* pruned by `generate_css.py --prune`, style '{}' */"
+_PRUNED_MARKER_REGEX = re.compile(
+    r"^/\* pruned by `generate_css\.py --prune`, style '([^']+)' \*/")
+
+
+## ========================================================================== ##
+##                                   TOKENS                                   ##
+## ========================================================================== ##
+
+## =========================== find_token_classes =========================== ##
+def find_token_classes(content:bytes) -> Set[str]:
+    """ Return CSS classes of highlighted tokens (`<span class="...">`)
+    within generated HTML.
+    """
+    classes = set()
+    for match in set(_SPAN_CLASS_REGEX.findall(content)):
+        classes.update(match.decode('utf-8', 'replace').split())
+    return classes
+
+
+## ========================= collect_token_classes ========================== ##
+def collect_token_classes(file_paths:list) -> Set[str]:
+    """ Return CSS classes of highlighted tokens emitted into generated
+    files (pages, previews, fragments).
+    """
+    classes = set()
+    for file_path in file_paths:
+        with open(file_path, 'rb') as file:
+            classes.update(find_token_classes(file.read()))
+    return classes
+
+
+## ================================ prune_css =============================== ##
+def prune_css(css:str, classes:set, style:str) -> Tuple[str, int, int]:
+    """ Keep token rules (`.<class> { ... }`) of used `classes` only, rules
+    with identical declarations are merged into one selector list (first
+    rule's position keeps the cascade order), other rules are kept as they
+    are. The first line marks the stylesheet as pruned (see
+    `PrunedStylesheets`).
+
+    :param css: Output of `HtmlFormatter.get_style_defs()`.
+    :param classes: Used token classes (see `collect_token_classes`).
+    :param style: Pygments style of `css`.
+    :return: Tuple of pruned CSS, number of kept and of all token rules.
+    """
+    lines = [_PRUNED_MARKER.format(style)]
+    rules = {} # declarations -> index of its line
+    num_rules = 0
+    num_kept = 0
+    for line in css.splitlines():
+        match = _TOKEN_RULE_REGEX.match(line)
+        if match is None:
+            lines.append(line)
+            continue
+        num_rules += 1
+        css_class, declarations = match.groups()
+        if css_class not in classes:
+            continue
+        num_kept += 1
+        if declarations in rules:
+            line_index = rules[declarations]
+            selectors = lines[line_index].split(' { ')[0]
+            lines[line_index] = f"{selectors}, .{css_class} {{ "\
+                                f"{declarations} }}"
+        else:
+            rules[declarations] = len(lines)
+            lines.append(f".{css_class} {{ {declarations} }}")
+    return '\n'.join(lines) + '\n', num_kept, num_rules
+
+
+def _get_rule_classes(css:str) -> Set[str]:
+    # token classes having a rule in `css` (also merged rules)
+    classes = set()
+    for line in css.splitlines():
+        match = _TOKEN_SELECTORS_REGEX.match(line)
+        if match is not None:
+            classes.update(selector[1:]
+                           for selector in match.group(1).split(', '))
+    return classes
+
+
+## ========================================================================== ##
+##                              PrunedStylesheets                             ##
+## ========================================================================== ##
+class PrunedStylesheets():
+    """ Detects token classes of newly generated pages (e.g. a new language,
+    pages rendered by `serve.py -r` or `render_daemon.py`) that have no rule
+    in stylesheets pruned by `generate_css.py --prune`, thus would be shown
+    unstyled. Stylesheets are re-read when they change.
+    """
+
+    def __init__(self, root_path:str):
+        """
+        :param root_path: Project root (where `index.html` is).
+        """
+        self.css_paths = [Path(root_path, css_path)
+                          for css_path in _TOKEN_STYLESHEETS]
+        self._key = None
+        self._sheets = []
+        self._reported = set()
+        self._lock = threading.Lock()
+
+    def _load(self) -> List[Tuple[Set[str], Set[str]]]:
+        # `(classes styled by the full style, kept classes)` of every
+        # pruned stylesheet
+        key = []
+        for css_path in self.css_paths:
+            try:
+                stat = css_path.stat()
+                key.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                key.append(None)
+        if key == self._key:
+            return self._sheets
+        sheets = []
+        for css_path in self.css_paths:
+            try:
+                with open(css_path, 'r') as file:
+                    css = file.read()
+            except OSError:
+                continue
+            match = _PRUNED_MARKER_REGEX.match(css)
+            if match is None:
+                continue
+            from pygments.formatters import HtmlFormatter
+            try:
+                full_css = HtmlFormatter(style=match.group(1))\
+                            .get_style_defs()
+            except Exception:
+                continue
+            sheets.append((_get_rule_classes(full_css),
+                           _get_rule_classes(css)))
+        self._key = key
+        self._sheets = sheets
+        self._reported = set()
+        return sheets
+
+    def is_pruned(self) -> bool:
+        """ Return True if a stylesheet is pruned (classes of new pages
+        should be checked).
+        """
+        with self._lock:
+            return bool(self._load())
+
+    def find_missing(self, classes:Set[str], once:bool=True) -> Set[str]:
+        """ Return token classes among `classes` styled by the full style
+        but pruned from a stylesheet, empty if no stylesheet is pruned.
+
+        :param classes: Token classes of generated pages.
+        :param once: If True, each class is returned once (until the 
+            stylesheets change), defaults to True
+        """
+        with self._lock:
+            missing = set()
+            for styled, kept in self._load():
+                missing.update((classes & styled) - kept)
+            if once:
+                missing -= self._reported
+                self._reported.update(missing)
+            return missing
+
+    def get_report(self, classes:Set[str], 
+                   once:bool=True) -> Union[str, None]:
+        """ Return message reporting pruned classes among `classes` (see
+        `find_missing`), `None` if there are none.
+        """
+        missing = self.find_missing(classes=classes, once=once)
+        if not missing:
+            return None
+        return f"token classes {', '.join(sorted(missing))} have no rule in "\
+               f"the pruned stylesheets (shown unstyled), run "\
+               f"`python generate_css.py --prune` again"
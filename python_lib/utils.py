@@ -1,14 +1,23 @@
+from functools import lru_cache
+import json
+import mmap
 import os
 from pathlib import Path
-from pygments.lexers import get_lexer_by_name
 import re
+from types import SimpleNamespace
 from typing import Union, Tuple, List, Any, Generator
-import yaml
 
 
 from python_lib.log import print_report, _CRITICAL
 
 
+## ========================================================================== ##
+##                                   CONSTS                                   ##
+## ========================================================================== ##
+# [B] - files are compared in chunks of this size (see `is_file_identical`)
+_COMPARE_CHUNK_BYTES = 1024 * 1024
+
+
 ## ========================================================================== ##
 ##                                    UTILS                                   ##
 ## ========================================================================== ##
@@ -34,13 +43,25 @@ def get_line_number_from_permalink(
     return line_number
 
 
-## ====================== check_valid_syntax_highlight ====================== ##
-def check_valid_syntax_highlight(syntax_highlight:str):
+## ================================ get_lexer =============================== ##
+@lru_cache(maxsize=None)
+def get_lexer(syntax_highlight:str):
+    """ Return (cached) Pygments lexer for `syntax_highlight` alias, `None` 
+    if there is no such lexer. Pygments (and its plugin lookup for unknown 
+    aliases) is imported/run only once per alias.
+    """
+    from pygments.lexers import get_lexer_by_name
     try:
-        _ = get_lexer_by_name(syntax_highlight, stripall=True)
+        return get_lexer_by_name(syntax_highlight, stripall=True)
     except Exception as e:
+        return None
+
+
+## ====================== check_valid_syntax_highlight ====================== ##
+def check_valid_syntax_highlight(syntax_highlight:str):
+    if not isinstance(syntax_highlight, str):
         return False
-    return True
+    return get_lexer(syntax_highlight) is not None
 
 
 ## ========================= _iterate_over_structure ======================== ##
@@ -109,15 +130,93 @@ def get_files_of_type(folder_path, file_extension, recursive):
 
 
 ## ============================= load_yaml_file ============================= ##
-def load_yaml_file(file_path:str):
+def load_yaml_file(file_path:str, report:bool=True):
+    import yaml
     try:
         with open(file_path, 'r') as file:
             data = yaml.safe_load(file)
     except Exception as e:
-        print_report(
-            importance=_CRITICAL, 
-            message=\
-                f"Exception when reading/parsing file '{file_path}': {e}")
+        if report:
+            print_report(
+                importance=_CRITICAL, 
+                message=\
+                    f"Exception when reading/parsing file '{file_path}': {e}")
         raise RuntimeError(\
             f"Exception when reading/parsing file '{file_path}': {e}")
-    return data
\ No newline at end of file
+    return data
+
+
+## ============================ load_config_file ============================ ##
+def load_config_file(config_path:str) -> SimpleNamespace:
+    """ Parse config file into nested `SimpleNamespace` (members are 
+    accessed as `config.display.pathData`), except `config.dataStructure` 
+    which is kept as `dict` (reference structure).
+
+    :param config_path: Path to config file.
+    :raises RuntimeError: If the file cannot be read/parsed.
+    :return: Parsed config.
+    """
+    import yaml
+    try:
+        def load_object(dct):
+            return SimpleNamespace(**dct)
+        with open(config_path, 'r') as file:
+            config_dict = yaml.safe_load(file)
+            config = json.loads(json.dumps(config_dict), 
+                                object_hook=load_object)
+            config.dataStructure = config_dict['dataStructure']
+    except Exception as e:
+        raise RuntimeError(\
+            f"Exception when reading/parsing config '{config_path}': {e}")
+    return config
+
+
+## ============================ is_file_identical =========================== ##
+def is_file_identical(file_path:str, content:bytes) -> bool:
+    """ Return True if `file_path` exists and holds exactly `content`. Sizes
+    are compared first, the memory-mapped file is then compared in chunks 
+    (never copied whole), the first different chunk ends the comparison.
+    """
+    try:
+        with open(file_path, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            if size != len(content):
+                return False
+            if size == 0:
+                return True
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) \
+                    as mapping, memoryview(content) as view:
+                for start in range(0, size, _COMPARE_CHUNK_BYTES):
+                    end = start + _COMPARE_CHUNK_BYTES
+                    if mapping[start:end] != view[start:end]:
+                        return False
+                return True
+    except (OSError, ValueError):
+        return False
+
+
+## ============================= write_if_changed =========================== ##
+def write_if_changed(file_path:str, content:Union[str, bytes]) -> bool:
+    """ Write `content` into `file_path` unless the file already holds
+    identical content, unchanged files keep their mtime (rsync, browser
+    caches and file watchers see no change). The file is replaced 
+    atomically, readers never see partially written content.
+
+    :param file_path: Path to the file.
+    :param content: New content, `str` is encoded as UTF-8.
+    :return: True if the file was (re)written, False if unchanged.
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    if is_file_identical(file_path=file_path, content=content):
+        return False
+    file_path = Path(file_path)
+    temp_path = file_path.with_name(f".{file_path.name}.{os.getpid()}")
+    try:
+        with open(temp_path, 'wb') as file:
+            file.write(content)
+        os.replace(temp_path, file_path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+    return True
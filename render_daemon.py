@@ -0,0 +1,179 @@
+import argparse
+import json
+from pathlib import Path
+import sys
+
+
+from python_lib.daemon import get_socket_path, send_request, \
+    is_daemon_running
+from python_lib.log import print_headline, print_notice, print_report, \
+    print_text, log_flush, log_set_min_importance, _NOTE, _WARNING, \
+    _CRITICAL
+
+
+## ========================================================================== ##
+##                                   client                                   ##
+## ========================================================================== ##
+def run_client(args, socket_path:Path) -> int:
+    """ Send one request (--render, --ping or --stop), the rendered HTML is
+    written to stdout, reports and timings to stderr. Returns exit status.
+    """
+    if args.ping:
+        pid = is_daemon_running(socket_path=socket_path)
+        print(f"running (pid {pid})" if pid is not None else "not running",
+              file=sys.stderr)
+        return 0 if pid is not None else 2
+
+    if args.stop:
+        request = {"op": "stop"}
+    else:
+        request = {"op": "render", "preview": args.preview}
+        if args.render != '-':
+            request["path"] = str(Path(args.render).resolve())
+        if args.render == '-' or args.stdin:
+            # unsaved content (e.g. editor buffer), `--render <path>` names it
+            request["text"] = sys.stdin.read()
+    try:
+        response = send_request(socket_path=socket_path, request=request)
+    except OSError as e:
+        print(f"daemon is not running on '{socket_path}' ({e}), start it "\
+              f"with `python render_daemon.py`", file=sys.stderr)
+        return 2
+
+    if args.json:
+        sys.stdout.write(json.dumps(response) + '\n')
+    elif response.get("html") is not None:
+        sys.stdout.write(response["html"])
+    if "error" in response:
+        print(response["error"], file=sys.stderr)
+    if not args.json:
+        for report in response.get("log", []):
+            print(f"{report['importance'].upper():<9}: {report['message']}",
+                  file=sys.stderr)
+        if args.verbose and "timings" in response:
+            print("timings [ms]: " + ", ".join(
+                f"{name} {value:.1f}"
+                for name, value in response["timings"].items()),
+                file=sys.stderr)
+    return 0 if response.get("ok", False) else 1
+
+
+## ========================================================================== ##
+##                                    main                                    ##
+## ========================================================================== ##
+def main():
+
+    # Command Line Interface
+    parser = argparse.ArgumentParser(
+        description=\
+            f"Long-lived renderer listening on a Unix socket (editor "\
+            f"previews, pre-commit hooks). Config, imports and lexers stay "\
+            f"loaded, thus a request costs only the rendering. Requests "\
+            f"are JSON objects, one per line (see "\
+            f"`python_lib.daemon.send_request`), or use --render as client.")
+    parser.add_argument("-d", "--directory",
+            default=str(Path(__file__).parent),
+            help=f"Path to project root (default: script's directory)")
+    parser.add_argument("-c", "--config",
+            default=str(Path(__file__).parent.joinpath("config.yaml")),
+            help=f"Path to config file (default: config.yaml in script's "\
+                f"directory)")
+    parser.add_argument("-s", "--socket",
+            default=None,
+            help=f"Path to the socket (default: <directory>/.cache/"\
+                f"render.sock)")
+    parser.add_argument("-q", "--quiet",
+            action="store_true",
+            help=f"If set, requests are not logged by the daemon.")
+    parser.add_argument("-v", "--verbose",
+            action="store_true",
+            help=f"If set, notes are reported as well (and the client "\
+                f"prints timings).")
+    # client
+    parser.add_argument("--render",
+            default=None,
+            metavar="PATH",
+            help=f"Client: render .yaml file PATH by the running daemon, "\
+                f"'-' reads YAML from stdin, exits with non-zero status if "\
+                f"the page is not valid.")
+    parser.add_argument("--stdin",
+            action="store_true",
+            help=f"Client: with --render PATH, YAML is read from stdin "\
+                f"(unsaved content of PATH).")
+    parser.add_argument("--preview",
+            action="store_true",
+            help=f"Client: with --render, return the preview of the page.")
+    parser.add_argument("--json",
+            action="store_true",
+            help=f"Client: print the whole response as JSON.")
+    parser.add_argument("--ping",
+            action="store_true",
+            help=f"Client: check whether the daemon is running.")
+    parser.add_argument("--stop",
+            action="store_true",
+            help=f"Client: stop the running daemon.")
+    args = parser.parse_args()
+
+    directory = Path(args.directory).resolve()
+    socket_path = Path(args.socket) if args.socket is not None \
+                    else get_socket_path(root_path=str(directory))
+
+    # client (nothing heavy is imported)
+    if args.render is not None or args.ping or args.stop:
+        sys.exit(run_client(args=args, socket_path=socket_path))
+
+    # check directory
+    if not directory.exists():
+        print_report(
+            importance=_CRITICAL,
+            message=f"invalid path: {str(directory)}")
+        print_notice(notice="FAILED", fill='!')
+        sys.exit(1)
+
+    # console output
+    print_headline(headline='Render daemon', fill='-', width=80)
+    print_text(f"project root          : {directory}")
+    print_text(f"socket                : {socket_path}")
+
+    # renderer keeps config, lexers and auto-link dictionary loaded
+    from python_lib.render import OnDemandRenderer
+    from python_lib.daemon import RenderDaemon
+    config_path = Path(args.config)
+    if not config_path.is_absolute():
+        config_path = Path(Path(__file__).parent, config_path)
+    try:
+        renderer = OnDemandRenderer(
+            root_path=str(directory),
+            config_path=str(config_path),
+        )
+        log_set_min_importance(min_importance=_NOTE if args.verbose \
+                                                else _WARNING)
+        def report(line:str) -> None:
+            print_text(line)
+            log_flush()
+        daemon = RenderDaemon(
+            socket_path=str(socket_path),
+            renderer=renderer,
+            quiet=args.quiet,
+            report=report,
+        )
+    except (OSError, RuntimeError) as e:
+        print_report(
+            importance=_CRITICAL,
+            message=f"The daemon cannot be started: {e}")
+        print_notice(notice="FAILED", fill='!')
+        sys.exit(1)
+    timings = daemon.warm_up()
+    print_text(f"warm-up               : {timings['total']:.1f} ms")
+    log_flush()
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        print_report(importance=_NOTE, message="keyboard interrupt, exiting")
+    finally:
+        daemon.server_close()
+    print_notice(notice="STOPPED", fill='~')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import sys
+from pathlib import Path
+
+
+from python_lib.log import print_headline, print_notice, print_report, \
+    print_text, log_flush, log_set_min_importance, _NOTE, _ERROR, _CRITICAL
+
+
+## ========================================================================== ##
+##                                    main                                    ##
+## ========================================================================== ##
+def main():
+
+    # Command Line Interface
+    parser = argparse.ArgumentParser(
+        description=\
+            f"Serve the project root (index.html, css, js and generated "\
+            f"pages) with a pool of threads, ETag validation, precompressed "\
+            f"variants (<file>.br, <file>.gz), byte ranges and in-memory "\
+            f"cache of hot files.")
+    parser.add_argument("-d", "--directory",
+            default=str(Path(__file__).parent),
+            help=f"Path to served directory (default: script's directory)")
+    parser.add_argument("-b", "--bind",
+            default="",
+            help=f"Address to bind (default: all interfaces)")
+    parser.add_argument("-p", "--port",
+            type=int,
+            default=8000,
+            help=f"Port (default: 8000)")
+    parser.add_argument("-t", "--threads",
+            type=int,
+            default=32,
+            help=f"Number of threads handling requests (default: 32)")
+    parser.add_argument("--cache-size",
+            type=int,
+            default=64,
+            help=f"Size of in-memory file cache in MB (default: 64)")
+    parser.add_argument("-r", "--render-on-demand",
+            action="store_true",
+            help=f"If set, <page>.html within <config.display.pathData> is "\
+                f"rendered from <page>.yaml when requested (cached in memory "\
+                f"and in .cache/render/ until the .yaml or config changes), "\
+                f"running generate_html.py is not needed.")
+    parser.add_argument("-c", "--config",
+            default=str(Path(__file__).parent.joinpath("config.yaml")),
+            help=f"Path to config file used by --render-on-demand "\
+                f"(default: config.yaml in script's directory)")
+    parser.add_argument("-q", "--quiet",
+            action="store_true",
+            help=f"If set, requests are not logged.")
+    args = parser.parse_args()
+
+    # check directory
+    directory = Path(args.directory)
+    if not directory.exists():
+        print_report(
+            importance=_CRITICAL,
+            message=f"invalid path: {str(directory)}")
+        print_notice(notice="FAILED", fill='!')
+        sys.exit(1)
+
+    # `index.html` is generated (see `python_lib.fingerprint`), a fresh
+    # checkout has none
+    from python_lib.fingerprint import fingerprint_index_html
+    fingerprint_index_html(root_path=str(directory))
+
+    # console output
+    print_headline(headline='Serving Code-navigator', fill='-', width=80)
+    print_text(f"served directory      : {directory}")
+    print_text(f"address               : http://{args.bind or 'localhost'}:"\
+               f"{args.port}")
+    print_text(f"threads               : {args.threads}")
+    print_text(f"cache size            : {args.cache_size} MB")
+
+    # on-demand rendering
+    renderer = None
+    if args.render_on_demand:
+        from python_lib.render import OnDemandRenderer
+        config_path = Path(args.config)
+        if not config_path.is_absolute():
+            config_path = Path(Path(__file__).parent, config_path)
+        try:
+            renderer = OnDemandRenderer(
+                root_path=str(directory),
+                config_path=str(config_path),
+                cache_bytes=args.cache_size * 1024 * 1024,
+            )
+        except (OSError, RuntimeError) as e:
+            print_report(
+                importance=_CRITICAL,
+                message=f"The specified config file cannot be used: {e}")
+            print_notice(notice="FAILED", fill='!')
+            sys.exit(1)
+        # only errors are reported while serving
+        log_set_min_importance(min_importance=_ERROR)
+    print_text(f"render on demand      : {renderer is not None}")
+
+    from python_lib.server import create_server
+    server = create_server(
+            directory=str(directory),
+            bind=args.bind,
+            port=args.port,
+            max_workers=args.threads,
+            cache_bytes=args.cache_size * 1024 * 1024,
+            renderer=renderer,
+            quiet=args.quiet,
+        )
+    log_flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print_report(importance=_NOTE, message="keyboard interrupt, exiting")
+    finally:
+        server.server_close()
+    print_notice(notice="STOPPED", fill='~')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+// ========================================================================== //
+//                               service worker                               //
+// ========================================================================== //
+// Optional (see `performance.serviceWorker` in config.yaml), registered by
+// js/script.js. Keeps the viewer, config and every page listed in
+// manifest.json in the browser cache:
+//   - `<file>?v=<hash>` (content-hashed) ... cache-first, never revalidated
+//   - fragments/, image_variants/ .......... cache-first (named by hash)
+//   - manifest.json ........................ network-first, cache if offline
+//   - everything else ...................... cache-first, revalidated in
+//                                            background (stale-while-revalidate)
+// Thus navigating already visited (or precached) pages needs no network and
+// the viewer keeps working when the server is down.
+const CACHE_NAME = 'code-navigator-v1';
+const MANIFEST_URL = 'manifest.json';
+const SHELL_URLS = ['./', 'index.html'];
+// files named by their content hash (fragments, resized images)
+const HASH_PATH_REGEX = /\/(fragments|image_variants)\/[0-9a-f]{16}[-.]/;
+// local and external resources referenced by index.html
+const RESOURCE_REGEX = /(?:href|src)="([^"#]+)"/g;
+// precached files fetched at a time (a large manifest does not flood the server)
+const PRECACHE_CONCURRENCY = 4;
+
+
+// ========================================================================== //
+//                                  Precache                                  //
+// ========================================================================== //
+function cacheUrl(cache, url) {
+    // external resources (e.g. js-yaml from CDN) are stored as opaque
+    const request = new Request(url, {
+        mode: new URL(url, self.location).origin === self.location.origin
+            ? 'same-origin' : 'no-cors',
+    });
+    return cache.match(request)
+        .then(cached => cached || fetch(request).then(response => {
+            if (response.ok || response.type === 'opaque') {
+                return cache.put(request, response);
+            }
+        }))
+        .catch(error => {
+            console.warn(`sw : cannot precache '${url}':`, error);
+        });
+}
+
+
+function cacheUrls(cache, urls) {
+    // `PRECACHE_CONCURRENCY` chains, each takes the next url when done
+    let next = 0;
+    const cacheNext = () => next < urls.length
+        ? cacheUrl(cache, urls[next++]).then(cacheNext) : undefined;
+    return Promise.all(Array.from(
+        { length: Math.min(PRECACHE_CONCURRENCY, urls.length) }, cacheNext));
+}
+
+
+function isOutdated(url, wanted, pageExtensions, manifestLoaded, indexLoaded) {
+    // cached versions of pages (and assets) not listed by the manifest (and
+    // index.html) anymore, nothing is dropped by what could not be loaded
+    if (url.origin !== self.location.origin || wanted.has(url.href)
+        || HASH_PATH_REGEX.test(url.pathname)) {
+        return false;
+    }
+    const extension = url.pathname.slice(url.pathname.lastIndexOf('.'));
+    if (pageExtensions.has(extension)) {
+        return manifestLoaded;
+    }
+    return url.searchParams.has('v') && manifestLoaded && indexLoaded;
+}
+
+
+function precacheFromManifest(manifest, indexHtml) {
+    const urls = new Set(SHELL_URLS);
+    for (const match of indexHtml.matchAll(RESOURCE_REGEX)) {
+        urls.add(match[1]);
+    }
+    if (manifest.config) {
+        urls.add(manifest.config);
+    }
+    const pages = manifest.pages || {};
+    for (const [page, hash] of Object.entries(pages)) {
+        urls.add(`${page}?v=${hash}`);
+    }
+    const wanted = new Set([...urls].map(url => new URL(url, self.location).href));
+    const pageExtensions = new Set(Object.keys(pages)
+        .map(page => page.slice(page.lastIndexOf('.'))));
+
+    return caches.open(CACHE_NAME).then(cache =>
+        // drop pages missing from the manifest and their outdated versions
+        cache.keys().then(requests => Promise.all(requests
+            .filter(request => isOutdated(new URL(request.url), wanted,
+                pageExtensions, manifest.pages !== undefined, indexHtml !== ''))
+            .map(request => cache.delete(request))))
+        .then(() => cacheUrls(cache, [...urls])));
+}
+
+
+function precache() {
+    return Promise.all([
+        fetch(MANIFEST_URL, { cache: 'no-cache' })
+            .then(response => response.ok ? response : Promise.reject())
+            .then(response => caches.open(CACHE_NAME)
+                .then(cache => cache.put(MANIFEST_URL, response.clone()))
+                .then(() => response.json()))
+            // without manifest (offline) no page is dropped
+            .catch(() => ({})),
+        fetch('index.html', { cache: 'no-cache' })
+            .then(response => response.text())
+            .catch(() => ''),
+    ]).then(([manifest, indexHtml]) =>
+        precacheFromManifest(manifest, indexHtml));
+}
+
+
+// ========================================================================== //
+//                                 Life cycle                                 //
+// ========================================================================== //
+self.addEventListener('install', event => {
+    event.waitUntil(precache().then(() => self.skipWaiting()));
+});
+
+
+self.addEventListener('activate', event => {
+    event.waitUntil(caches.keys()
+        .then(names => Promise.all(names
+            .filter(name => name.startsWith('code-navigator-') && name !== CACHE_NAME)
+            .map(name => caches.delete(name))))
+        .then(() => self.clients.claim()));
+});
+
+
+self.addEventListener('message', event => {
+    // sent by the viewer after a new manifest is loaded
+    if (event.data && event.data.type === 'precache') {
+        event.waitUntil(precache());
+    }
+});
+
+
+// ========================================================================== //
+//                                 Strategies                                 //
+// ========================================================================== //
+function cacheFirst(request) {
+    return caches.match(request).then(cached => cached || fetch(request)
+        .then(response => {
+            if (response.ok || response.type === 'opaque') {
+                const copy = response.clone();
+                caches.open(CACHE_NAME).then(cache => cache.put(request, copy));
+            }
+            return response;
+        }));
+}
+
+
+function networkFirst(request) {
+    return fetch(request)
+        .then(response => {
+            if (response.ok) {
+                const copy = response.clone();
+                caches.open(CACHE_NAME).then(cache => cache.put(request.url, copy));
+            }
+            return response;
+        })
+        .catch(() => caches.match(request.url)
+            .then(cached => cached || Promise.reject(new Error('offline'))));
+}
+
+
+function staleWhileRevalidate(event) {
+    const request = event.request;
+    const revalidated = fetch(request)
+        .then(response => {
+            if (response.ok) {
+                const copy = response.clone();
+                return caches.open(CACHE_NAME)
+                    .then(cache => cache.put(request, copy))
+                    .then(() => response);
+            }
+            return response;
+        });
+    return caches.match(request, { ignoreVary: true }).then(cached => {
+        if (cached) {
+            // answer from cache, refresh cache in background
+            event.waitUntil(revalidated.catch(() => undefined));
+            return cached;
+        }
+        return revalidated;
+    });
+}
+
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET' || request.headers.has('range')) {
+        return;
+    }
+    const url = new URL(request.url);
+
+    if (url.origin !== self.location.origin) {
+        event.respondWith(cacheFirst(request));
+    } else if (url.pathname.endsWith('/' + MANIFEST_URL)) {
+        event.respondWith(networkFirst(request));
+    } else if (url.searchParams.has('v') || HASH_PATH_REGEX.test(url.pathname)) {
+        event.respondWith(cacheFirst(request));
+    } else {
+        event.respondWith(staleWhileRevalidate(event));
+    }
+});